@@ -1,11 +1,13 @@
-from typing import Dict, Any
-import re
+from typing import Dict, Any, List, Optional, Tuple
+
+from configuration.config import FAQ_CONFIG
+from utils.faq_index import faq_entries, faq_index
 
 class FAQAgent:
     def __init__(self):
         self.faq_database = {
             'payment': {
-                'keywords': ['payment', 'pay', 'money', 'cash', 'card', 'mobile money', 'momo'],
+                'keywords': ['payment', 'pay', 'money', 'cash', 'card', 'mobile money', 'momo', 'payment methods', 'payment options'],
                 'response': """
                 **Payment Options on Jiji.com.gh:**
                 
@@ -89,37 +91,10 @@ class FAQAgent:
                 
                 **Forgot Password:** Use the "Forgot Password" link on login page
                 """
-            }
-        }
-    
-    def find_best_match(self, query: str) -> str:
-        """Find the best FAQ match for user query"""
-        query_lower = query.lower()
-        best_match = None
-        max_matches = 0
-        
-        for category, data in self.faq_database.items():
-            matches = sum(1 for keyword in data['keywords'] if keyword in query_lower)
-            if matches > max_matches:
-                max_matches = matches
-                best_match = category
-        
-        return best_match if max_matches > 0 else None
-    
-    def handle_inquiry(self, query: str, entities: Dict[str, Any]) -> str:
-        """Handle FAQ and support inquiries"""
-        # Find best matching FAQ
-        best_match = self.find_best_match(query)
-        
-        if best_match:
-            return self.faq_database[best_match]['response']
-        
-        # Handle specific questions
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['how', 'what', 'why', 'when', 'where']):
-            if 'jiji' in query_lower:
-                return """
+            },
+            'about': {
+                'keywords': ['jiji', 'marketplace', 'categories'],
+                'response': """
                 **About Jiji.com.gh:**
                 
                 Jiji is Ghana's largest online marketplace where you can:
@@ -135,9 +110,10 @@ class FAQAgent:
                 • Fashion & Beauty
                 • Home & Furniture
                 """
-            
-            elif any(word in query_lower for word in ['work', 'use', 'buy']):
-                return """
+            },
+            'how_to_buy': {
+                'keywords': ['how to buy', 'buying', 'use jiji', 'negotiate', 'contact seller'],
+                'response': """
                 **How to Buy on Jiji:**
                 
                 1. **Search** - Use the search bar or browse categories
@@ -153,6 +129,28 @@ class FAQAgent:
                 • Ask questions about the product condition
                 • Negotiate respectfully
                 """
+            }
+        }
+        
+        # TF-IDF index over keywords and responses, built once per process
+        self.index = faq_index(faq_entries(self.faq_database), FAQ_CONFIG['keyword_weight'])
+    
+    def search(self, query: str, k: int = FAQ_CONFIG['top_k']) -> List[Tuple[str, float]]:
+        """Top ``k`` FAQ entries for the query with their scores, best first"""
+        return self.index.search(query, k, FAQ_CONFIG['min_score'])
+    
+    def find_best_match(self, query: str) -> Optional[str]:
+        """Find the best FAQ match for user query"""
+        matches = self.search(query, k=1)
+        return matches[0][0] if matches else None
+    
+    def handle_inquiry(self, query: str, entities: Dict[str, Any]) -> str:
+        """Handle FAQ and support inquiries"""
+        # Find best matching FAQ
+        best_match = self.find_best_match(query)
+        
+        if best_match:
+            return self.faq_database[best_match]['response']
         
         # Default response for unmatched queries
         return """
@@ -1,5 +1,134 @@
+import json
+import os
 import re
-from typing import Dict, List, Any
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+from configuration.config import FEATURES, INTENT_CONFIG, STORAGE_CONFIG
+from utils.entity_extractor import Entity, ExtractedEntities, extract
+from utils.frozen import FrozenDict, freeze
+from utils.intent_model import HashedIntentModel
+from utils.keyword_automaton import ENTITY_DICTIONARY, entity_dictionaries
+from utils.message_scanner import MessageScanner
+from utils.result_cache import TTLCache
+
+# Dictionary entity kinds reported by extract_entities
+ENTITY_KINDS = ('product_type', 'brand', 'location', 'category')
+
+# Classification results by normalized message text, for the whole process
+CLASSIFICATION_MEMO = TTLCache(max_size=INTENT_CONFIG['memo_entries'], ttl=float('inf'))
+
+
+def load_intent_model() -> Optional[HashedIntentModel]:
+    """The trained intent model in the data directory, if there is one"""
+    path = os.path.join(STORAGE_CONFIG['data_dir'], STORAGE_CONFIG['intent_model_file'])
+    if not FEATURES['enable_intent_model'] or not os.path.exists(path):
+        return None
+    try:
+        return HashedIntentModel.load(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+INTENT_MODEL = load_intent_model()
+
+
+def normalize_message(text: str) -> str:
+    """Memo key and classified form of a message: lowercase, single spaces"""
+    return ' '.join(text.lower().split())
+
+
+NON_SPACE_PATTERN = re.compile(r'\S+')
+
+
+def normalized_offsets(text_lower: str) -> List[int]:
+    """Position in ``text_lower`` of each character of ``normalize_message(text_lower)``"""
+    offsets = []
+    for match in NON_SPACE_PATTERN.finditer(text_lower):
+        if offsets:
+            offsets.append(match.start() - 1)  # The single space stands for the run before this word
+        offsets.extend(range(match.start(), match.end()))
+    return offsets
+
+
+def locate_spans(spans: Iterable[Entity], text_lower: str) -> Tuple[Entity, ...]:
+    """Spans found in the normalized message, moved onto the lowercased message they came from"""
+    offsets = normalized_offsets(text_lower)
+    return tuple(span._replace(start=offsets[span.start], end=offsets[span.end - 1] + 1) for span in spans)
+
+
+# Classifier of a classify_many worker process, set by its initializer
+_WORKER_CLASSIFIER = None
+
+
+def _init_worker(classifier: 'IntentClassifier'):
+    global _WORKER_CLASSIFIER
+    _WORKER_CLASSIFIER = classifier
+
+
+def _classify_chunk(messages: List[str]) -> List[Dict[str, Any]]:
+    return [_WORKER_CLASSIFIER.classify_intent(message) for message in messages]
+
+
+def read_messages(path: str) -> Iterator[str]:
+    """Messages of a chat log, one per line
+    
+    Lines may be plain text or JSON objects like the chat history entries
+    (``{"role": "user", "content": ...}``); only user turns are kept from
+    the latter. Blank lines are skipped.
+    """
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.rstrip('\n')
+            if not line.strip():
+                continue
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if isinstance(record, dict) and 'content' in record:
+                    if record.get('role', 'user') == 'user':
+                        yield record['content']
+                    continue
+            yield line
+
+
+class ClassificationReport:
+    """Running throughput and intent distribution of a batch classification"""
+    
+    def __init__(self):
+        self.messages = 0
+        self.intents = Counter()
+        self.started = time.perf_counter()
+        self.finished = None
+    
+    def add(self, result: Dict[str, Any]):
+        self.messages += 1
+        self.intents[result['intent']] += 1
+    
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+    
+    def throughput(self) -> float:
+        """Messages per second so far"""
+        elapsed = self.elapsed()
+        return self.messages / elapsed if elapsed > 0 else 0.0
+    
+    def distribution(self) -> Dict[str, float]:
+        """Share of messages per intent, most common first"""
+        if not self.messages:
+            return {}
+        return {intent: count / self.messages for intent, count in self.intents.most_common()}
+    
+    def summary(self) -> str:
+        lines = [f"{self.messages:,} messages in {self.elapsed():.2f}s ({self.throughput():,.0f} messages/s)"]
+        for intent, share in self.distribution().items():
+            lines.append(f"  {intent:<20} {self.intents[intent]:>10,}  {share:6.1%}")
+        return '\n'.join(lines)
 
 class IntentClassifier:
     def __init__(self):
@@ -32,107 +161,164 @@ class IntentClassifier:
             ]
         }
         
-        self.product_keywords = [
-            'phone', 'smartphone', 'iphone', 'samsung', 'galaxy', 'android',
-            'laptop', 'computer', 'macbook', 'hp', 'dell', 'lenovo',
-            'tablet', 'ipad', 'headphone', 'airpods', 'speaker',
-            'camera', 'watch', 'smartwatch', 'tv', 'monitor',
-            'gaming', 'console', 'playstation', 'xbox',
-            'car', 'vehicle', 'toyota', 'honda', 'mercedes'
-        ]
-    
-    def extract_entities(self, text: str) -> Dict[str, Any]:
-        """Extract relevant entities from user input"""
-        entities = {
-            'product_type': [],
-            'brand': [],
-            'budget': {},
-            'location': [],
-            'specifications': []
-        }
-        
-        text_lower = text.lower()
-        
-        # Extract product types
-        for keyword in self.product_keywords:
-            if keyword in text_lower:
-                entities['product_type'].append(keyword)
-        
-        # Extract brands
-        brands = ['samsung', 'apple', 'iphone', 'hp', 'dell', 'lenovo', 'sony', 'lg', 'tecno', 'infinix']
-        for brand in brands:
-            if brand in text_lower:
-                entities['brand'].append(brand)
+        # Product, brand and city dictionaries from configuration/config.py
+        dictionaries = entity_dictionaries()
+        self.dictionaries = {kind: dictionaries[kind] for kind in ENTITY_KINDS}
         
-        # Extract budget information
-        budget_patterns = [
-            r'(?:under|below|less than|maximum|max)\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)',
-            r'(?:ghs?\s*)?(\d+(?:,\d{3})*)\s*(?:to|and|-|or)\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)',
-            r'budget\s*(?:of|is)?\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)',
-            r'between\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)\s*(?:and|to|-)\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)'
-        ]
+        # One pass per message for intent scores and dictionary entities; None runs the per-pattern regexes
+        self.scanner = MessageScanner(self.intent_patterns, self.dictionaries)
         
-        for pattern in budget_patterns:
-            matches = re.finditer(pattern, text_lower)
-            for match in matches:
-                groups = match.groups()
-                if len(groups) == 1:  # Single amount (under/below)
-                    entities['budget']['max'] = int(groups[0].replace(',', ''))
-                elif len(groups) == 2:  # Range
-                    entities['budget']['min'] = int(groups[0].replace(',', ''))
-                    entities['budget']['max'] = int(groups[1].replace(',', ''))
+        # Decides the intent when it is at least model_threshold sure; None uses the pattern scores only
+        self.model = INTENT_MODEL
+        self.model_threshold = INTENT_CONFIG['model_threshold']
         
-        # Extract specifications
-        spec_patterns = [
-            r'(\d+)\s*gb',
-            r'(\d+)\s*tb',
-            r'(\d+)\s*inch',
-            r'(\d+)\s*mp',
-            r'(\d+)\s*core'
+        # Shared by every classifier with these default patterns; give one with
+        # other patterns its own TTLCache, or None to classify every call afresh
+        self.memo = CLASSIFICATION_MEMO
+    
+    def __getstate__(self):
+        # Locks don't pickle: a classify_many worker gets a memo of its own
+        state = self.__dict__.copy()
+        state['memo'] = None if self.memo is None else self.memo.max_size
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.memo is not None:
+            self.memo = TTLCache(max_size=self.memo, ttl=float('inf'))
+    
+    def scan(self, text: str) -> Dict[str, Any]:
+        """Intent scores, entities and typed entity spans of a message in one scan"""
+        text_lower = text.lower()
+        result = self.scanner.scan(text_lower)
+        hits = [Entity(span.kind, span.value, span.start, span.end) for span in result.spans]
+        extracted = extract(text_lower, hits)
+        return {'intent_scores': result.intent_scores, 'entities': extracted.as_dict(), 'spans': extracted.entities}
+    
+    def extract_entities(self, text: str) -> Dict[str, Any]:
+        """Extract relevant entities from user input (immutable, see classify_intent)"""
+        return self.classify_intent(text)['entities']
+    
+    def extract_entities_by_pattern(self, text: str) -> ExtractedEntities:
+        """Entities of a message from the dictionary automaton, without the intent scanner"""
+        text_lower = text.lower()
+        hits = [
+            Entity(kind, value, match.start, match.end)
+            for match in ENTITY_DICTIONARY.find_all(text_lower)
+            for kind, value in match.values
+            if kind in ENTITY_KINDS
         ]
-        
-        for pattern in spec_patterns:
-            matches = re.findall(pattern, text_lower)
-            for match in matches:
-                entities['specifications'].append(f"{match} {pattern.split('\\')[1].split(')')[0]}")
-        
-        # Extract locations
-        ghana_cities = ['accra', 'kumasi', 'tamale', 'cape coast', 'tema', 'sekondi', 'koforidua']
-        for city in ghana_cities:
-            if city in text_lower:
-                entities['location'].append(city.title())
-        
-        return entities
+        return extract(text_lower, hits)
     
     def classify_intent(self, text: str) -> Dict[str, Any]:
-        """Classify user intent based on input text"""
-        text_lower = text.lower()
-        intent_scores = {}
+        """Classify user intent based on input text
         
-        # Calculate scores for each intent
-        for intent, patterns in self.intent_patterns.items():
-            score = 0
-            for pattern in patterns:
-                matches = len(re.findall(pattern, text_lower))
-                score += matches
-            intent_scores[intent] = score
+        The text is lowercased and its whitespace collapsed first, and the
+        result for that normalized text is memoized. Results are frozen
+        (FrozenDicts and tuples) since they are shared between callers.
+        ``spans`` index into ``text.lower()``, whatever its whitespace.
+        """
+        key = normalize_message(text)
+        result = self.memo.get(key) if self.memo is not None else None
+        if result is None:
+            result = freeze(self.score_message(key))
+            if self.memo is not None:
+                self.memo.set(key, result)
+        text_lower = text.lower()
+        if text_lower == key or not result['spans']:
+            return result
+        return FrozenDict(result, spans=locate_spans(result['spans'], text_lower))
+    
+    def memo_stats(self) -> Dict[str, Any]:
+        """Memo counters, including hit_rate"""
+        return self.memo.stats() if self.memo is not None else {}
+    
+    def score_message(self, text: str) -> Dict[str, Any]:
+        """Intent, scores and entities of a message, without the memo"""
+        if self.scanner is not None:
+            scanned = self.scan(text)
+            intent_scores = scanned['intent_scores']
+            entities = scanned['entities']
+            spans = scanned['spans']
+        else:
+            text_lower = text.lower()
+            intent_scores = {}
+            
+            # Calculate scores for each intent
+            for intent, patterns in self.intent_patterns.items():
+                score = 0
+                for pattern in patterns:
+                    matches = len(re.findall(pattern, text_lower))
+                    score += matches
+                intent_scores[intent] = score
+            
+            # Extract entities
+            extracted = self.extract_entities_by_pattern(text)
+            entities = extracted.as_dict()
+            spans = extracted.entities
         
         # Determine primary intent
         if not any(intent_scores.values()):
             primary_intent = 'general_chat'
         else:
             primary_intent = max(intent_scores, key=intent_scores.get)
+        confidence = max(intent_scores.values()) if intent_scores.values() else 0
+        source = 'patterns'
         
-        # Extract entities
-        entities = self.extract_entities(text)
+        # The model's probability replaces the pattern score when it is sure enough
+        if self.model is not None:
+            label, probability = self.model.predict(text)
+            if probability >= self.model_threshold:
+                primary_intent, confidence, source = label, probability, 'model'
         
         return {
             'intent': primary_intent,
-            'confidence': max(intent_scores.values()) if intent_scores.values() else 0,
+            'confidence': confidence,
             'entities': entities,
-            'all_scores': intent_scores
+            'all_scores': intent_scores,
+            'source': source,
+            'spans': spans
         }
     
+    def classify_many(self, messages: Iterable[str], workers: int = 0, chunk_size: int = 500,
+                      report: Optional[ClassificationReport] = None) -> Iterator[Dict[str, Any]]:
+        """Classify messages in order, streaming one ``classify_intent`` result per message
+        
+        With ``workers`` > 0 the messages are cut into chunks of
+        ``chunk_size`` and classified by a pool of worker processes, each
+        holding a copy of this classifier; at most a few chunks per worker
+        are in flight, so arbitrarily long inputs stream in bounded
+        memory. ``report`` is updated as results are yielded.
+        """
+        report = report if report is not None else ClassificationReport()
+        messages = iter(messages)
+        if workers <= 0:
+            for message in messages:
+                result = self.classify_intent(message)
+                report.add(result)
+                yield result
+            report.finished = time.perf_counter()
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            pending = deque()
+            while True:
+                while len(pending) < workers * 4:
+                    chunk = list(islice(messages, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_classify_chunk, chunk))
+                if not pending:
+                    break
+                for result in pending.popleft().result():
+                    report.add(result)
+                    yield result
+        report.finished = time.perf_counter()
+    
+    def classify_file(self, path: str, **options) -> Iterator[Dict[str, Any]]:
+        """``classify_many`` over a chat log read with ``read_messages``"""
+        return self.classify_many(read_messages(path), **options)
+    
     def get_intent_explanation(self, intent: str) -> str:
         """Get explanation for detected intent"""
         explanations = {
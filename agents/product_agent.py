@@ -2,17 +2,163 @@ import requests
 from bs4 import BeautifulSoup
 import re
 import time
-from typing import List, Dict, Tuple, Any
+import atexit
+import os
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, NamedTuple, Tuple, Any, Optional, Iterator
+import numpy as np
 import streamlit as st
 
+from configuration.config import (JIJI_CONFIG, SCRAPING_CONFIG, API_CONFIG, STORAGE_CONFIG,
+                                  ALERT_CONFIG, PRODUCT_CATEGORIES, PRODUCT_BRANDS, FEATURES)
+from utils.result_cache import TTLCache
+from utils.http_client import HttpClient, TokenBucket
+from utils.http_cache import HttpDiskCache
+from utils.listing_parser import ListingParser, LXML_AVAILABLE
+from utils.scrape_stats import ScrapePathStats
+from utils.product import Product
+from utils.result_set import ResultSet
+from utils.catalog import ListingCatalog
+from utils.single_flight import SingleFlight
+from utils.price_alerts import PriceAlertEngine
+from utils.price_history import PriceHistory
+from utils.specs import SpecSheet
+from utils.dedup import NearDuplicateIndex
+from utils.ranking import ResultRanker
+from utils.keyword_automaton import ENTITY_DICTIONARY
+
+# Queries asking for the cheapest listings get their results sorted by price
+PRICE_SORT_PATTERN = re.compile(r'\b(cheap|cheapest|lowest price|affordable)\b', re.IGNORECASE)
+
+# Comparison requests: result numbers ("#2", "item 3", "1 and 3"), ordinals, and names split on "vs"/"and"
+COMPARE_POSITION_PATTERN = re.compile(r'(?:#|\b(?:item|number|no\.?|product|result|option)\s*)(\d+)\b')
+ORDINALS = {'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5,
+            'sixth': 6, 'seventh': 7, 'eighth': 8, 'ninth': 9, 'tenth': 10}
+ORDINAL_PATTERN = re.compile(r'\b(' + '|'.join(ORDINALS) + r'|last)\b')
+COMPARE_VERB_PATTERN = re.compile(r'\b(?:compare|comparison|between|the|difference|which is better|what\'s)\b|[?!]')
+COMPARE_SPLIT_PATTERN = re.compile(r'\bvs\.?|\bversus\b|\band\b|\bor\b|\bwith\b|,|&')
+
+# Price alerts: "alert me if it drops by 10%" sets the watch's drop threshold
+DROP_PERCENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:%|percent\b)', re.IGNORECASE)
+
+# Subcategories in PRODUCT_CATEGORIES order, for picking one when a query names several
+CATEGORY_ORDER = [category for subcategories in PRODUCT_CATEGORIES.values() for category in subcategories]
+
+# Search endpoints, tried in this order until stats say otherwise
+SEARCH_PATHS = [
+    '/search',
+    '/ghana/cars/all-cars',
+    '/ghana/mobile-phones'
+]
+
+# Product card selectors, tried in order until one matches
+CARD_SELECTORS = [
+    'div.b-list-advert__item',
+    'div[data-testid="advert-list-item"]',
+    'div.qa-advert-list-item',
+    'article',
+    'div.advert-card'
+]
+
+# Shared by every session so concurrent searches don't each spin up threads
+_FETCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=JIJI_CONFIG['fetch_workers'],
+    thread_name_prefix='jiji-fetch'
+)
+
+# One connection pool and one rate limit for every session in the process
+HTTP_CLIENT = HttpClient(
+    headers=SCRAPING_CONFIG['headers'],
+    pool_size=SCRAPING_CONFIG['pool_size'],
+    # retry_attempts counts the first try as well
+    max_retries=min(SCRAPING_CONFIG['max_retries'], JIJI_CONFIG['retry_attempts'] - 1),
+    backoff_base=SCRAPING_CONFIG['backoff_base'],
+    backoff_max=SCRAPING_CONFIG['backoff_max'],
+    rate_limiter=TokenBucket(
+        rate=1 / SCRAPING_CONFIG['delay_between_requests'],
+        capacity=SCRAPING_CONFIG['burst_requests']
+    ),
+    cache=HttpDiskCache(
+        os.path.join(STORAGE_CONFIG['data_dir'], STORAGE_CONFIG['http_cache_file']),
+        fresh_for=SCRAPING_CONFIG['http_cache_fresh'],
+        stale_for=SCRAPING_CONFIG['http_cache_stale'],
+        max_entries=SCRAPING_CONFIG['http_cache_max_entries']
+    ) if FEATURES['enable_http_cache'] else None
+)
+
+# Which search paths and card selectors work, per product category
+SCRAPE_STATS = ScrapePathStats(
+    path=os.path.join(STORAGE_CONFIG['data_dir'], SCRAPING_CONFIG['path_stats_file']),
+    dead_after=SCRAPING_CONFIG['dead_path_failures'],
+    probe_interval=SCRAPING_CONFIG['dead_path_probe_interval']
+)
+atexit.register(SCRAPE_STATS.save)
+
+class CachedSearch(NamedTuple):
+    """A search's first results page and the search URL it came from"""
+    url: Optional[str]  # None when answered from the local catalog
+    products: List[Product]
+
+
+# Process-wide so every Streamlit session shares the same scraped results
+SEARCH_CACHE = TTLCache(
+    max_size=API_CONFIG['cache_max_entries'],
+    ttl=API_CONFIG['cache_duration']
+)
+
+# Columnar views of recent result lists, keyed by the identity of their products in
+# order: a search's results are filtered, sorted and summarized (on every rerun)
+# without rebuilding the columns. Each view holds its products, so ids stay unique.
+RESULT_SETS = TTLCache(
+    max_size=API_CONFIG['cache_max_entries'],
+    ttl=API_CONFIG['cache_duration']
+)
+
+# Identical searches in flight at the same time are fetched once
+SEARCH_FLIGHTS = SingleFlight()
+
+# Every listing ever parsed, searchable locally with FTS5
+CATALOG = ListingCatalog(
+    os.path.join(STORAGE_CONFIG['data_dir'], STORAGE_CONFIG['catalog_file'])
+) if FEATURES['enable_catalog'] else None
+
+# Every price ever scraped, per listing link
+PRICE_HISTORY = PriceHistory(
+    os.path.join(STORAGE_CONFIG['data_dir'], STORAGE_CONFIG['price_history_dir']),
+    segment_records=STORAGE_CONFIG['price_history_segment_records'],
+    retention=STORAGE_CONFIG['price_history_retention'],
+    min_interval=STORAGE_CONFIG['price_history_min_interval'],
+    max_segments=STORAGE_CONFIG['price_history_max_segments'],
+    compact_interval=STORAGE_CONFIG['price_history_compact_interval']
+) if FEATURES['enable_price_history'] else None
+
+# Price watches of every session; started with a fetch function by the app
+PRICE_ALERTS = PriceAlertEngine(
+    poll_interval=ALERT_CONFIG['poll_interval'],
+    batch_size=ALERT_CONFIG['batch_size'],
+    max_workers=ALERT_CONFIG['poll_workers'],
+    watch_ttl=ALERT_CONFIG['watch_ttl'],
+    max_watches_per_session=ALERT_CONFIG['max_watches_per_session'],
+    max_pending_alerts=ALERT_CONFIG['max_pending_alerts'],
+    max_snapshot=ALERT_CONFIG['snapshot_size'],
+    drop_percent=ALERT_CONFIG['drop_percent']
+)
+
 class ProductAgent:
     def __init__(self):
-        self.base_url = "https://jiji.com.gh"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.base_url = JIJI_CONFIG['base_url']
+        self.request_timeout = JIJI_CONFIG['request_timeout']
+        self.search_deadline = JIJI_CONFIG['search_deadline']
+        self.concurrent_fetch = JIJI_CONFIG['concurrent_fetch']
+        self.dedupe_results = JIJI_CONFIG['dedupe_results']
+        self.rank_results = JIJI_CONFIG['rank_results']
+        self.ranker = ResultRanker()
+        self.parser_engine = SCRAPING_CONFIG['parser'] if LXML_AVAILABLE else 'html.parser'
+        self.listing_parser = ListingParser(self.base_url) if self.parser_engine == 'lxml' else None
+        self.headers = SCRAPING_CONFIG['headers']
+        self.http = HTTP_CLIENT
+        self.session = HTTP_CLIENT.session
     
     def clean_price(self, price_text: str) -> str:
         """Clean and standardize price text"""
@@ -31,235 +177,669 @@ class ProductAgent:
         
         return price
     
-    def parse_product_card(self, product_element) -> Dict[str, str]:
+    def parse_product_card(self, product_element) -> Product:
         """Parse individual product card from Jiji"""
         try:
-            product = {}
-            
             # Extract title
             title_elem = product_element.find('a', class_='b-list-advert__item__title')
             if not title_elem:
                 title_elem = product_element.find('h3') or product_element.find('a')
             
-            product['title'] = title_elem.get_text(strip=True) if title_elem else "Product Title"
+            title = title_elem.get_text(strip=True) if title_elem else "Product Title"
             
             # Extract link
             link_elem = product_element.find('a', href=True)
             if link_elem:
                 href = link_elem['href']
-                product['link'] = href if href.startswith('http') else f"{self.base_url}{href}"
+                link = href if href.startswith('http') else f"{self.base_url}{href}"
             else:
-                product['link'] = "#"
+                link = "#"
             
             # Extract price
             price_elem = (product_element.find('div', class_='b-list-advert__item__price') or
                          product_element.find('span', class_='qa-advert-price') or
                          product_element.find('div', string=re.compile(r'GH₵|₵')))
             
-            if price_elem:
-                product['price'] = self.clean_price(price_elem.get_text(strip=True))
-            else:
-                product['price'] = "Price on request"
+            price_text = self.clean_price(price_elem.get_text(strip=True)) if price_elem else "Price on request"
             
             # Extract location
             location_elem = (product_element.find('div', class_='b-list-advert__item__location') or
                            product_element.find('span', class_='qa-advert-location'))
             
-            product['location'] = location_elem.get_text(strip=True) if location_elem else "Ghana"
+            location = location_elem.get_text(strip=True) if location_elem else "Ghana"
             
-            return product
+            # Parse the price once; everything downstream uses the numeric value
+            return Product.from_listing(title, link, price_text, location)
             
         except Exception as e:
             st.error(f"Error parsing product: {str(e)}")
-            return {
-                'title': "Product parsing error",
-                'price': "N/A",
-                'link': "#",
-                'location': "Ghana"
-            }
-    
-    def scrape_jiji_products(self, query: str, max_results: int = 10) -> List[Dict[str, str]]:
-        """Scrape products from Jiji.com.gh"""
+            return Product(title="Product parsing error", price_label="N/A")
+    
+    def normalize_query(self, query: str) -> str:
+        """Normalize a search query for use as a cache key"""
+        return ' '.join(query.lower().split())
+    
+    def detect_category(self, query: str) -> str:
+        """Detect the product category of a query from PRODUCT_CATEGORIES"""
+        categories = ENTITY_DICTIONARY.values(query.lower(), 'category', longest=True)
+        if not categories:
+            return 'general'
+        # Several categories named: the first in PRODUCT_CATEGORIES order, as before
+        return min(categories, key=CATEGORY_ORDER.index)
+    
+    def build_search_urls(self, query: str, category: Optional[str] = None) -> List[str]:
+        """Candidate Jiji search URLs for a query, in order of preference"""
+        quoted = requests.utils.quote(query)
+        paths = SEARCH_PATHS if category is None else SCRAPE_STATS.order(category, 'url', SEARCH_PATHS)
+        return [f"{self.base_url}{path}?query={quoted}" for path in paths]
+    
+    def fetch_products_from_url(self, url: str, max_results: int, deadline: float,
+                                category: str = 'general', fresh: bool = False) -> List[Product]:
+        """Fetch one search URL and parse its product cards
+        
+        ``fresh`` skips pages the HTTP disk cache would serve without asking
+        Jiji (fresh or stale-while-revalidate). Only an answer from Jiji
+        counts for or against the URL's path: rate limiting, deadlines and
+        connection errors propagate unrecorded, so a healthy path isn't
+        marked dead under load. A page the disk cache served as is was
+        recorded when it was fetched, so it isn't written to the catalog,
+        price history or path stats again as if seen now.
+        """
+        response = self.http.get(url, timeout=self.request_timeout, deadline=deadline, fresh=fresh)
+        if getattr(response, 'from_cache', False):
+            if response.status_code != 200:
+                return []
+            return self.parse_listing_page(response.content, max_results, category, record_stats=False)
+        products = []
         try:
-            # Format search query for URL
-            search_query = query.replace(' ', '-').lower()
-            search_url = f"{self.base_url}/search?query={requests.utils.quote(query)}"
-            
-            # Alternative search URLs to try
-            search_urls = [
-                f"{self.base_url}/search?query={requests.utils.quote(query)}",
-                f"{self.base_url}/ghana/cars/all-cars?query={requests.utils.quote(query)}",
-                f"{self.base_url}/ghana/mobile-phones?query={requests.utils.quote(query)}"
-            ]
-            
-            products = []
+            if response.status_code == 200:
+                products = self.parse_listing_page(response.content, max_results, category)
+                if CATALOG is not None:
+                    CATALOG.upsert(products)
+                if PRICE_HISTORY is not None:
+                    PRICE_HISTORY.record(products)
+            return products
+        finally:
+            SCRAPE_STATS.record(category, 'url', urlparse(url).path, bool(products))
+    
+    def parse_listing_page(self, content: bytes, max_results: int, category: str = 'general',
+                           record_stats: bool = True) -> List[Product]:
+        """Parse the product cards of a listing page with the configured engine
+        
+        ``record_stats`` off leaves the selector stats alone, for pages
+        already counted when they were fetched.
+        """
+        # Selectors are cheap to try, so failing ones are demoted rather than skipped
+        selectors = SCRAPE_STATS.order(category, 'selector', CARD_SELECTORS, skip_dead=False)
+        
+        if self.listing_parser is not None:
+            matched, product_elements, missed = self.listing_parser.find_cards(content, selectors)
+        else:
+            soup = BeautifulSoup(content, 'html.parser')
             
-            for url in search_urls:
-                try:
-                    response = self.session.get(url, timeout=10)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        
-                        # Find product containers (multiple selectors for robustness)
-                        product_selectors = [
-                            'div.b-list-advert__item',
-                            'div[data-testid="advert-list-item"]',
-                            'div.qa-advert-list-item',
-                            'article',
-                            'div.advert-card'
-                        ]
-                        
-                        product_elements = []
-                        for selector in product_selectors:
-                            elements = soup.select(selector)
-                            if elements:
-                                product_elements = elements
-                                break
-                        
-                        # Parse products
-                        for element in product_elements[:max_results]:
-                            product = self.parse_product_card(element)
-                            if product['title'] != "Product parsing error":
-                                products.append(product)
-                        
-                        if products:
-                            break  # Found products, no need to try other URLs
-                            
-                except Exception as e:
-                    continue  # Try next URL
+            # Find product containers (multiple selectors for robustness)
+            matched, product_elements, missed = None, [], []
+            for selector in selectors:
+                elements = soup.select(selector)
+                if elements:
+                    matched, product_elements = selector, elements
+                    break
+                missed.append(selector)
+        
+        if record_stats:
+            for selector in missed:
+                SCRAPE_STATS.record(category, 'selector', selector, False)
+            if matched:
+                SCRAPE_STATS.record(category, 'selector', matched, True)
+        
+        # Parse products
+        if self.listing_parser is not None:
+            return self.listing_parser.parse_cards(product_elements, max_results)
+        
+        products = []
+        for element in product_elements[:max_results]:
+            product = self.parse_product_card(element)
+            if product.title != "Product parsing error":
+                products.append(product)
+        
+        return products
+    
+    def fetch_first_sequential(self, urls: List[str], max_results: int, deadline: float,
+                               category: str = 'general', fresh: bool = False) -> Tuple[Optional[str], List[Product]]:
+        """Try URLs one after another until one yields products or the deadline passes"""
+        for url in urls:
+            if time.monotonic() >= deadline:
+                break
+            try:
+                products = self.fetch_products_from_url(url, max_results, deadline, category, fresh)
+                if products:
+                    return url, products  # Found products, no need to try other URLs
+            except Exception:
+                continue  # Try next URL
+        
+        return None, []
+    
+    def fetch_first_concurrent(self, urls: List[str], max_results: int, deadline: float,
+                               category: str = 'general', fresh: bool = False) -> Tuple[Optional[str], List[Product]]:
+        """Request all URLs at once and return the first response that yields products"""
+        pending = {
+            _FETCH_EXECUTOR.submit(self.fetch_products_from_url, url, max_results, deadline, category, fresh): url
+            for url in urls
+        }
+        urls_by_future = dict(pending)
+        
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        products = future.result()
+                    except Exception:
+                        continue  # Failed URL, wait for the others
+                    if products:
+                        return urls_by_future[future], products
             
-            return products[:max_results]
+            return None, []
+        finally:
+            # Drop the losers; requests already on the wire finish in the background
+            for future in pending:
+                future.cancel()
+    
+    def fetch_first(self, urls: List[str], max_results: int, deadline: float,
+                    category: str = 'general', fresh: bool = False) -> Tuple[Optional[str], List[Product]]:
+        """Fetch the first page of results with the configured fetch mode"""
+        if self.concurrent_fetch:
+            return self.fetch_first_concurrent(urls, max_results, deadline, category, fresh)
+        return self.fetch_first_sequential(urls, max_results, deadline, category, fresh)
+    
+    def scrape_jiji_products(self, query: str, max_results: int = 10,
+                             deadline: Optional[float] = None) -> List[Product]:
+        """Scrape products from Jiji.com.gh
+        
+        ``deadline`` is the total time budget in seconds for the whole query,
+        across all candidate URLs.
+        """
+        try:
+            return self.fetch_products(query, max_results, deadline)
             
         except Exception as e:
             st.error(f"Error scraping Jiji: {str(e)}")
             return self.get_sample_products(query)  # Fallback to sample data
     
-    def get_sample_products(self, query: str) -> List[Dict[str, str]]:
+    def fetch_products(self, query: str, max_results: int = 10,
+                       deadline: Optional[float] = None) -> List[Product]:
+        """Real listings for ``query``, cached or scraped; errors propagate instead of falling back to samples"""
+        cache_key = (self.normalize_query(query), max_results)
+        cached = SEARCH_CACHE.get(cache_key)
+        if cached is not None:
+            return list(cached.products)
+        
+        # Sessions searching the same thing at the same moment share one scrape
+        return list(SEARCH_FLIGHTS.do(cache_key, self.scrape_uncached, query, max_results, deadline))
+    
+    def scrape_uncached(self, query: str, max_results: int,
+                        deadline: Optional[float] = None) -> List[Product]:
+        """Answer a cache miss from the catalog or Jiji and cache the result"""
+        cache_key = (self.normalize_query(query), max_results)
+        
+        fetch_count = self.fetch_count(max_results)
+        
+        # Answer from the local catalog when it has enough fresh listings
+        local_products = self.distinct(self.search_catalog(query, fetch_count))
+        if len(local_products) >= max_results:
+            SEARCH_CACHE.set(cache_key, CachedSearch(None, local_products[:max_results]))
+            return local_products[:max_results]
+        
+        category = self.detect_category(query)
+        search_urls = self.build_search_urls(query, category)
+        budget = deadline if deadline is not None else self.search_deadline
+        expires_at = time.monotonic() + budget
+        
+        url, products = self.fetch_first(search_urls, fetch_count, expires_at, category)
+        
+        products = self.distinct(self.top_up(products, local_products, fetch_count + len(local_products)))
+        products = products[:max_results]
+        if products:
+            SEARCH_CACHE.set(cache_key, CachedSearch(url, products))
+        return products
+    
+    def warm_cache(self, query: str) -> List[Product]:
+        """Scrape ``query`` afresh and replace its shared cache entry
+        
+        Used by the background cache warmer and price alert polls, so unlike
+        ``scrape_jiji_products`` it ignores whatever is cached, asks Jiji for
+        current pages instead of taking them from the HTTP disk cache, and
+        lets errors propagate.
+        """
+        max_results = self.search_count()
+        category = self.detect_category(query)
+        search_urls = self.build_search_urls(query, category)
+        expires_at = time.monotonic() + self.search_deadline
+        
+        url, products = self.fetch_first(search_urls, self.fetch_count(max_results), expires_at, category, fresh=True)
+        products = self.distinct(products)
+        if products:
+            SEARCH_CACHE.set((self.normalize_query(query), max_results), CachedSearch(url, products[:max_results]))
+        return products[:max_results]
+    
+    def poll_products(self, query: str) -> List[Product]:
+        """Current results for a watched query: cached if fresh, else scraped
+        
+        Errors propagate instead of falling back to sample products, which
+        would otherwise look like brand new listings to the alert engine.
+        """
+        cached = SEARCH_CACHE.get((self.normalize_query(query), self.search_count()))
+        if cached is not None:
+            return list(cached.products)
+        return self.warm_cache(query)
+    
+    def search_catalog(self, query: str, max_results: int) -> List[Product]:
+        """Fresh listings from the local catalog matching the query"""
+        if CATALOG is None:
+            return []
+        return CATALOG.search(query, max_results, max_age=STORAGE_CONFIG['catalog_max_age'])
+    
+    def search_count(self) -> int:
+        """Results fetched and cached per search: enough candidates for ranking to choose from
+        
+        Searches, the cache warmer, price alert polls and streaming all use
+        it, so they read and write the same ``SEARCH_CACHE`` entries.
+        """
+        return JIJI_CONFIG['rank_candidates'] if self.rank_results else JIJI_CONFIG['max_results']
+    
+    def fetch_count(self, max_results: int) -> int:
+        """Cards to parse for ``max_results`` results, leaving room for dropped duplicates"""
+        return max_results * JIJI_CONFIG['dedupe_overfetch'] if self.dedupe_results else max_results
+    
+    def distinct(self, products: List[Product]) -> List[Product]:
+        """Products without reposts and near-duplicates of earlier ones, in order"""
+        if not self.dedupe_results:
+            return products
+        index = NearDuplicateIndex(threshold=JIJI_CONFIG['dedupe_threshold'])
+        return [product for product in products if index.add(product)]
+    
+    def top_up(self, products: List[Product], extra: List[Product], max_results: int) -> List[Product]:
+        """Fill up to ``max_results`` with ``extra`` products not already present"""
+        links = {product.link for product in products}
+        merged = list(products)
+        for product in extra:
+            if len(merged) >= max_results:
+                break
+            if product.link not in links:
+                links.add(product.link)
+                merged.append(product)
+        return merged
+    
+    def iter_products(self, query: str, max_pages: Optional[int] = None,
+                      max_results: Optional[int] = None,
+                      deadline: Optional[float] = None) -> Iterator[Product]:
+        """Yield products as each results page arrives, following pagination lazily
+        
+        Stops after ``max_pages`` pages, ``max_results`` products or
+        ``deadline`` seconds, whichever comes first. Only the links already
+        yielded are kept, so deep searches don't hold every page in memory.
+        """
+        max_pages = max_pages or JIJI_CONFIG['stream_max_pages']
+        max_results = max_results or JIJI_CONFIG['stream_max_results']
+        budget = deadline if deadline is not None else JIJI_CONFIG['stream_deadline']
+        expires_at = time.monotonic() + budget
+        category = self.detect_category(query)
+        search_urls = self.build_search_urls(query, category)
+        cache_count = self.search_count()
+        cache_key = (self.normalize_query(query), cache_count)
+        seen = set()
+        duplicates = NearDuplicateIndex(threshold=JIJI_CONFIG['dedupe_threshold']) if self.dedupe_results else None
+        yielded = 0
+        
+        # Page one is usually in the shared cache or the catalog; show it straight away
+        cached = SEARCH_CACHE.get(cache_key)
+        if cached is None:
+            local_products = self.distinct(self.search_catalog(query, self.fetch_count(cache_count)))
+            if len(local_products) >= cache_count:
+                cached = CachedSearch(None, local_products[:cache_count])
+        if cached is not None:
+            for product in cached.products[:max_results]:
+                seen.add(product.link if product.link != '#' else product.title)
+                if duplicates is not None:
+                    duplicates.add(product)
+                yielded += 1
+                yield product
+            if yielded >= max_results:
+                return
+            # Carry on from the page after the cached one; catalog listings came from no page
+            if cached.url is not None:
+                url, page = cached.url, 2
+            else:
+                url, page = search_urls[0], 1
+            products = None
+        else:
+            try:
+                url, products = SEARCH_FLIGHTS.do(
+                    ('first_page', cache_key[0], max_results), self.fetch_first,
+                    search_urls, max_results, expires_at, category
+                )
+            except Exception:
+                return
+            if products:
+                SEARCH_CACHE.set(cache_key, CachedSearch(url, self.distinct(products)[:cache_count]))
+            page = 1
+        
+        if url is None:
+            return
+        
+        while True:
+            if products is None:
+                try:
+                    page_url = url if page == 1 else f"{url}&page={page}"
+                    products = self.fetch_products_from_url(page_url, max_results, expires_at, category)
+                except Exception:
+                    return
+            
+            # Jiji repeats the last page past the end; stop when nothing is new
+            new_products = 0
+            for product in products:
+                key = product.link if product.link != '#' else product.title
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_products += 1
+                # Reposts of a listing already shown still count as new for paging
+                if duplicates is not None and not duplicates.add(product):
+                    continue
+                yielded += 1
+                yield product
+                if yielded >= max_results:
+                    return
+            
+            page += 1
+            if not new_products or page > max_pages or time.monotonic() >= expires_at:
+                return
+            products = None
+    
+    def get_sample_products(self, query: str) -> List[Product]:
         """Fallback sample products when scraping fails"""
         sample_products = [
-            {
-                'title': f"Samsung Galaxy S20 Ultra 128GB - {query}",
-                'price': "GH₵ 4,200",
-                'link': "https://jiji.com.gh/sample-product-1",
-                'location': "Accra, Greater Accra"
-            },
-            {
-                'title': f"Samsung Galaxy S20 Ultra 256GB - {query}",
-                'price': "GH₵ 4,800",
-                'link': "https://jiji.com.gh/sample-product-2",
-                'location': "Kumasi, Ashanti"
-            },
-            {
-                'title': f"Samsung Galaxy S20 Ultra (Used) - {query}",
-                'price': "GH₵ 3,500",
-                'link': "https://jiji.com.gh/sample-product-3",
-                'location': "Tema, Greater Accra"
-            }
+            Product(
+                title=f"Samsung Galaxy S20 Ultra 128GB - {query}",
+                price_pesewas=420000,
+                link="https://jiji.com.gh/sample-product-1",
+                location="Accra, Greater Accra"
+            ),
+            Product(
+                title=f"Samsung Galaxy S20 Ultra 256GB - {query}",
+                price_pesewas=480000,
+                link="https://jiji.com.gh/sample-product-2",
+                location="Kumasi, Ashanti"
+            ),
+            Product(
+                title=f"Samsung Galaxy S20 Ultra (Used) - {query}",
+                price_pesewas=350000,
+                link="https://jiji.com.gh/sample-product-3",
+                location="Tema, Greater Accra"
+            )
         ]
         return sample_products
     
-    def filter_by_budget(self, products: List[Dict[str, str]], budget: Dict[str, int]) -> List[Dict[str, str]]:
-        """Filter products by budget constraints"""
+    def to_result_set(self, products: List[Product]) -> ResultSet:
+        """Columnar view of products for vectorized filtering, sorting and stats, built once per list"""
+        key = tuple(map(id, products))
+        results = RESULT_SETS.get(key)
+        if results is None:
+            results = ResultSet.from_products(products, PRODUCT_BRANDS)
+            RESULT_SETS.set(key, results)
+        return results
+    
+    def to_products(self, results: ResultSet) -> List[Product]:
+        """Products of a filtered or sorted view, remembering the view for the next call"""
+        products = results.to_products()
+        RESULT_SETS.set(tuple(map(id, products)), results)
+        return products
+    
+    def filter_by_budget(self, products: List[Product], budget: Dict[str, int]) -> List[Product]:
+        """Filter products by budget constraints (unpriced listings are dropped)"""
         if not budget:
             return products
         
-        filtered_products = []
+        return self.to_products(self.to_result_set(products).filter_budget(budget.get('min'), budget.get('max')))
+    
+    def within_budget(self, product: Product, budget: Dict[str, int]) -> bool:
+        """Budget check for a single product, used while streaming"""
+        if not budget:
+            return True
+        if product.price_pesewas is None:
+            return False
+        if 'min' in budget and product.price_pesewas < budget['min'] * 100:
+            return False
+        if 'max' in budget and product.price_pesewas > budget['max'] * 100:
+            return False
+        return True
+    
+    def sort_by_price(self, products: List[Product], descending: bool = False) -> List[Product]:
+        """Sort products by price, unpriced listings last"""
+        return self.to_products(self.to_result_set(products).sort_by_price(descending))
+    
+    def rank_products(self, query: str, entities: Dict[str, Any], products: List[Product],
+                      max_results: Optional[int] = None) -> List[Product]:
+        """The ``max_results`` most relevant products, best first"""
+        if not self.rank_results:
+            return products[:max_results]
+        return self.ranker.top_k(products, query, entities, max_results)
+    
+    def price_stats(self, products: List[Product]) -> Dict[str, float]:
+        """Count, min, mean and max price (GHS) of the priced products"""
+        return self.to_result_set(products).price_stats()
+    
+    def build_search_query(self, query: str, entities: Dict[str, Any]) -> str:
+        """Build the Jiji search query from extracted entities"""
+        search_terms = []
         
-        for product in products:
-            try:
-                # Extract numeric price
-                price_text = product.get('price', '0')
-                price_match = re.search(r'[\d,]+', price_text.replace('GH₵', '').replace('₵', ''))
-                
-                if price_match:
-                    price = int(price_match.group().replace(',', ''))
-                    
-                    # Check budget constraints
-                    within_budget = True
-                    if 'min' in budget and price < budget['min']:
-                        within_budget = False
-                    if 'max' in budget and price > budget['max']:
-                        within_budget = False
-                    
-                    if within_budget:
-                        filtered_products.append(product)
-                        
-            except (ValueError, AttributeError):
-                # Include products with unparseable prices
-                filtered_products.append(product)
-        
-        return filtered_products
-    
-    def search_products(self, query: str, entities: Dict[str, Any]) -> Tuple[str, List[Dict[str, str]]]:
+        if entities.get('product_type'):
+            search_terms.extend(entities['product_type'])
+        if entities.get('brand'):
+            search_terms.extend(entities['brand'])
+        if entities.get('specifications'):
+            search_terms.extend(entities['specifications'])
+        
+        # Use original query if no specific terms found
+        if not search_terms:
+            return query
+        return ' '.join(search_terms)
+    
+    def format_search_response(self, query: str, entities: Dict[str, Any], products: List[Product]) -> str:
+        """Generate the chat response for a finished search"""
+        if not products:
+            return f"""
+            Sorry, I couldn't find any products matching "{query}" on Jiji.com.gh. 
+            
+            **Suggestions:**
+            • Try different keywords (e.g., "Galaxy" instead of "Samsung Galaxy")
+            • Check your budget range
+            • Try a broader search term
+            • Visit [Jiji.com.gh]({self.base_url}) directly
+            """
+        
+        budget_text = ""
+        if entities.get('budget'):
+            if 'min' in entities['budget'] and 'max' in entities['budget']:
+                budget_text = f" within GHS {entities['budget']['min']:,} - GHS {entities['budget']['max']:,}"
+            elif 'max' in entities['budget']:
+                budget_text = f" under GHS {entities['budget']['max']:,}"
+        
+        return f"""
+            Great! I found **{len(products)} products** matching "{query}"{budget_text} on Jiji.com.gh:
+            
+            Here are the best matches for you:
+            """
+    
+    def format_search_error(self, error: Exception) -> str:
+        """Generate the chat response for a failed search"""
+        return f"""
+            Sorry, I encountered an error while searching for products: {str(error)}
+            
+            Please try:
+            • Refreshing the page and trying again
+            • Using simpler search terms
+            • Visiting [Jiji.com.gh]({self.base_url}) directly
+            """
+    
+    def search_products(self, query: str, entities: Dict[str, Any]) -> Tuple[str, List[Product]]:
         """Main product search function"""
         try:
-            # Build search query from entities
-            search_terms = []
-            
-            if entities.get('product_type'):
-                search_terms.extend(entities['product_type'])
-            if entities.get('brand'):
-                search_terms.extend(entities['brand'])
-            if entities.get('specifications'):
-                search_terms.extend(entities['specifications'])
+            search_query = self.build_search_query(query, entities)
             
-            # Use original query if no specific terms found
-            if not search_terms:
-                search_query = query
-            else:
-                search_query = ' '.join(search_terms)
+            max_results = JIJI_CONFIG['max_results']
+            # Over-fetch so ranking has candidates to choose the best few from
+            candidates = self.search_count()
             
             # Scrape products
             with st.spinner("🔍 Searching Jiji.com.gh..."):
-                products = self.scrape_jiji_products(search_query)
+                products = self.scrape_jiji_products(search_query, max_results=candidates)
             
             # Filter by budget if specified
             if entities.get('budget'):
                 products = self.filter_by_budget(products, entities['budget'])
             
+            if PRICE_SORT_PATTERN.search(query):
+                products = self.sort_by_price(products)[:max_results]
+            else:
+                products = self.rank_products(query, entities, products, max_results)
+            
             # Store products in session state
             st.session_state.current_products = products
             
-            # Generate response
-            if not products:
-                response = f"""
-                Sorry, I couldn't find any products matching "{query}" on Jiji.com.gh. 
-                
-                **Suggestions:**
-                • Try different keywords (e.g., "Galaxy" instead of "Samsung Galaxy")
-                • Check your budget range
-                • Try a broader search term
-                • Visit [Jiji.com.gh]({self.base_url}) directly
-                """
-            else:
-                budget_text = ""
-                if entities.get('budget'):
-                    if 'min' in entities['budget'] and 'max' in entities['budget']:
-                        budget_text = f" within GHS {entities['budget']['min']:,} - GHS {entities['budget']['max']:,}"
-                    elif 'max' in entities['budget']:
-                        budget_text = f" under GHS {entities['budget']['max']:,}"
-                
-                response = f"""
-                Great! I found **{len(products)} products** matching "{query}"{budget_text} on Jiji.com.gh:
-                
-                Here are the best matches for you:
-                """
-            
-            return response, products
+            return self.format_search_response(query, entities, products), products
             
         except Exception as e:
-            error_response = f"""
-            Sorry, I encountered an error while searching for products: {str(e)}
+            return self.format_search_error(e), []
+    
+    def stream_products(self, query: str, entities: Dict[str, Any],
+                        max_pages: Optional[int] = None,
+                        max_results: Optional[int] = None) -> Iterator[Product]:
+        """Streaming version of search_products: yields in-budget products as they arrive
+        
+        Call ``complete_search`` with the collected products once done.
+        """
+        search_query = self.build_search_query(query, entities)
+        budget = entities.get('budget')
+        
+        for product in self.iter_products(search_query, max_pages=max_pages, max_results=max_results):
+            if self.within_budget(product, budget):
+                yield product
+    
+    def complete_search(self, query: str, entities: Dict[str, Any], products: List[Product]) -> str:
+        """Store streamed results in the session and build the chat response"""
+        if PRICE_SORT_PATTERN.search(query):
+            products[:] = self.sort_by_price(products)
+        else:
+            products[:] = self.rank_products(query, entities, products)
+        st.session_state.current_products = products
+        return self.format_search_response(query, entities, products)
+    
+    def compare_products(self, query: str, entities: Dict[str, Any]) -> str:
+        """Compare listings side by side, with specs pulled from their titles"""
+        if not FEATURES['enable_comparison']:
+            return self.comparison_unavailable()
+        
+        products = self.resolve_comparison(query, st.session_state.get('current_products', []))
+        if len(products) < 2:
+            return """
+            **Product Comparison**
             
-            Please try:
-            • Refreshing the page and trying again
-            • Using simpler search terms
-            • Visiting [Jiji.com.gh]({self.base_url}) directly
+            I need at least two products to compare. Try:
+            • Searching first, then *"compare 1 and 3"* or *"compare all"*
+            • Naming them: *"compare iPhone 13 vs Samsung Galaxy S21"*
             """
-            return error_response, []
+        
+        return self.format_comparison(SpecSheet.from_products(products))
     
-    def compare_products(self, query: str, entities: Dict[str, Any]) -> str:
-        """Compare products functionality"""
+    def resolve_comparison(self, query: str, current: List[Product]) -> List[Product]:
+        """Products a comparison request refers to
+        
+        Result numbers ("1 and 3", "first and second") pick from the current
+        results; names ("iPhone 13 vs Galaxy S21") are matched against them
+        and searched for when missing, or left out if that search fails.
+        With neither, the whole current results page is compared.
+        """
+        query_lower = query.lower()
+        remainder = COMPARE_SPLIT_PATTERN.sub(' ', COMPARE_VERB_PATTERN.sub(' ', query_lower))
+        positions = [int(number) for number in COMPARE_POSITION_PATTERN.findall(query_lower)]
+        positions += [ORDINALS.get(word, len(current)) for word in ORDINAL_PATTERN.findall(query_lower)]
+        # Bare numbers only count as positions when nothing else is named ("compare 1 and 3")
+        if remainder.split() and all(word.isdigit() for word in remainder.split()):
+            positions += [int(word) for word in remainder.split()]
+        picked = [current[position - 1] for position in dict.fromkeys(positions) if 0 < position <= len(current)]
+        if len(picked) >= 2:
+            return picked
+        
+        references = [
+            ' '.join(reference.split()) for reference in COMPARE_SPLIT_PATTERN.split(COMPARE_VERB_PATTERN.sub(' ', query_lower))
+            if len(reference.strip()) > 1 and not ORDINAL_PATTERN.fullmatch(reference.strip())
+        ]
+        if len(references) < 2:
+            return list(current)
+        
+        products = []
+        for reference in references:
+            words = set(reference.split())
+            match = max(current, key=lambda product: len(words & set(product.title.lower().split())), default=None)
+            if match is not None and len(words & set(match.title.lower().split())) * 2 >= len(words):
+                products.append(match)
+                continue
+            # A failed search leaves the reference out rather than comparing a sample listing
+            try:
+                found = self.fetch_products(reference, max_results=1)
+            except Exception:
+                found = []
+            if found:
+                products.append(found[0])
+        return products
+    
+    def format_comparison(self, sheet: SpecSheet) -> str:
+        """Markdown table of the sheet, one row per product, best value marked"""
+        columns = [('Price', 'price', 'GH₵ {:,.0f}')]
+        optional = [
+            ('Storage', 'storage_gb', '{:g} GB'),
+            ('RAM', 'ram_gb', '{:g} GB'),
+            ('Screen', 'screen_in', '{:g}"'),
+            ('Camera', 'camera_mp', '{:g} MP'),
+            ('GH₵/GB', 'price_per_gb', '{:,.1f}'),
+            ('GH₵/GB RAM', 'price_per_gb_ram', '{:,.0f}'),
+            ('GH₵/MP', 'price_per_mp', '{:,.1f}')
+        ]
+        columns += [column for column in optional if sheet.has_any(column[1])]
+        show_condition = any(sheet.conditions)
+        
+        best = {name: sheet.best(name) for _, name, _ in columns if name.startswith('price')}
+        header = ['#', 'Product'] + [label for label, _, _ in columns] + (['Condition'] if show_condition else [])
+        lines = ['| ' + ' | '.join(header) + ' |', '|' + '---|' * len(header)]
+        for row, product in enumerate(sheet.products):
+            cells = [str(row + 1), f"[{product.title[:60]}]({product.link})"]
+            for _, name, template in columns:
+                value = sheet.columns[name][row]
+                cell = template.format(value) if np.isfinite(value) else '–'
+                if best.get(name) == row and len(sheet) > 1:
+                    cell = f"**{cell}** ✓"
+                cells.append(cell)
+            if show_condition:
+                cells.append(sheet.conditions[row] or '–')
+            lines.append('| ' + ' | '.join(cell.replace('|', '/') for cell in cells) + ' |')
+        
+        notes = []
+        if best.get('price') is not None:
+            notes.append(f"• Cheapest: **{sheet.products[best['price']].title}**")
+        if best.get('price_per_gb') is not None:
+            notes.append(f"• Best storage value: **{sheet.products[best['price_per_gb']].title}**")
+        
+        return (f"**Comparing {len(sheet)} products**\n\n" + '\n'.join(lines) +
+                ('\n\n' + '\n'.join(notes) if notes else '') +
+                "\n\n*Specs are read from listing titles; check the listing before buying.*")
+    
+    def comparison_unavailable(self) -> str:
+        """Response when comparison is switched off"""
         return """
         **Product Comparison** (Coming Soon!)
         
@@ -273,7 +853,35 @@ class ProductAgent:
         """
     
     def set_price_alert(self, query: str, entities: Dict[str, Any]) -> str:
-        """Set price alert functionality"""
+        """Watch the query for new listings or price drops within the budget"""
+        if not FEATURES['enable_price_alerts']:
+            return self.price_alerts_unavailable()
+        
+        search_query = self.build_search_query(query, entities)
+        budget = entities.get('budget') or {}
+        session_id = st.session_state.get('session_id', 'default')
+        drop_match = DROP_PERCENT_PATTERN.search(query)
+        drop_percent = float(drop_match.group(1)) if drop_match else PRICE_ALERTS.drop_percent
+        PRICE_ALERTS.add_watch(session_id, search_query, budget.get('min'), budget.get('max'), drop_percent)
+        
+        if 'max' in budget:
+            budget_text = f" at GHS {budget['max']:,} or less"
+            if 'min' in budget:
+                budget_text = f" between GHS {budget['min']:,} and GHS {budget['max']:,}"
+        else:
+            budget_text = ""
+        
+        minutes = max(1, round(PRICE_ALERTS.poll_interval / 60))
+        active = len(PRICE_ALERTS.watches_for_session(session_id))
+        return f"""
+            🔔 **Price alert set** for "{search_query}"{budget_text}.
+            
+            I'll check Jiji.com.gh every {minutes} minutes and tell you here when a new
+            listing or a price drop of {drop_percent:g}% or more matches. You have {active} active alert{'s' if active != 1 else ''}.
+            """
+    
+    def price_alerts_unavailable(self) -> str:
+        """Response when price alerts are switched off"""
         return """
         **Price Alerts** (Coming Soon!)
         
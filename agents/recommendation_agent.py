@@ -1,6 +1,9 @@
 from typing import List, Dict, Tuple, Any
 import streamlit as st
 
+from utils.keyword_automaton import ENTITY_DICTIONARY
+from utils.product import Product
+
 class RecommendationAgent:
     def __init__(self):
         self.product_categories = {
@@ -64,34 +67,28 @@ class RecommendationAgent:
     
     def get_category_from_query(self, query: str) -> str:
         """Determine product category from query"""
-        query_lower = query.lower()
-        
-        phone_keywords = ['phone', 'smartphone', 'mobile', 'iphone', 'samsung', 'galaxy', 'android']
-        laptop_keywords = ['laptop', 'computer', 'macbook', 'notebook', 'pc']
-        
-        if any(keyword in query_lower for keyword in phone_keywords):
-            return 'smartphones'
-        elif any(keyword in query_lower for keyword in laptop_keywords):
-            return 'laptops'
+        for category in ENTITY_DICTIONARY.values(query.lower(), 'category', longest=True):
+            if category in self.product_categories:
+                return category
         
         return 'smartphones'  # Default
     
-    def format_recommendations(self, products: List[Dict], category: str, budget_category: str) -> List[Dict[str, str]]:
+    def format_recommendations(self, products: List[Dict], category: str, budget_category: str) -> List[Product]:
         """Format recommendations as product cards"""
         formatted_products = []
         
         for product in products:
-            formatted_product = {
-                'title': product['title'],
-                'price': product['price'],
-                'location': 'Accra, Greater Accra',  # Default location
-                'link': f"https://jiji.com.gh/search?query={product['title'].replace(' ', '+')}"
-            }
+            formatted_product = Product.from_listing(
+                title=product['title'],
+                link=f"https://jiji.com.gh/search?query={product['title'].replace(' ', '+')}",
+                price_text=product['price'],
+                location='Accra, Greater Accra'  # Default location
+            )
             formatted_products.append(formatted_product)
         
         return formatted_products
     
-    def get_recommendations(self, query: str, entities: Dict[str, Any]) -> Tuple[str, List[Dict[str, str]]]:
+    def get_recommendations(self, query: str, entities: Dict[str, Any]) -> Tuple[str, List[Product]]:
         """Generate product recommendations"""
         category = self.get_category_from_query(query)
         budget_category = self.determine_budget_category(entities.get('budget', {}))
@@ -144,7 +141,7 @@ class RecommendationAgent:
         
         return response, products
     
-    def get_trending_products(self) -> Tuple[str, List[Dict[str, str]]]:
+    def get_trending_products(self) -> Tuple[str, List[Product]]:
         """Get trending products"""
         products = self.format_recommendations(self.trending_products, 'trending', 'mixed')
         
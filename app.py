@@ -7,11 +7,13 @@ from datetime import datetime
 sys.path.append(os.path.dirname(__file__))
 
 from agents.intent_classifier import IntentClassifier
-from agents.product_agent import ProductAgent
+from agents.product_agent import ProductAgent, PRICE_ALERTS
 from agents.order_agent import OrderAgent
 from agents.faq_agent import FAQAgent
 from agents.recommendation_agent import RecommendationAgent
 from utils.session_manager import SessionManager
+from utils.cache_warmer import CacheWarmer
+from configuration.config import UI_CONFIG, API_CONFIG, FEATURES
 
 # Page configuration
 st.set_page_config(
@@ -109,23 +111,57 @@ class ShoppingAssistant:
     
     def display_products(self, products):
         """Display products in card format"""
-        for i, product in enumerate(products):
-            st.markdown(f"""
-            <div class="product-card">
-                <div class="product-title">{product.get('title', 'Product')}</div>
-                <div class="product-price">{product.get('price', 'Price not available')}</div>
-                <div class="product-location">📍 {product.get('location', 'Location not specified')}</div>
-                <div style="margin-top: 0.5rem;">
-                    <a href="{product.get('link', '#')}" target="_blank" 
-                       style="background-color: #1976d2; color: white; padding: 0.5rem 1rem; 
-                              text-decoration: none; border-radius: 4px; display: inline-block;">
-                        View Product
-                    </a>
-                </div>
+        for product in products:
+            self.display_product(product)
+    
+    def display_product(self, product):
+        """Display a single product card"""
+        st.markdown(f"""
+        <div class="product-card">
+            <div class="product-title">{product.get('title', 'Product')}</div>
+            <div class="product-price">{product.get('price', 'Price not available')}</div>
+            <div class="product-location">📍 {product.get('location', 'Location not specified')}</div>
+            <div style="margin-top: 0.5rem;">
+                <a href="{product.get('link', '#')}" target="_blank" 
+                   style="background-color: #1976d2; color: white; padding: 0.5rem 1rem; 
+                          text-decoration: none; border-radius: 4px; display: inline-block;">
+                    View Product
+                </a>
             </div>
-            """, unsafe_allow_html=True)
+        </div>
+        """, unsafe_allow_html=True)
     
-    def add_to_chat_history(self, role, content, products=None):
+    def stream_product_search(self, user_input, entities):
+        """Run a product search, rendering cards as soon as they are found"""
+        products = []
+        status = st.empty()
+        status.markdown("🔍 Searching Jiji.com.gh...")
+        results = st.container()
+        
+        try:
+            with results:
+                for product in self.product_agent.stream_products(user_input, entities):
+                    products.append(product)
+                    self.display_product(product)
+                    status.markdown(f"🔍 Searching Jiji.com.gh... {len(products)} products so far")
+        except Exception as e:
+            status.empty()
+            return self.product_agent.format_search_error(e), []
+        
+        status.empty()
+        return self.product_agent.complete_search(user_input, entities, products), products
+    
+    def deliver_price_alerts(self):
+        """Post price alerts triggered since the last rerun into the chat"""
+        alerts = self.session_manager.collect_price_alerts(PRICE_ALERTS)
+        for alert in alerts:
+            st.toast(f"🔔 {alert.describe()}")
+        if alerts:
+            lines = '\n'.join(f"• {alert.describe()}" for alert in alerts)
+            self.add_to_chat_history('assistant', f"🔔 **Price alerts**\n\n{lines}",
+                                     [alert.product for alert in alerts])
+    
+    def add_to_chat_history(self, role, content, products=None, entities=None):
         """Add message to chat history"""
         timestamp = datetime.now().strftime("%H:%M")
         message = {
@@ -135,21 +171,25 @@ class ShoppingAssistant:
         }
         if products:
             message['products'] = products
+        if entities is not None:
+            # Extracted once here, so session analytics never re-parse the text
+            message['entities'] = entities
         st.session_state.chat_history.append(message)
     
     def process_user_message(self, user_input):
         """Process user input and generate response"""
-        # Add user message to history
-        self.add_to_chat_history('user', user_input)
-        
         # Classify intent
         intent_result = self.intent_classifier.classify_intent(user_input)
         intent = intent_result['intent']
         entities = intent_result['entities']
         
+        # Add user message to history, with its entities
+        self.add_to_chat_history('user', user_input, entities=entities)
+        
         # Route to appropriate agent
         if intent == 'search_product':
-            response, products = self.product_agent.search_products(user_input, entities)
+            response, products = self.stream_product_search(user_input, entities)
+            self.session_manager.add_to_search_history(user_input, len(products), entities)
             self.add_to_chat_history('assistant', response, products)
             
         elif intent == 'track_order':
@@ -195,15 +235,7 @@ class ShoppingAssistant:
         
         # Popular searches
         st.sidebar.markdown("**Popular Searches:**")
-        popular_searches = [
-            "Samsung Galaxy phones",
-            "iPhone under GHS 3000",
-            "Gaming laptops",
-            "Bluetooth headphones",
-            "Android tablets"
-        ]
-        
-        for search in popular_searches:
+        for search in UI_CONFIG['popular_searches']:
             if st.sidebar.button(f"🔍 {search}", key=f"search_{search}"):
                 st.session_state.pending_query = search
                 st.rerun()
@@ -235,11 +267,47 @@ class ShoppingAssistant:
             if st.session_state.current_products:
                 st.sidebar.metric("Products Found", len(st.session_state.current_products))
 
+@st.cache_resource
+def start_cache_warmer():
+    """Start the background cache warmer once per server process"""
+    intent_classifier = IntentClassifier()
+    product_agent = ProductAgent()
+    # One URL at a time, so warm-ups leave most of the rate limit to users
+    product_agent.concurrent_fetch = False
+    
+    def warm(text):
+        # Same query users' searches build, so the warmed entry is the one they hit
+        entities = intent_classifier.extract_entities(text)
+        product_agent.warm_cache(product_agent.build_search_query(text, entities))
+    
+    queries = UI_CONFIG['popular_searches'] + [
+        product['title'] for product in RecommendationAgent().trending_products
+    ]
+    return CacheWarmer(
+        warm,
+        queries,
+        refresh_interval=API_CONFIG['cache_duration'] * API_CONFIG['warm_refresh_fraction'],
+        max_workers=API_CONFIG['warm_workers']
+    ).start()
+
+@st.cache_resource
+def start_price_alerts():
+    """Start polling price watches once per server process"""
+    product_agent = ProductAgent()
+    product_agent.concurrent_fetch = False
+    return PRICE_ALERTS.start(product_agent.poll_products)
+
 def main():
     # Initialize the shopping assistant
     assistant = ShoppingAssistant()
     assistant.initialize_session()
     
+    if FEATURES['enable_cache_warmer']:
+        start_cache_warmer()
+    if FEATURES['enable_price_alerts']:
+        start_price_alerts()
+        assistant.deliver_price_alerts()
+    
     # Header
     st.title("🛍️ AI Shopping Assistant")
     st.markdown("*Your intelligent shopping companion for Jiji.com.gh*")
@@ -318,13 +386,11 @@ def main():
             st.metric("Products Found", len(st.session_state.current_products))
             
             if st.session_state.current_products:
-                prices = [float(p.get('price', '0').replace('GH₵', '').replace(',', '')) 
-                         for p in st.session_state.current_products 
-                         if p.get('price') and p['price'].replace('GH₵', '').replace(',', '').replace(' ', '').isdigit()]
+                stats = assistant.product_agent.price_stats(st.session_state.current_products)
                 
-                if prices:
-                    st.metric("Avg Price", f"GH₵ {sum(prices)/len(prices):,.0f}")
-                    st.metric("Price Range", f"GH₵ {min(prices):,.0f} - GH₵ {max(prices):,.0f}")
+                if stats['count']:
+                    st.metric("Avg Price", f"GH₵ {stats['mean']:,.0f}")
+                    st.metric("Price Range", f"GH₵ {stats['min']:,.0f} - GH₵ {stats['max']:,.0f}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""Price alert engine benchmark: many watches, few distinct queries.
+
+Registers ``--watches`` watches spread over ``--queries`` distinct queries
+and ``--sessions`` sessions, then runs poll cycles against a fake fetch
+that reprices a fraction of each query's listings every cycle. Reports
+registration rate, fetches per cycle and the time spent diffing and
+matching. No network access is needed.
+
+    python benchmarks/bench_alerts.py
+    python benchmarks/bench_alerts.py --watches 100000 --queries 2000 --churn 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.price_alerts import PriceAlertEngine
+from utils.product import Product
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--watches', type=int, default=50000, help='watches to register')
+    parser.add_argument('--queries', type=int, default=500, help='distinct watched queries')
+    parser.add_argument('--sessions', type=int, default=5000, help='sessions owning the watches')
+    parser.add_argument('--results', type=int, default=40, help='listings returned per query')
+    parser.add_argument('--churn', type=float, default=0.1, help='fraction of listings repriced per cycle')
+    parser.add_argument('--cycles', type=int, default=5, help='poll cycles to run')
+    parser.add_argument('--drop-percent', type=float, default=5, help='smallest price drop that alerts')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = PriceAlertEngine(max_watches_per_session=max(20, args.watches // args.sessions + 1),
+                              drop_percent=args.drop_percent)
+    queries = [f"product {index} phone" for index in range(args.queries)]
+
+    started = time.perf_counter()
+    for index in range(args.watches):
+        ceiling = rng.choice((None, rng.randrange(500, 5000)))
+        engine.add_watch(f"session-{index % args.sessions}", rng.choice(queries), max_ghs=ceiling)
+    registration = time.perf_counter() - started
+
+    listings = {
+        query: {f"/item/{index}-{slot}": rng.randrange(50000, 600000) for slot in range(args.results)}
+        for index, query in enumerate(queries)
+    }
+    fetches = 0
+
+    def fetch(query):
+        nonlocal fetches
+        fetches += 1
+        prices = listings[query]
+        for link in rng.sample(list(prices), int(len(prices) * args.churn)):
+            prices[link] = max(100, int(prices[link] * rng.uniform(0.7, 1.05)))
+        return [Product(title=query, link=link, price_pesewas=price) for link, price in prices.items()]
+
+    engine.fetch = fetch
+    timings = []
+    for _ in range(args.cycles):
+        fetches = 0
+        started = time.perf_counter()
+        engine.poll_once()
+        timings.append((time.perf_counter() - started, fetches))
+
+    stats = engine.get_stats()
+    print(f"watches={stats['watches']} queries={stats['queries']} sessions={stats['sessions']}")
+    print(f"registration: {args.watches / registration:,.0f} watches/s")
+    for cycle, (elapsed, cycle_fetches) in enumerate(timings, start=1):
+        print(f"cycle {cycle}: {cycle_fetches} fetches, {elapsed * 1000:.1f} ms")
+    print(f"changes={stats['changes']} alerts={stats['alerts']} pending={stats['pending']}")
+
+    started = time.perf_counter()
+    drained = sum(len(engine.drain(f"session-{index}")) for index in range(args.sessions))
+    print(f"drained {drained} alerts in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
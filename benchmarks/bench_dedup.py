@@ -0,0 +1,91 @@
+"""Benchmark near-duplicate filtering and check known listing pairs.
+
+First runs labelled pairs through ``NearDuplicateIndex``: reposts of one
+listing that must collapse, and different models one digit apart (S21
+vs S22, a 2015 vs a 2016 Corolla) that must both be kept. Then filters
+``--listings`` synthetic listings, a ``--reposts`` fraction of them
+reposted with filler words, and reports listings per second and how
+many were collapsed. Exits with status 1 if a labelled pair is wrong.
+
+    python benchmarks/bench_dedup.py
+    python benchmarks/bench_dedup.py --listings 50000 --reposts 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configuration.config import JIJI_CONFIG
+from utils.dedup import NearDuplicateIndex
+from utils.product import Product
+
+# (first title, second title, same listing?); prices about 2% apart, same city, different links
+PAIRS = [
+    ("Samsung Galaxy S21 Ultra 256GB", "Clean Samsung Galaxy S21 Ultra 256GB", True),
+    ("iPhone 12 Pro Max 128GB", "iPhone 12 Pro Max 128 GB - urgent sale", True),
+    ("Toyota Corolla 2015", "Toyota Corolla 2015 very neat", True),
+    ("Samsung Galaxy S21 Ultra 256GB", "Samsung Galaxy S22 Ultra 256GB", False),
+    ("iPhone 12 Pro Max 128GB", "iPhone 13 Pro Max 128GB", False),
+    ("Toyota Corolla 2015", "Toyota Corolla 2016", False),
+    ("HP EliteBook 840 G5", "HP EliteBook 840 G6", False),
+]
+
+MODELS = ['Samsung Galaxy S{}', 'iPhone {} Pro', 'HP EliteBook {} G5', 'Toyota Corolla {}', 'Tecno Camon {}']
+CITIES = ['Accra', 'Kumasi', 'Tema', 'Takoradi']
+
+
+def check_pairs(threshold):
+    """Print each labelled pair's outcome; return how many are wrong"""
+    wrong = 0
+    for first, second, same in PAIRS:
+        index = NearDuplicateIndex(threshold=threshold)
+        index.add(Product(title=first, link='/item/1', location='Accra', price_pesewas=1_000_000))
+        collapsed = not index.add(Product(title=second, link='/item/2', location='Accra', price_pesewas=1_020_000))
+        ok = collapsed == same
+        wrong += not ok
+        print(f"{'ok   ' if ok else 'WRONG'} {'same' if same else 'diff'}  {first!r} / {second!r}")
+    return wrong
+
+
+def synthetic(count, reposts, seed):
+    rng = random.Random(seed)
+    products = []
+    for number in range(count):
+        if products and rng.random() < reposts:
+            original = rng.choice(products)
+            title = f"{rng.choice(['Clean', 'Neat', 'Urgent sale'])} {original.title}"
+            products.append(Product(title=title, link=f'/item/{number}', location=original.location,
+                                    price_pesewas=int(original.price_pesewas * rng.uniform(0.98, 1.02))))
+            continue
+        title = rng.choice(MODELS).format(rng.randrange(1, 3000))
+        products.append(Product(title=title, link=f'/item/{number}', location=rng.choice(CITIES),
+                                price_pesewas=rng.randrange(50_000, 5_000_000)))
+    return products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=20000, help='synthetic listings to filter')
+    parser.add_argument('--reposts', type=float, default=0.2, help='fraction of listings that are reposts')
+    parser.add_argument('--threshold', type=float, default=JIJI_CONFIG['dedupe_threshold'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    wrong = check_pairs(args.threshold)
+
+    products = synthetic(args.listings, args.reposts, args.seed)
+    index = NearDuplicateIndex(threshold=args.threshold)
+    start = time.perf_counter()
+    kept = sum(1 for product in products if index.add(product))
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(products):,} listings: kept {kept:,}, collapsed {index.duplicates:,} "
+          f"in {elapsed:.2f}s ({len(products) / elapsed:,.0f} listings/s)")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark FAQ retrieval: keyword substring loops vs the TF-IDF index.
+
+Pads the FAQ with generated entries up to each ``--sizes`` value and
+reports microseconds per query for the old per-keyword substring scan
+and for ``FAQIndex.search``, plus the index build time. The index only
+touches the postings of a query's own terms, so its per-query cost
+should stay flat as the FAQ grows while the scan grows linearly. The
+real questions are also answered with the app's FAQ to show what each
+path picks, and checked against the answer they should get; the script
+exits with status 1 if any index answer is wrong.
+
+    python benchmarks/bench_faq.py
+    python benchmarks/bench_faq.py --sizes 10 1000 100000 --queries 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.faq_agent import FAQAgent
+from utils.faq_index import FAQIndex, faq_entries
+
+# Question -> the FAQ entry that should answer it
+EXPECTED = {
+    "How do I pay on Jiji?": 'payment',
+    "can I pay with mobile money": 'payment',
+    "how does payment work": 'payment',
+    "Is Jiji safe to use?": 'safety',
+    "I got scammed by a seller": 'safety',
+    "How do returns work?": 'returns',
+    "what is your refund policy": 'returns',
+    "is delivery free to accra": 'shipping',
+    "how long does shipping take": 'shipping',
+    "how does delivery work": 'shipping',
+    "How to create an account?": 'account',
+    "forgot my password": 'account',
+    "what is jiji": 'about',
+    "how do I buy something": 'how_to_buy',
+}
+QUESTIONS = list(EXPECTED)
+
+
+def keyword_scan(database, query):
+    """The previous FAQAgent.find_best_match: substring test of every keyword of every entry"""
+    query_lower = query.lower()
+    best_match = None
+    max_matches = 0
+    for category, data in database.items():
+        matches = sum(1 for keyword in data['keywords'] if keyword in query_lower)
+        if matches > max_matches:
+            max_matches = matches
+            best_match = category
+    return best_match if max_matches > 0 else None
+
+
+def padded_database(database, size, seed):
+    """The FAQ plus generated entries drawn from a synthetic vocabulary"""
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('bcdfghjklmnprstvwz') + rng.choice('aeiou') for _ in range(3))
+                  for _ in range(max(1000, size * 5))]
+    padded = dict(database)
+    for number in range(max(0, size - len(database))):
+        keywords = rng.sample(vocabulary, 6)
+        response = ' '.join(rng.choice(vocabulary) for _ in range(60))
+        padded[f'generated_{number}'] = {'keywords': keywords, 'response': response}
+    return padded
+
+
+def per_query_us(function, queries):
+    start = time.perf_counter()
+    for query in queries:
+        function(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000], help='FAQ entries')
+    parser.add_argument('--queries', type=int, default=1000, help='queries timed per size')
+    parser.add_argument('--k', type=int, default=3, help='answers returned per query')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    agent = FAQAgent()
+    wrong = 0
+    for question, expected in EXPECTED.items():
+        answers = agent.search(question)
+        ok = bool(answers) and answers[0][0] == expected
+        wrong += not ok
+        print(f"{'ok   ' if ok else 'WRONG'} {question!r:32} scan: {keyword_scan(agent.faq_database, question)!s:12} "
+              f"index: {answers}")
+
+    rng = random.Random(args.seed)
+    queries = [rng.choice(QUESTIONS) for _ in range(args.queries)]
+    print(f"\n{'entries':>8} {'build':>9} {'scan':>12} {'index':>12}")
+    for size in args.sizes:
+        database = padded_database(agent.faq_database, size, args.seed)
+        start = time.perf_counter()
+        index = FAQIndex(faq_entries(database))
+        build = time.perf_counter() - start
+        scan = per_query_us(lambda query: keyword_scan(database, query), queries)
+        indexed = per_query_us(lambda query: index.search(query, args.k), queries)
+        print(f"{len(database):>8,} {build:>8.2f}s {scan:>9.1f} us {indexed:>9.1f} us")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
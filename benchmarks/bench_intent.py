@@ -0,0 +1,223 @@
+"""Benchmark intent classification: per-pattern regexes vs the one-pass scanner.
+
+Classifies a corpus of chat messages with the original classifier (one
+findall per intent pattern, a substring test per keyword of today's
+dictionaries, then the budget and per-unit spec regexes) and with
+``IntentClassifier``, checks their intent scores agree on every message
+and reports messages per second. Entities are not compared: the typed
+extractor reads budgets, specs and plurals the old regexes got wrong.
+The corpus is one message per line from a file (plain text or chat
+history JSON lines), or generated from templates.
+
+With ``--replay`` the corpus is reclassified through ``classify_many``
+instead, streamed across ``--workers`` processes, and the throughput and
+intent distribution are reported; ``--output`` writes one JSON result per
+line and ``--check`` compares every result with ``classify_intent``.
+
+    python benchmarks/bench_intent.py
+    python benchmarks/bench_intent.py chat_log.txt --repeat 3
+    python benchmarks/bench_intent.py --messages 50000
+    python benchmarks/bench_intent.py chat_log.jsonl --replay --workers 4 --output intents.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.intent_classifier import ClassificationReport, IntentClassifier, read_messages
+from utils.result_cache import TTLCache
+
+TEMPLATES = [
+    "{verb} {product} under GHS {amount}",
+    "I {verb} a {brand} {product} in {city}",
+    "{brand} {product} {size}gb between {amount} and {amount2}",
+    "compare {brand} vs {brand2} {product}, which is better?",
+    "what's the difference between {brand} and {brand2}",
+    "notify me when price drop for {product} below {amount}",
+    "let me know when the {product} is cheaper, tell me when it hits gh₵{amount}",
+    "track my order number {amount}, was it shipped?",
+    "how do I get a refund? what is your return policy for shipping",
+    "recommend the best {product} for gaming, what should I buy",
+    "which one is popular: {brand} or {brand2}? suggest alternatives",
+    "{product} {size} inch {camera}mp {cores} core budget of {amount}",
+    "hello there",
+    "thanks, that helps a lot!",
+    "Looking for a cheap {product} with {size}GB RAM in {city}, max {amount}",
+    "any {brand} {product}s? ghs {amount} - {amount2} please",
+    "when price of {product} in {city} drops alert me",
+]
+
+WORDS = {
+    'verb': ['find', 'search', 'want', 'need', 'buy', 'look for', 'shopping for', 'purchase'],
+    'product': ['phone', 'smartphone', 'laptop', 'tablet', 'headphones', 'camera', 'smartwatch', 'tv', 'car', 'console'],
+    'brand': ['Samsung', 'iPhone', 'Apple', 'HP', 'Dell', 'Lenovo', 'Sony', 'LG', 'Tecno', 'Infinix'],
+    'city': ['Accra', 'Kumasi', 'Tamale', 'Cape Coast', 'Tema', 'Sekondi', 'Koforidua', 'Ho'],
+}
+
+
+# The budget and spec regexes of the classifier before the scanner
+BUDGET_PATTERNS = [
+    r'(?:under|below|less than|maximum|max)\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)',
+    r'(?:ghs?\s*)?(\d+(?:,\d{3})*)\s*(?:to|and|-|or)\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)',
+    r'budget\s*(?:of|is)?\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)',
+    r'between\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)\s*(?:and|to|-)\s*(?:ghs?\s*)?(\d+(?:,\d{3})*)'
+]
+SPEC_PATTERNS = {'gb': r'(\d+)\s*gb', 'tb': r'(\d+)\s*tb', 'inch': r'(\d+)\s*inch',
+                 'mp': r'(\d+)\s*mp', 'core': r'(\d+)\s*core'}
+
+
+class PatternClassifier:
+    """The original classifier: every pattern and keyword tested on its own
+
+    One ``re.findall`` per intent pattern, a substring test per keyword
+    of each dictionary, then the four budget and five spec regexes.
+    """
+
+    def __init__(self, intent_patterns, dictionaries):
+        self.intent_patterns = intent_patterns
+        self.dictionaries = dictionaries
+
+    def extract_entities(self, text_lower):
+        entities = {kind: [value for keyword, value in keywords.items() if keyword in text_lower]
+                    for kind, keywords in self.dictionaries.items()}
+        entities['budget'] = {}
+        entities['specifications'] = []
+        for pattern in BUDGET_PATTERNS:
+            for match in re.finditer(pattern, text_lower):
+                groups = match.groups()
+                if len(groups) == 1:
+                    entities['budget']['max'] = int(groups[0].replace(',', ''))
+                else:
+                    entities['budget']['min'] = int(groups[0].replace(',', ''))
+                    entities['budget']['max'] = int(groups[1].replace(',', ''))
+        for unit, pattern in SPEC_PATTERNS.items():
+            entities['specifications'].extend(f"{size} {unit}" for size in re.findall(pattern, text_lower))
+        return entities
+
+    def classify_intent(self, text):
+        text_lower = text.lower()
+        intent_scores = {
+            intent: sum(len(re.findall(pattern, text_lower)) for pattern in patterns)
+            for intent, patterns in self.intent_patterns.items()
+        }
+        if not any(intent_scores.values()):
+            primary_intent = 'general_chat'
+        else:
+            primary_intent = max(intent_scores, key=intent_scores.get)
+        return {
+            'intent': primary_intent,
+            'confidence': max(intent_scores.values()) if intent_scores else 0,
+            'entities': self.extract_entities(text_lower),
+            'all_scores': intent_scores
+        }
+
+
+def generate(count, seed):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        messages.append(template.format(
+            verb=rng.choice(WORDS['verb']), product=rng.choice(WORDS['product']),
+            brand=rng.choice(WORDS['brand']), brand2=rng.choice(WORDS['brand']), city=rng.choice(WORDS['city']),
+            amount=f"{rng.randrange(100, 20000):,}" if rng.random() < 0.3 else rng.randrange(100, 20000),
+            amount2=rng.randrange(20000, 40000), size=rng.choice([4, 8, 64, 128, 256]),
+            camera=rng.choice([12, 48, 108]), cores=rng.choice([4, 8])
+        ))
+    return messages
+
+
+def time_classifier(classifier, messages, repeat):
+    """Return messages per second"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            classifier.classify_intent(message)
+    return repeat * len(messages) / (time.perf_counter() - start)
+
+
+def replay(messages, args):
+    """Stream messages through classify_many; only the chunks in flight are held in memory"""
+    classifier = IntentClassifier()
+    report = ClassificationReport()
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    mismatches = 0
+    messages, echoed = itertools.tee(messages)
+    try:
+        results = classifier.classify_many(messages, workers=args.workers, chunk_size=args.chunk_size, report=report)
+        for message, result in zip(echoed, results):
+            if output is not None:
+                output.write(json.dumps({'message': message, **result}) + '\n')
+            if args.check and result != classifier.classify_intent(message):
+                mismatches += 1
+    finally:
+        if output is not None:
+            output.close()
+    print(report.summary())
+    if args.check:
+        print(f"{mismatches} mismatches against classify_intent")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='?', help='file with one message per line (default: generated)')
+    parser.add_argument('--messages', type=int, default=20000, help='generated messages')
+    parser.add_argument('--repeat', type=int, default=1, help='passes over the corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memo-entries', type=int, default=4096, help='memo size for the memoized run')
+    parser.add_argument('--replay', action='store_true', help='reclassify through classify_many')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='replay worker processes (0: in process)')
+    parser.add_argument('--chunk-size', type=int, default=500, help='messages per replay work unit')
+    parser.add_argument('--output', help='replay: write JSON lines results here')
+    parser.add_argument('--check', action='store_true', help='replay: compare with classify_intent')
+    args = parser.parse_args()
+
+    if args.corpus:
+        messages = read_messages(args.corpus)
+    else:
+        messages = generate(args.messages, args.seed)
+
+    if args.replay:
+        replay(messages, args)
+        return
+    messages = list(messages)
+
+    scanner = IntentClassifier()
+    scanner.memo = None
+    # Compare pattern scoring only; a trained model would decide some intents on its own
+    scanner.model = None
+    legacy = PatternClassifier(scanner.intent_patterns, scanner.dictionaries)
+
+    mismatches = 0
+    for message in messages:
+        expected = legacy.classify_intent(message)
+        result = scanner.classify_intent(message)
+        if (expected['intent'], expected['all_scores']) != (result['intent'], dict(result['all_scores'])):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch: {message!r}")
+
+    before = time_classifier(legacy, messages, args.repeat)
+    after = time_classifier(scanner, messages, args.repeat)
+    keywords = sum(len(keywords) for keywords in scanner.dictionaries.values())
+    print(f"{len(messages)} messages, {keywords} dictionary keywords, {mismatches} intent mismatches")
+    print(f"per-pattern regexes: {before:,.0f} messages/s")
+    print(f"one-pass scanner:    {after:,.0f} messages/s ({after / before:.1f}x)")
+
+    memoized = IntentClassifier()
+    memoized.model = None
+    memoized.memo = TTLCache(max_size=args.memo_entries, ttl=float('inf'))
+    cached = time_classifier(memoized, messages, args.repeat)
+    stats = memoized.memo_stats()
+    print(f"memoized scanner:    {cached:,.0f} messages/s ({cached / before:.1f}x), "
+          f"hit rate {stats['hit_rate']:.1%} with {stats['max_size']} entries")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""Hashed n-gram intent model: accuracy and latency against the pattern classifier.
+
+Trains the model on labeled messages, then on held-out messages compares
+the accuracy of the pattern scores alone, the model alone and the model
+with pattern fallback below the confidence threshold, and reports
+per-message latency. Labeled data is JSON lines with "message" and
+"intent" (e.g. a corrected ``bench_intent.py --replay --output`` log), or
+generated from labeled templates (held-out messages then share templates
+with the training set, so only real logs say how well the model
+generalizes). ``--save`` writes the trained model where the app loads it
+from.
+
+    python benchmarks/bench_intent_model.py
+    python benchmarks/bench_intent_model.py labeled.jsonl --test-fraction 0.2
+    python benchmarks/bench_intent_model.py labeled.jsonl --save .data/intent_model.npz
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.intent_classifier import IntentClassifier, normalize_message
+from utils.intent_model import HashedIntentModel, read_labeled
+
+# Phrasings per intent, including ones the patterns score wrongly or not at all
+LABELED_TEMPLATES = {
+    'search_product': [
+        "{verb} {product} under GHS {amount}",
+        "I {verb} a {brand} {product} in {city}",
+        "{brand} {product} {size}gb for sale",
+        "do you have any {brand} {product}s",
+        "show me {product}s around {amount} cedis",
+        "got {product} {brand}?",
+        "where can I get a {product} in {city}",
+        "how much is the {brand} {product}",
+    ],
+    'track_order': [
+        "track my order number {number}",
+        "where is my package? I ordered a {product} last week",
+        "has my {product} been shipped yet",
+        "my delivery is late, order {number}",
+        "when will my {product} arrive",
+        "status of order {number} please",
+    ],
+    'faq_inquiry': [
+        "how do I get a refund?",
+        "what is your return policy",
+        "do you offer warranty on {product}s",
+        "which payment methods do you accept",
+        "is delivery free to {city}",
+        "how do I contact support",
+        "can I pay with mobile money",
+    ],
+    'get_recommendations': [
+        "recommend a good {product} for {use}",
+        "what {product} should I buy for {use}",
+        "suggest something like the {brand} {product}",
+        "best {product} for students",
+        "which {product} is popular right now",
+        "any good alternatives to {brand}",
+    ],
+    'compare_products': [
+        "compare {brand} vs {brand2} {product}",
+        "{brand} or {brand2}, which is better?",
+        "what's the difference between the {brand} and {brand2} {product}",
+        "is the {brand} {product} better than {brand2}",
+        "{brand} versus {brand2} for {use}",
+        "compare item 1 and item 3",
+    ],
+    'price_alert': [
+        "notify me when the {product} drops below {amount}",
+        "let me know if {brand} {product} gets cheaper",
+        "alert me when price of {product} falls",
+        "tell me when there is a {brand} {product} deal",
+        "watch {brand} {product} for me under {amount}",
+        "ping me if a cheaper {product} shows up",
+    ],
+    'general_chat': [
+        "hello there",
+        "thanks, that helps a lot!",
+        "good morning",
+        "you are very helpful",
+        "ok cool",
+        "bye for now",
+        "who are you",
+    ],
+}
+
+WORDS = {
+    'verb': ['find', 'search', 'want', 'need', 'buy', 'look for', 'shopping for', 'purchase'],
+    'product': ['phone', 'smartphone', 'laptop', 'tablet', 'headphone', 'camera', 'smartwatch', 'tv', 'car', 'console'],
+    'brand': ['Samsung', 'iPhone', 'Apple', 'HP', 'Dell', 'Lenovo', 'Sony', 'LG', 'Tecno', 'Infinix'],
+    'city': ['Accra', 'Kumasi', 'Tamale', 'Cape Coast', 'Tema', 'Takoradi', 'Koforidua', 'Ho'],
+    'use': ['gaming', 'school', 'work', 'photography', 'music'],
+}
+
+
+def generate(count, seed):
+    rng = random.Random(seed)
+    intents = list(LABELED_TEMPLATES)
+    examples = []
+    for _ in range(count):
+        intent = rng.choice(intents)
+        message = rng.choice(LABELED_TEMPLATES[intent]).format(
+            verb=rng.choice(WORDS['verb']), product=rng.choice(WORDS['product']),
+            brand=rng.choice(WORDS['brand']), brand2=rng.choice(WORDS['brand']), city=rng.choice(WORDS['city']),
+            use=rng.choice(WORDS['use']), amount=rng.randrange(100, 20000), number=rng.randrange(10000, 99999),
+            size=rng.choice([64, 128, 256])
+        )
+        examples.append((message, intent))
+    return examples
+
+
+def accuracy(predict, examples):
+    return sum(predict(message) == intent for message, intent in examples) / len(examples)
+
+
+def latency_us(function, messages):
+    """Mean and 99th percentile microseconds per call"""
+    timings = []
+    for message in messages:
+        start = time.perf_counter()
+        function(message)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return sum(timings) / len(timings), timings[int(len(timings) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data', nargs='?', help='labeled JSON lines (default: generated)')
+    parser.add_argument('--messages', type=int, default=20000, help='generated labeled messages')
+    parser.add_argument('--test-fraction', type=float, default=0.25)
+    parser.add_argument('--dimensions', type=int, default=1 << 18, help='hashed feature buckets')
+    parser.add_argument('--epochs', type=int, default=8)
+    parser.add_argument('--threshold', type=float, default=0.6, help='model confidence needed to override patterns')
+    parser.add_argument('--save', help='write the trained model here')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    examples = list(read_labeled(args.data)) if args.data else generate(args.messages, args.seed)
+    random.Random(args.seed).shuffle(examples)
+    split = int(len(examples) * (1 - args.test_fraction))
+    train = [(normalize_message(message), intent) for message, intent in examples[:split]]
+    test = examples[split:]
+
+    started = time.perf_counter()
+    model = HashedIntentModel.train(train, dimensions=args.dimensions, epochs=args.epochs, seed=args.seed)
+    print(f"trained on {len(train):,} messages in {time.perf_counter() - started:.1f}s, labels: {', '.join(model.labels)}")
+
+    patterns = IntentClassifier()
+    patterns.model = None
+    patterns.memo = None
+    hybrid = IntentClassifier()
+    hybrid.model = model
+    hybrid.model_threshold = args.threshold
+    hybrid.memo = None
+
+    messages = [message for message, _ in test]
+    print(f"held out: {len(test):,} messages")
+    print(f"patterns only:            {accuracy(lambda m: patterns.classify_intent(m)['intent'], test):.1%}")
+    print(f"model only:               {accuracy(lambda m: model.predict(normalize_message(m))[0], test):.1%}")
+    print(f"model, pattern fallback:  {accuracy(lambda m: hybrid.classify_intent(m)['intent'], test):.1%} "
+          f"(model decided {sum(hybrid.classify_intent(m)['source'] == 'model' for m in messages) / len(messages):.1%})")
+
+    mean, p99 = latency_us(lambda m: model.predict(normalize_message(m)), messages)
+    print(f"model predict:            {mean:.0f} us mean, {p99:.0f} us p99")
+    mean, p99 = latency_us(patterns.classify_intent, messages)
+    print(f"classify_intent patterns: {mean:.0f} us mean, {p99:.0f} us p99")
+    mean, p99 = latency_us(hybrid.classify_intent, messages)
+    print(f"classify_intent hybrid:   {mean:.0f} us mean, {p99:.0f} us p99")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        model.save(args.save)
+        print(f"saved {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark the listing page parsers.
+
+Compares the BeautifulSoup ``html.parser`` path against the lxml fast path
+on saved Jiji pages (or synthetic ones) and checks both produce the same
+products.
+
+    python benchmarks/bench_parser.py                    # synthetic pages
+    python benchmarks/bench_parser.py saved/*.html       # saved pages
+    python benchmarks/bench_parser.py --cards 100 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents.product_agent import ProductAgent, SCRAPE_STATS
+from utils.listing_parser import ListingParser
+from sample_pages import render_pages
+
+
+def time_parser(parse, pages, repeat):
+    """Return mean milliseconds per page"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            parse(page)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='saved HTML listing pages (default: synthetic)')
+    parser.add_argument('--cards', type=int, default=40, help='cards per synthetic page')
+    parser.add_argument('--max-results', type=int, default=10, help='cards parsed per page')
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the page set')
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, 'rb') as handle:
+                pages.append(handle.read())
+    else:
+        pages = [page.encode('utf-8') for page in render_pages(num_cards=args.cards)]
+
+    SCRAPE_STATS.path = None  # Don't let benchmark pages skew the learned selector order
+    legacy = ProductAgent()
+    legacy.listing_parser = None
+    fast = ProductAgent()
+    fast.listing_parser = ListingParser(fast.base_url)
+
+    mismatches = 0
+    for index, page in enumerate(pages):
+        expected = legacy.parse_listing_page(page, args.max_results)
+        actual = fast.parse_listing_page(page, args.max_results)
+        if expected != actual:
+            mismatches += 1
+            print(f"page {index}: parsers disagree ({len(expected)} vs {len(actual)} products)")
+
+    legacy_ms = time_parser(lambda page: legacy.parse_listing_page(page, args.max_results), pages, args.repeat)
+    fast_ms = time_parser(lambda page: fast.parse_listing_page(page, args.max_results), pages, args.repeat)
+    avg_kb = sum(len(page) for page in pages) / len(pages) / 1024
+
+    print(f"{len(pages)} pages, {avg_kb:.0f} KB average, {args.max_results} cards parsed per page")
+    print(f"{'parser':<24}{'ms/page':>10}{'pages/s':>10}")
+    print(f"{'bs4 html.parser':<24}{legacy_ms:>10.2f}{1000 / legacy_ms:>10.0f}")
+    print(f"{'lxml fast path':<24}{fast_ms:>10.2f}{1000 / fast_ms:>10.0f}")
+    print(f"speedup: {legacy_ms / fast_ms:.1f}x, output mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""End-to-end scraping benchmark against the local Jiji stand-in.
+
+Drives ``ProductAgent.search_products`` (or the streaming ``iter_products``)
+with a pool of concurrent callers and reports throughput and p50/p95/p99
+latency. No network access is needed.
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --queries 500 --concurrency 16 --cache
+    python benchmarks/bench_search.py --route-latency /search=2 --error-rate 0.1
+    python benchmarks/bench_search.py --mode stream --max-pages 5
+
+The shared result cache, the client-side rate limiter, the listing
+catalog and the on-disk HTTP cache are disabled unless ``--cache``,
+``--rate-limit``, ``--catalog`` or ``--http-cache`` is given, so by default
+every query measures a full scrape. ``--catalog`` and ``--http-cache`` use
+scratch databases, never the app's own.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from configuration.config import JIJI_CONFIG
+from utils.catalog import ListingCatalog
+from utils.http_cache import HttpDiskCache
+from jiji_standin import add_standin_arguments, standin_from_arguments
+
+QUERIES = [
+    'Samsung Galaxy phones', 'iPhone under GHS 3000', 'Gaming laptops', 'Bluetooth headphones',
+    'Android tablets', 'Toyota Corolla', 'HP laptop 8GB', 'Tecno Spark', 'PS5 console', 'Sony speaker'
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'throughput': len(ordered) / elapsed if elapsed else 0.0,
+        'mean': sum(ordered) / len(ordered) if ordered else 0.0,
+        'p50': percentile(ordered, 0.50),
+        'p95': percentile(ordered, 0.95),
+        'p99': percentile(ordered, 0.99),
+        'max': ordered[-1] if ordered else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=200, help='searches to run')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent callers')
+    parser.add_argument('--mode', choices=('search', 'stream'), default='search',
+                        help='search_products (first page) or iter_products (paginated)')
+    parser.add_argument('--stream-pages', type=int, default=3, help='pages followed in stream mode')
+    parser.add_argument('--sequential', action='store_true', help='disable the concurrent URL fan-out')
+    parser.add_argument('--cache', action='store_true', help='keep the shared result cache enabled')
+    parser.add_argument('--rate-limit', action='store_true', help='keep the client-side rate limiter enabled')
+    parser.add_argument('--catalog', action='store_true', help='answer from a scratch listing catalog')
+    parser.add_argument('--http-cache', action='store_true', help='keep fetched pages in a scratch disk cache')
+    parser.add_argument('--http-cache-fresh', type=float, default=None,
+                        help='seconds a cached page is served without revalidating')
+    add_standin_arguments(parser)
+    args = parser.parse_args()
+
+    standin = standin_from_arguments(args).start()
+    JIJI_CONFIG['base_url'] = standin.url
+
+    import agents.product_agent as product_agent
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    product_agent.SCRAPE_STATS.path = None  # Keep benchmark runs out of the learned order
+    if not args.cache:
+        product_agent.SEARCH_CACHE.max_size = 0
+    if not args.rate_limit:
+        product_agent.HTTP_CLIENT.rate_limiter = None
+    # Never write stand-in listings into the real catalog
+    scratch_dir = tempfile.TemporaryDirectory()
+    product_agent.CATALOG = ListingCatalog(os.path.join(scratch_dir.name, 'catalog.sqlite3')) if args.catalog else None
+    http_cache = None
+    if args.http_cache:
+        http_cache = HttpDiskCache(os.path.join(scratch_dir.name, 'http_cache.sqlite3'))
+        if args.http_cache_fresh is not None:
+            http_cache.fresh_for = args.http_cache_fresh
+    product_agent.HTTP_CLIENT.cache = http_cache
+    product_agent.PRICE_HISTORY = None
+
+    agent = product_agent.ProductAgent()
+    agent.concurrent_fetch = not args.sequential
+
+    def run_one(index: int):
+        query = QUERIES[index % len(QUERIES)]
+        start = time.perf_counter()
+        if args.mode == 'stream':
+            count = sum(1 for _ in agent.iter_products(query, max_pages=args.stream_pages))
+        else:
+            _, products = agent.search_products(query, {})
+            count = len(products)
+        return time.perf_counter() - start, count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run_one, range(args.queries)))
+    elapsed = time.perf_counter() - started
+    standin.stop()
+
+    summary = summarize([latency for latency, _ in results], elapsed)
+    empty = sum(1 for _, count in results if count == 0)
+    mean_products = sum(count for _, count in results) / len(results) if results else 0
+
+    print(f"mode={args.mode} queries={args.queries} concurrency={args.concurrency} "
+          f"fan-out={'off' if args.sequential else 'on'} cache={'on' if args.cache else 'off'} "
+          f"rate-limit={'on' if args.rate_limit else 'off'} catalog={'on' if args.catalog else 'off'} "
+          f"http-cache={'on' if args.http_cache else 'off'}")
+    print(f"throughput: {summary['throughput']:.1f} searches/s over {elapsed:.2f}s")
+    print("latency ms: " + '  '.join(
+        f"{key}={summary[key] * 1000:.1f}" for key in ('mean', 'p50', 'p95', 'p99', 'max')))
+    print(f"products/search: {mean_products:.1f}, empty results: {empty}")
+    print(f"stand-in: {standin.stats}")
+    print(f"http client: {product_agent.HTTP_CLIENT.stats}")
+    print(f"single-flight: {product_agent.SEARCH_FLIGHTS.stats()}")
+    if args.cache:
+        print(f"cache: {product_agent.SEARCH_CACHE.stats()}")
+
+
+if __name__ == '__main__':
+    main()
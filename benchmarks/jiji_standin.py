@@ -0,0 +1,220 @@
+"""Local stand-in for jiji.com.gh listing pages.
+
+Serves recorded or synthetic listing pages on the routes ProductAgent
+scrapes (``/search``, ``/ghana/cars/all-cars``, ``/ghana/mobile-phones``),
+with configurable latency, error rate, page size and page count, so the
+scraping path can be exercised and measured without network access.
+
+    python benchmarks/jiji_standin.py --port 8765 --latency 0.2 --error-rate 0.05
+    python benchmarks/jiji_standin.py --pages-dir saved/ --route-latency /search=3
+
+Point the app at it by setting JIJI_CONFIG['base_url'] to the printed URL.
+"""
+import argparse
+import glob
+import hashlib
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sample_pages import CARD_STYLES, render_page
+
+ROUTES = ('/search', '/ghana/cars/all-cars', '/ghana/mobile-phones')
+
+
+class RouteProfile:
+    """Latency and failure behaviour of one route"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def delay(self, rng: random.Random) -> float:
+        return max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+
+
+class JijiStandIn:
+    """Threaded HTTP server imitating Jiji's search result pages
+
+    Synthetic pages are rendered once per (page number, card style) and
+    cached, so the server itself stays cheap compared to what it measures.
+    Pages past ``max_pages`` repeat the last page, like the real site.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, cards_per_page: int = 40,
+                 max_pages: int = 5, card_style: str = 'b-list', pages_dir: Optional[str] = None,
+                 default_profile: Optional[RouteProfile] = None,
+                 route_profiles: Optional[Dict[str, RouteProfile]] = None, seed: int = 0):
+        self.cards_per_page = cards_per_page
+        self.max_pages = max_pages
+        self.card_style = card_style
+        self.default_profile = default_profile or RouteProfile()
+        self.route_profiles = route_profiles or {}
+        self.rng = random.Random(seed)
+        self.stats = {'requests': 0, 'errors': 0, 'not_found': 0, 'not_modified': 0}
+        self._lock = threading.Lock()
+        self._pages = {}
+
+        self.recorded = []
+        if pages_dir:
+            for path in sorted(glob.glob(os.path.join(pages_dir, '*.html'))):
+                with open(path, 'rb') as handle:
+                    self.recorded.append(handle.read())
+        self._recorded_cycle = itertools.cycle(self.recorded) if self.recorded else None
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def profile_for(self, route: str) -> RouteProfile:
+        return self.route_profiles.get(route, self.default_profile)
+
+    def page_body(self, page: int) -> bytes:
+        """Body for a result page, recorded pages first"""
+        if self._recorded_cycle is not None:
+            with self._lock:
+                return next(self._recorded_cycle)
+
+        page = min(max(page, 1), self.max_pages)
+        body = self._pages.get(page)
+        if body is None:
+            body = render_page(self.cards_per_page, self.card_style, seed=page).encode('utf-8')
+            self._pages[page] = body
+        return body
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                with standin._lock:
+                    standin.stats['requests'] += 1
+                    profile = standin.profile_for(parsed.path)
+                    delay = profile.delay(standin.rng)
+                    failed = standin.rng.random() < profile.error_rate
+
+                if parsed.path not in ROUTES:
+                    with standin._lock:
+                        standin.stats['not_found'] += 1
+                    return self._respond(404, b'Not found')
+
+                time.sleep(delay)
+                if failed:
+                    with standin._lock:
+                        standin.stats['errors'] += 1
+                    return self._respond(503, b'Service unavailable')
+
+                page = parse_qs(parsed.query).get('page', ['1'])[0]
+                body = standin.page_body(int(page) if page.isdigit() else 1)
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                if self.headers.get('If-None-Match') == etag:
+                    with standin._lock:
+                        standin.stats['not_modified'] += 1
+                    return self._respond(304, b'', etag)
+                self._respond(200, body, etag)
+
+            def _respond(self, status: int, body: bytes, etag: Optional[str] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        return Handler
+
+    def start(self) -> 'JijiStandIn':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='jiji-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'JijiStandIn':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def parse_route_values(values: List[str]) -> Dict[str, float]:
+    """Parse repeated ROUTE=VALUE arguments"""
+    parsed = {}
+    for value in values or []:
+        route, _, number = value.partition('=')
+        parsed[route] = float(number)
+    return parsed
+
+
+def add_standin_arguments(parser: argparse.ArgumentParser):
+    """Command line options shared by the stand-in and the benchmarks"""
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per response')
+    parser.add_argument('--jitter', type=float, default=0.02, help='+/- seconds of latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 503 responses')
+    parser.add_argument('--route-latency', action='append', metavar='ROUTE=SECONDS',
+                        help='override latency for one route (repeatable)')
+    parser.add_argument('--route-error-rate', action='append', metavar='ROUTE=RATE',
+                        help='override error rate for one route (repeatable)')
+    parser.add_argument('--cards', type=int, default=40, help='cards per synthetic page')
+    parser.add_argument('--max-pages', type=int, default=5, help='distinct synthetic pages per query')
+    parser.add_argument('--card-style', choices=CARD_STYLES, default='b-list', help='synthetic card markup')
+    parser.add_argument('--pages-dir', help='serve recorded *.html pages from this directory instead')
+
+
+def standin_from_arguments(args, port: int = 0) -> JijiStandIn:
+    """Build a stand-in from parsed ``add_standin_arguments`` options"""
+    latencies = parse_route_values(args.route_latency)
+    error_rates = parse_route_values(args.route_error_rate)
+    default = RouteProfile(args.latency, args.jitter, args.error_rate)
+    profiles = {
+        route: RouteProfile(latencies.get(route, args.latency), args.jitter,
+                            error_rates.get(route, args.error_rate))
+        for route in set(latencies) | set(error_rates)
+    }
+    return JijiStandIn(port=port, cards_per_page=args.cards, max_pages=args.max_pages,
+                       card_style=args.card_style, pages_dir=args.pages_dir,
+                       default_profile=default, route_profiles=profiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    add_standin_arguments(parser)
+    args = parser.parse_args()
+
+    standin = standin_from_arguments(args, port=args.port)
+    print(f"Jiji stand-in serving on {standin.url} (Ctrl+C to stop)")
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Synthetic Jiji listing pages for offline benchmarks.
+
+The markup mirrors what ``ProductAgent`` expects from jiji.com.gh: page
+chrome (header, category menu, inline scripts, footer) around a grid of
+``div.b-list-advert__item`` cards. Alternative ``card_style`` values emit
+the markup matched by the later fallback selectors.
+"""
+import random
+from typing import List
+
+TITLES = [
+    'Samsung Galaxy S20 Ultra 128GB', 'Apple iPhone 13 Pro 256GB', 'Tecno Spark 8 64GB',
+    'Infinix Hot 11 128GB', 'HP Pavilion 15 Core i5 8GB', 'Dell Inspiron 15 512GB SSD',
+    'Lenovo IdeaPad 3 Ryzen 5', 'Sony WH-1000XM4 Headphones', 'Toyota Corolla 2015',
+    'Honda Civic 2012', 'MacBook Air M1 256GB', 'Samsung Galaxy A52 128GB'
+]
+LOCATIONS = ['Accra, Greater Accra', 'Kumasi, Ashanti', 'Tema, Greater Accra',
+             'Tamale, Northern', 'Cape Coast, Central', 'Koforidua, Eastern']
+
+CARD_STYLES = ('b-list', 'testid', 'qa', 'article', 'advert-card')
+
+
+def render_card(index: int, rng: random.Random, card_style: str = 'b-list') -> str:
+    """Render one listing card in the requested markup style"""
+    title = f"{rng.choice(TITLES)} #{index}"
+    price = f"GH₵ {rng.randint(300, 60000):,}"
+    location = rng.choice(LOCATIONS)
+    slug = title.lower().replace(' ', '-').replace('#', '')
+    href = f"/{location.split(',')[0].lower()}/mobile-phones/{slug}-{index}.html"
+    image = (f'<div class="b-list-advert__item__image"><img src="https://pictures-ghana.jijistatic.com/{index}.jpg" '
+             f'alt="{title}" loading="lazy" width="200" height="150"></div>')
+    badges = '<div class="b-list-advert__item__badges"><span class="b-badge b-badge--verified">Verified ID</span></div>'
+
+    if card_style == 'b-list':
+        return (f'<div class="b-list-advert__item qa-advert-list-item-wrapper">{image}'
+                f'<div class="b-list-advert__item__info">'
+                f'<a class="b-list-advert__item__title qa-advert-title" href="{href}">{title}</a>'
+                f'<div class="b-list-advert__item__price">{price}</div>'
+                f'<div class="b-list-advert__item__description">Brand new, original with warranty. {title}</div>'
+                f'<div class="b-list-advert__item__location">{location}</div>{badges}</div></div>')
+    if card_style == 'testid':
+        return (f'<div data-testid="advert-list-item"><a href="{href}">{image}<h3>{title}</h3></a>'
+                f'<span class="qa-advert-price">{price}</span>'
+                f'<span class="qa-advert-location">{location}</span></div>')
+    if card_style == 'qa':
+        return (f'<div class="qa-advert-list-item"><a href="{href}"><h3>{title}</h3></a>'
+                f'<div>{price}</div><span class="qa-advert-location">{location}</span></div>')
+    if card_style == 'article':
+        return (f'<article><h3>{title}</h3><a href="{href}">View</a>'
+                f'<div>{price}</div></article>')
+    return (f'<div class="advert-card"><a href="{href}">{title}</a>'
+            f'<span class="qa-advert-price">{price}</span></div>')
+
+
+def render_page(num_cards: int = 40, card_style: str = 'b-list', seed: int = 0) -> str:
+    """Render a full listing page with ``num_cards`` cards"""
+    rng = random.Random(seed)
+    menu = ''.join(
+        f'<li class="b-categories-item"><a href="/ghana/category-{i}"><span>Category {i}</span>'
+        f'<span class="b-categories-item__count">{rng.randint(100, 90000):,} ads</span></a></li>'
+        for i in range(120)
+    )
+    script = '<script>window.__INITIAL_STATE__ = {"ads": [%s]};</script>' % ','.join(
+        '{"id": %d, "views": %d}' % (i, rng.randint(0, 5000)) for i in range(num_cards * 5)
+    )
+    cards = ''.join(render_card(i, rng, card_style) for i in range(num_cards))
+    footer = ''.join(f'<div class="b-footer__link"><a href="/info/{i}">Footer link {i}</a></div>' for i in range(80))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Jiji Ghana</title>'
+        '<link rel="stylesheet" href="/static/app.css">' + script + '</head><body>'
+        '<header class="b-header"><nav><ul class="b-categories">' + menu + '</ul></nav></header>'
+        '<main><div class="b-list-advert">' + cards + '</div>'
+        '<div class="b-pagination"><a href="?page=2">Next</a></div></main>'
+        '<footer class="b-footer">' + footer + '</footer></body></html>'
+    )
+
+
+def render_pages(count: int = 5, num_cards: int = 40) -> List[str]:
+    """Render a set of pages covering every card markup style"""
+    return [render_page(num_cards, CARD_STYLES[i % len(CARD_STYLES)], seed=i) for i in range(count)]
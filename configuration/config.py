@@ -1,4 +1,5 @@
 # Configuration file for AI Shopping Assistant
+import os
 
 # Application Settings
 APP_CONFIG = {
@@ -14,7 +15,18 @@ JIJI_CONFIG = {
     'search_endpoint': '/search',
     'max_results': 10,
     'request_timeout': 10,
-    'retry_attempts': 3
+    'retry_attempts': 3,
+    'concurrent_fetch': True,  # Query all search URLs at once, keep the first with results
+    'search_deadline': 12,  # seconds, total budget per query across all URLs
+    'stream_max_pages': 5,  # result pages followed by the streaming search
+    'stream_max_results': 50,  # products yielded by the streaming search
+    'stream_deadline': 30,  # seconds, total budget for a streaming search
+    'fetch_workers': 16,
+    'dedupe_results': True,  # Collapse reposted/near-duplicate listings (MinHash + LSH)
+    'dedupe_threshold': 0.7,  # estimated title Jaccard similarity for a near-duplicate
+    'dedupe_overfetch': 2,  # parse this many times max_results so duplicates don't leave slots empty
+    'rank_results': True,  # Order results by BM25 relevance with budget/location boosts
+    'rank_candidates': 30  # listings scraped and ranked to pick the best max_results
 }
 
 # Web Scraping Settings
@@ -27,8 +39,46 @@ SCRAPING_CONFIG = {
         'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1'
     },
-    'delay_between_requests': 1,  # seconds
-    'max_retries': 3
+    'delay_between_requests': 1,  # seconds, sustained rate of the shared token bucket
+    'burst_requests': 6,  # requests allowed back to back before the delay applies
+    'max_retries': 3,
+    'backoff_base': 0.5,  # seconds, doubled on every retry (with full jitter)
+    'backoff_max': 8,  # seconds
+    'pool_size': 16,  # pooled keep-alive connections per host
+    'parser': 'lxml',  # 'lxml' (fast path) or 'html.parser' (BeautifulSoup)
+    'path_stats_file': 'scrape_paths.json',  # learned URL/selector order, under data_dir
+    'dead_path_failures': 5,  # consecutive failures before a search URL is skipped
+    'dead_path_probe_interval': 600,  # seconds before a skipped URL is tried again
+    'http_cache_fresh': 120,  # seconds a cached page is served without asking Jiji
+    'http_cache_stale': 900,  # further seconds it is served while revalidating in the background
+    'http_cache_max_entries': 2000  # pages kept on disk
+}
+
+# Local Storage Settings
+STORAGE_CONFIG = {
+    'data_dir': os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.data'),
+    'catalog_file': 'catalog.sqlite3',  # SQLite + FTS5 store of every scraped listing
+    'catalog_max_age': 900,  # seconds a listing counts as fresh enough to answer from
+    'http_cache_file': 'http_cache.sqlite3',  # compressed Jiji pages with their ETag/Last-Modified
+    'price_history_dir': 'price_history',  # append-only segments of listing prices
+    'price_history_segment_records': 1_000_000,  # 24-byte records per segment file
+    'price_history_max_segments': 8,  # compact once there are more segments than this
+    'price_history_retention': 90 * 24 * 3600,  # seconds of history kept by compaction
+    'price_history_compact_interval': 24 * 3600,  # seconds past retention before compaction drops old records
+    'price_history_min_interval': 3600,  # seconds before an unchanged price is recorded again
+    'intent_model_file': 'intent_model.npz'  # hashed n-gram intent model, trained offline
+}
+
+# Price Alert Settings
+ALERT_CONFIG = {
+    'poll_interval': 600,  # seconds between checks of every watched query
+    'batch_size': 20,  # distinct queries fetched per batch
+    'poll_workers': 2,  # concurrent fetches within a batch
+    'watch_ttl': 7 * 24 * 3600,  # seconds a watch stays active
+    'max_watches_per_session': 20,
+    'max_pending_alerts': 50,  # undelivered alerts kept per session
+    'drop_percent': 5,  # smallest price drop, in percent, that triggers an alert
+    'snapshot_size': 500  # listings remembered per query for diffing
 }
 
 # Product Categories Configuration
@@ -54,6 +104,23 @@ PRODUCT_CATEGORIES = {
     }
 }
 
+# Brands recognised in listing titles
+PRODUCT_BRANDS = [
+    'samsung', 'apple', 'iphone', 'tecno', 'infinix', 'itel', 'xiaomi', 'huawei', 'nokia', 'google',
+    'hp', 'dell', 'lenovo', 'asus', 'acer', 'macbook', 'sony', 'lg', 'jbl', 'nintendo',
+    'toyota', 'honda', 'nissan', 'hyundai', 'kia', 'mercedes', 'ford'
+]
+
+# Product words recognised in chat messages
+PRODUCT_KEYWORDS = [
+    'phone', 'smartphone', 'iphone', 'samsung', 'galaxy', 'android',
+    'laptop', 'computer', 'macbook', 'hp', 'dell', 'lenovo',
+    'tablet', 'ipad', 'headphone', 'airpods', 'speaker',
+    'camera', 'watch', 'smartwatch', 'tv', 'monitor',
+    'gaming', 'console', 'playstation', 'xbox',
+    'car', 'vehicle', 'toyota', 'honda', 'mercedes'
+]
+
 # Budget Categories
 BUDGET_RANGES = {
     'budget': {'min': 0, 'max': 1500},
@@ -68,6 +135,12 @@ GHANA_CITIES = [
     'Bolgatanga', 'Takoradi', 'Nkawkaw', 'Yendi', 'Kintampo'
 ]
 
+# Other names for the cities above: lowercase alias -> city
+CITY_ALIASES = {
+    'sekondi': 'Sekondi-Takoradi',
+    'cape-coast': 'Cape Coast'
+}
+
 # UI Configuration
 UI_CONFIG = {
     'primary_color': '#1976d2',
@@ -75,7 +148,14 @@ UI_CONFIG = {
     'background_color': '#f5f5f5',
     'text_color': '#333333',
     'max_chat_messages': 100,
-    'products_per_page': 10
+    'products_per_page': 10,
+    'popular_searches': [
+        "Samsung Galaxy phones",
+        "iPhone under GHS 3000",
+        "Gaming laptops",
+        "Bluetooth headphones",
+        "Android tablets"
+    ]
 }
 
 # Chat Responses
@@ -121,8 +201,13 @@ FEATURES = {
     'enable_scraping': True,
     'enable_order_tracking': True,
     'enable_recommendations': True,
-    'enable_price_alerts': False,  # Coming soon
-    'enable_comparison': False,    # Coming soon
+    'enable_catalog': True,        # Answer searches from the local listing catalog
+    'enable_cache_warmer': True,   # Keep popular and trending searches pre-scraped
+    'enable_http_cache': True,     # Keep fetched pages on disk across restarts
+    'enable_price_history': True,  # Record every scraped price per listing
+    'enable_price_alerts': True,   # Background price watches with in-chat alerts
+    'enable_comparison': True,     # Side-by-side spec tables for listings
+    'enable_intent_model': True,   # Use the trained intent model when its file exists
     'enable_favorites': False,     # Coming soon
     'enable_user_accounts': False  # Future feature
 }
@@ -130,6 +215,22 @@ FEATURES = {
 # API Configuration (for future integrations)
 API_CONFIG = {
     'jiji_api_base': 'https://api.jiji.com.gh',  # Hypothetical
-    'rate_limit': 100,  # requests per hour
-    'cache_duration': 300  # seconds
+    'rate_limit': 100,  # requests per hour (API only; scraping uses SCRAPING_CONFIG)
+    'cache_duration': 300,  # seconds
+    'cache_max_entries': 256,  # search results kept in the shared cache
+    'warm_refresh_fraction': 0.8,  # re-warm popular searches at this fraction of cache_duration
+    'warm_workers': 2  # concurrent warm-up scrapes
+}
+
+# Intent Classification
+INTENT_CONFIG = {
+    'memo_entries': 4096,  # classified messages kept per process, keyed on normalized text
+    'model_threshold': 0.6,  # below this probability the pattern scores decide the intent
+    'usd_to_ghs': 15.0  # cedis per dollar, for budgets written in dollars ("laptop under $500")
+}
+
+FAQ_CONFIG = {
+    'top_k': 3,  # answers returned by FAQAgent.search
+    'min_score': 0.1,  # cosine similarity an answer needs to count as a match
+    'keyword_weight': 3.0  # an FAQ keyword counts this many times its response text
 }
\ No newline at end of file
@@ -1,5 +1,6 @@
 # Utils package for AI Shopping Assistant
 
+from .product import Product
 from .session_manager import SessionManager
 
-__all__ = ['SessionManager']
\ No newline at end of file
+__all__ = ['Product', 'SessionManager']
\ No newline at end of file
@@ -0,0 +1,85 @@
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """Background worker that keeps a fixed set of queries warm in a cache
+
+    Every query is warmed once shortly after ``start`` (staggered so the
+    first round doesn't burst the rate limiter) and then re-warmed every
+    ``refresh_interval`` seconds, which should be shorter than the cache
+    TTL so entries are replaced before they expire. ``warm`` does the
+    actual fetch; it runs on a bounded thread pool.
+    """
+
+    def __init__(self, warm: Callable[[str], None], queries: Iterable[str],
+                 refresh_interval: float, max_workers: int = 2, stagger: float = 2.0):
+        self.warm = warm
+        self.queries = list(dict.fromkeys(queries))
+        self.refresh_interval = refresh_interval
+        self.stagger = stagger
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cache-warmer')
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {'warmed': 0, 'failed': 0, 'last_run': {}}
+
+    def start(self) -> 'CacheWarmer':
+        """Start the scheduler thread (idempotent)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='cache-warmer-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, wait: bool = False):
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
+
+    def _run(self):
+        now = time.monotonic()
+        schedule = [(now + index * self.stagger, query) for index, query in enumerate(self.queries)]
+        heapq.heapify(schedule)
+
+        while schedule and not self._stop.is_set():
+            due, query = schedule[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+                continue
+
+            # Never queue more work than there are workers
+            self._slots.acquire()
+            if self._stop.is_set():
+                break
+            heapq.heapreplace(schedule, (self._next_due(), query))
+            self._executor.submit(self._warm_one, query)
+
+    def _next_due(self) -> float:
+        # A little jitter keeps the refreshes from lining up into bursts
+        return time.monotonic() + self.refresh_interval * random.uniform(0.9, 1.0)
+
+    def _warm_one(self, query: str):
+        try:
+            self.warm(query)
+            with self._lock:
+                self.stats['warmed'] += 1
+                self.stats['last_run'][query] = time.time()
+        except Exception:
+            logger.exception("Cache warm-up failed for %r", query)
+            with self._lock:
+                self.stats['failed'] += 1
+        finally:
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {'warmed': self.stats['warmed'], 'failed': self.stats['failed'],
+                    'queries': len(self.queries), 'last_run': dict(self.stats['last_run'])}
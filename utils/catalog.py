@@ -0,0 +1,169 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from utils.product import Product
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    link TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    location TEXT NOT NULL,
+    price_pesewas INTEGER,
+    currency TEXT NOT NULL,
+    price_label TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS listings_last_seen ON listings(last_seen);
+CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(
+    title, content='listings', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS listings_vocab USING fts5vocab(listings_fts, 'row');
+CREATE TRIGGER IF NOT EXISTS listings_ai AFTER INSERT ON listings BEGIN
+    INSERT INTO listings_fts(rowid, title) VALUES (new.rowid, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS listings_ad AFTER DELETE ON listings BEGIN
+    INSERT INTO listings_fts(listings_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS listings_au AFTER UPDATE OF title ON listings BEGIN
+    INSERT INTO listings_fts(listings_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    INSERT INTO listings_fts(rowid, title) VALUES (new.rowid, new.title);
+END;
+"""
+
+UPSERT = """
+INSERT INTO listings (link, title, location, price_pesewas, currency, price_label, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(link) DO UPDATE SET
+    title = excluded.title,
+    location = excluded.location,
+    price_pesewas = excluded.price_pesewas,
+    currency = excluded.currency,
+    price_label = excluded.price_label,
+    last_seen = excluded.last_seen
+"""
+
+SEARCH = """
+SELECT l.title, l.link, l.location, l.price_pesewas, l.currency, l.price_label
+FROM listings_fts
+JOIN listings l ON l.rowid = listings_fts.rowid
+WHERE listings_fts MATCH ? AND l.last_seen >= ?
+ORDER BY bm25(listings_fts), l.last_seen DESC
+LIMIT ?
+"""
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Query words that never appear in listing titles in a useful way
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'the', 'for', 'in', 'of', 'to', 'with', 'under', 'below', 'between',
+    'budget', 'ghs', 'gh', 'cedis', 'find', 'buy', 'want', 'need', 'looking', 'me', 'i'
+])
+
+
+class ListingCatalog:
+    """Persistent local catalog of every listing scraped, with FTS5 over titles
+
+    Listings are keyed by link and carry first-seen/last-seen timestamps.
+    Each thread gets its own SQLite connection; the database runs in WAL
+    mode so the scraper threads can write while sessions read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self.available = True
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            connection = self._connection()
+            connection.executescript(SCHEMA)
+        except (sqlite3.Error, OSError):
+            # No FTS5 in this SQLite build, or an unwritable data dir
+            self.available = False
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def fts_query(self, query: str) -> Optional[str]:
+        """Turn free text into an FTS5 query: every word, prefix-matched
+
+        Returns None, a catalog miss, when any word is in no listing title
+        ("dell" in a catalog of HP laptops): dropping it would answer with
+        unrelated listings. A plural is tried without its final "s".
+        """
+        tokens = [token for token in TOKEN_PATTERN.findall(query.lower()) if token not in STOPWORDS]
+        connection = self._connection()
+        indexed = []
+        for token in dict.fromkeys(tokens):
+            forms = [token, token[:-1]] if len(token) > 3 and token.endswith('s') else [token]
+            for form in forms:
+                if connection.execute(
+                    'SELECT 1 FROM listings_vocab WHERE term >= ? AND term < ? LIMIT 1',
+                    (form, form + '\U0010ffff')
+                ).fetchone():
+                    indexed.append(form)
+                    break
+            else:
+                return None
+        if not indexed:
+            return None
+        return ' '.join(f'"{token}"*' for token in dict.fromkeys(indexed))
+
+    def upsert(self, products: Iterable[Product], seen_at: Optional[float] = None):
+        """Insert new listings and refresh the ones already known"""
+        if not self.available:
+            return
+        seen_at = time.time() if seen_at is None else seen_at
+        rows = [
+            (p.link, p.title, p.location, p.price_pesewas, p.currency, p.price_label, seen_at, seen_at)
+            for p in products if p.link and p.link != '#'
+        ]
+        if not rows:
+            return
+        try:
+            connection = self._connection()
+            with connection:
+                connection.executemany(UPSERT, rows)
+        except sqlite3.Error:
+            pass  # The catalog is an accelerator; scraping results are still returned
+
+    def search(self, query: str, max_results: int = 10, max_age: Optional[float] = None) -> List[Product]:
+        """Best title matches for ``query`` seen within the last ``max_age`` seconds"""
+        if not self.available:
+            return []
+        oldest = 0 if max_age is None else time.time() - max_age
+        try:
+            match = self.fts_query(query)
+            if match is None:
+                return []
+            rows = self._connection().execute(SEARCH, (match, oldest, max_results)).fetchall()
+        except sqlite3.Error:
+            return []
+        return [
+            Product(title=title, link=link, location=location, price_pesewas=price_pesewas,
+                    currency=currency, price_label=price_label)
+            for title, link, location, price_pesewas, currency, price_label in rows
+        ]
+
+    def count(self) -> int:
+        if not self.available:
+            return 0
+        return self._connection().execute('SELECT COUNT(*) FROM listings').fetchone()[0]
+
+    def prune(self, older_than: float):
+        """Delete listings not seen for ``older_than`` seconds"""
+        if not self.available:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM listings WHERE last_seen < ?', (time.time() - older_than,))
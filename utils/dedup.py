@@ -0,0 +1,143 @@
+import re
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.product import Product
+
+# Mersenne prime for the universal hash family (a * x + b) mod p
+MERSENNE_PRIME = (1 << 61) - 1
+
+TITLE_NOISE = frozenset([
+    'clean', 'neat', 'sharp', 'original', 'urgent', 'sale', 'for', 'deal', 'hot', 'very',
+    'super', 'fresh', 'just', 'arrived', 'available', 'now', 'quick', 'offer', 'promo'
+])
+
+NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+UNIT_SUFFIX_PATTERN = re.compile(r'(?<=\d)[a-z]+$')
+
+_PERMUTATIONS = {}
+
+
+def permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """MinHash coefficients, shared by every index with the same settings"""
+    key = (num_perm, seed)
+    if key not in _PERMUTATIONS:
+        rng = np.random.RandomState(seed)
+        a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        _PERMUTATIONS[key] = (a[:, None], b[:, None])
+    return _PERMUTATIONS[key]
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase alphanumeric words without seller filler ("clean", "urgent sale")"""
+    words = NON_ALNUM_PATTERN.sub(' ', title.lower()).split()
+    return ' '.join(word for word in words if word not in TITLE_NOISE)
+
+
+def model_tokens(normalized: str) -> frozenset:
+    """Words of a normalized title with a digit, unit letters stripped ("s21", "g5", "2015", "256gb" -> "256")"""
+    return frozenset(UNIT_SUFFIX_PATTERN.sub('', word) for word in normalized.split()
+                     if any(char.isdigit() for char in word))
+
+
+def shingles(text: str, size: int = 4) -> np.ndarray:
+    """CRC32 hashes of the character ``size``-grams of a normalized title"""
+    if len(text) <= size:
+        grams = {text}
+    else:
+        grams = {text[index:index + size] for index in range(len(text) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class NearDuplicateIndex:
+    """Incremental near-duplicate filter for listings (MinHash + LSH)
+
+    ``add`` answers whether a listing is new. A listing is a duplicate of
+    one already kept when its link is the same, or when their titles'
+    estimated Jaccard similarity is at least ``threshold``, their model
+    and number tokens are the same (an S21 is not an S22, a 2015 Corolla
+    not a 2016 one), their prices are within ``price_tolerance`` of each
+    other and their locations agree. Titles are compared only with up to
+    ``max_candidates`` kept listings sharing an LSH band bucket, so
+    filtering n listings takes linear time.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.7,
+                 price_tolerance: float = 0.05, max_candidates: int = 32, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.price_tolerance = price_tolerance
+        self.max_candidates = max_candidates
+        self._a, self._b = permutations(num_perm, seed)
+        self._links = set()
+        self._kept = []  # (signature, price_pesewas, location) per kept listing
+        self._buckets = {}  # (model tokens, band, band bytes) -> kept indexes
+        self.duplicates = 0
+
+    def signature(self, title: str) -> np.ndarray:
+        hashes = shingles(normalize_title(title) or title.lower())
+        return ((self._a * hashes + self._b) % MERSENNE_PRIME).min(axis=1)
+
+    def same_listing(self, index: int, signature: np.ndarray, price: Optional[int], location: str) -> bool:
+        kept_signature, kept_price, kept_location = self._kept[index]
+        if float(np.mean(kept_signature == signature)) < self.threshold:
+            return False
+        if price is not None and kept_price is not None:
+            if abs(price - kept_price) > self.price_tolerance * max(price, kept_price):
+                return False
+        return location == kept_location or 'ghana' in (location, kept_location)
+
+    def add(self, product: Product) -> bool:
+        """Record a listing; False if it duplicates one already added"""
+        if product.link and product.link != '#':
+            if product.link in self._links:
+                self.duplicates += 1
+                return False
+
+        signature = self.signature(product.title)
+        models = model_tokens(normalize_title(product.title))
+        location = ' '.join(product.location.lower().split())
+        # One differing digit barely moves the Jaccard estimate, so the model and
+        # number tokens are part of every bucket key: only exact matches compete
+        keys = [(models, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+        # Most recent bucket mates first, and only so many: keeps each add O(1)
+        # even when a page is full of near-identical titles of different items
+        checked = set()
+        for key in keys:
+            for index in reversed(self._buckets.get(key, ())):
+                if index in checked:
+                    continue
+                checked.add(index)
+                if self.same_listing(index, signature, product.price_pesewas, location):
+                    self.duplicates += 1
+                    return False
+                if len(checked) >= self.max_candidates:
+                    break
+            if len(checked) >= self.max_candidates:
+                break
+
+        index = len(self._kept)
+        self._kept.append((signature, product.price_pesewas, location))
+        for key in keys:
+            self._buckets.setdefault(key, []).append(index)
+        if product.link and product.link != '#':
+            self._links.add(product.link)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._kept)
+
+
+def dedupe(products: Sequence[Product], **options) -> List[Product]:
+    """Products in their original order with near-duplicates of earlier ones removed"""
+    index = NearDuplicateIndex(**options)
+    return [product for product in products if index.add(product)]
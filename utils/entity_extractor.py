@@ -0,0 +1,248 @@
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from configuration.config import INTENT_CONFIG
+from utils.specs import NUMBER, SPEC_END, SPEC_SEPARATOR, SPEC_UNITS, unit_pattern
+
+# Words that make the amount after them a budget bound
+UPPER_CUES = ('under', 'below', 'less than', 'max', 'maximum', 'at most', 'up to', 'not more than', 'within',
+              'budget', 'budget of', 'budget is', 'my budget is')
+LOWER_CUES = ('above', 'over', 'more than', 'at least', 'min', 'minimum', 'from', 'starting at')
+RANGE_CUES = ('between',)
+
+CEDI_MARKERS = ('ghs', 'gh₵', 'ghc', 'gh', '₵', 'cedis', 'cedi')
+DOLLAR_MARKERS = ('usd', '$', 'dollars', 'dollar')
+
+# Cedis per unit of each currency an amount can be written in
+GHS_RATES = {'GHS': 1.0, 'USD': INTENT_CONFIG['usd_to_ghs']}
+
+
+def _alternation(words: Iterable[str]) -> str:
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# One pass over a message: specs first so "128gb" is never an amount, then cues, amounts, range connectors
+NUMERIC_PATTERN = re.compile(
+    rf'(?P<spec>{NUMBER}){SPEC_SEPARATOR}(?P<unit>{unit_pattern()}){SPEC_END}'
+    rf'|\b(?P<cue>{_alternation(UPPER_CUES + LOWER_CUES + RANGE_CUES)})\b'
+    rf'|(?:(?<![a-z])(?P<prefix>{_alternation(CEDI_MARKERS + DOLLAR_MARKERS)})\s*)?(?<![\d.,])(?P<number>{NUMBER})'
+    rf'(?P<thousands>k\b)?(?:\s*(?P<suffix>{_alternation(CEDI_MARKERS + DOLLAR_MARKERS)})(?![a-z]))?'
+    r'|(?P<connector>\s(?:to|and)\s|\s*(?:-|–)\s*)'
+)
+
+DIGIT_PATTERN = re.compile(r'\d')
+
+# An amount this large counts as money in a bare "A - B" range
+MIN_BARE_AMOUNT = 100
+
+
+class Entity(NamedTuple):
+    kind: str  # product_type, brand, location, category, amount, spec or budget
+    value: Any  # a dictionary value, cedi/dollar amount, spec size, or (min, max) for budget
+    start: int
+    end: int
+    unit: Optional[str] = None  # currency of an amount, unit of a spec
+
+
+class Budget(NamedTuple):
+    min: Optional[int]
+    max: Optional[int]
+    currency: str = 'GHS'
+
+    def as_dict(self) -> Dict[str, int]:
+        """The ``{'min': ..., 'max': ...}`` shape the agents filter with"""
+        budget = {}
+        if self.min is not None:
+            budget['min'] = self.min
+        if self.max is not None:
+            budget['max'] = self.max
+        return budget
+
+
+class _Token(NamedTuple):
+    kind: str  # cue, amount, connector
+    start: int
+    end: int
+    text: str = ''
+    amount: Optional[int] = None
+    currency: Optional[str] = None
+    marked: bool = False  # written with a currency or "k", so surely money
+
+
+def _amount(match: re.Match) -> Tuple[int, Optional[str], bool]:
+    value = float(match.group('number').replace(',', ''))
+    if match.group('thousands'):
+        value *= 1000
+    markers = [marker for marker in (match.group('prefix'), match.group('suffix')) if marker]
+    currency = None
+    if markers:
+        currency = 'USD' if any(marker in DOLLAR_MARKERS for marker in markers) else 'GHS'
+    return int(round(value)), currency, bool(markers or match.group('thousands'))
+
+
+def scan_numbers(text_lower: str) -> Tuple[List[Entity], List[_Token]]:
+    """Spec entities and the cue/amount/connector tokens of lowercased text"""
+    specs = []
+    tokens = []
+    for match in NUMERIC_PATTERN.finditer(text_lower):
+        if match.group('spec'):
+            unit = SPEC_UNITS[match.group('unit')]
+            specs.append(Entity('spec', float(match.group('spec').replace(',', '')), match.start(), match.end(), unit))
+        elif match.group('cue'):
+            tokens.append(_Token('cue', match.start(), match.end(), match.group('cue')))
+        elif match.group('number'):
+            amount, currency, marked = _amount(match)
+            tokens.append(_Token('amount', match.start(), match.end(), match.group('number'), amount, currency, marked))
+        elif match.group('connector'):
+            tokens.append(_Token('connector', match.start(), match.end(), match.group('connector').strip()))
+    return specs, tokens
+
+
+def _adjacent(text: str, first: _Token, second: _Token) -> bool:
+    return not text[first.end:second.start].strip()
+
+
+def parse_budget(text_lower: str, tokens: Sequence[_Token]) -> Tuple[List[Entity], List[Entity]]:
+    """Amount and budget entities from the numeric tokens
+
+    Budget entities come from "between A and B", "A - B" / "A to B",
+    "under A"-style upper bounds and "above A"-style lower bounds; their
+    value is (min, max) with None for an open side. An amount counts as
+    money when it has a currency, a "k", a cue, or is part of a range.
+    """
+    amounts = []
+    budgets = []
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        following = tokens[position + 1:position + 4]
+        cue = token.text if token.kind == 'cue' else None
+        start = token.start
+        if cue is not None:
+            if not following or following[0].kind != 'amount' or not _adjacent(text_lower, token, following[0]):
+                position += 1
+                continue
+            position += 1
+            token = following[0]
+            following = tokens[position + 1:position + 3]
+
+        if token.kind != 'amount':
+            position += 1
+            continue
+
+        # A range: amount, connector, amount ("and" only after "between")
+        if (len(following) >= 2 and following[0].kind == 'connector' and following[1].kind == 'amount'
+                and _adjacent(text_lower, token, following[0]) and _adjacent(text_lower, following[0], following[1])
+                and (following[0].text != 'and' or cue in RANGE_CUES)):
+            low, high = token, following[1]
+            if cue is not None or low.marked or high.marked or min(low.amount, high.amount) >= MIN_BARE_AMOUNT:
+                currency = low.currency or high.currency or 'GHS'
+                for part in (low, high):
+                    amounts.append(Entity('amount', part.amount, part.start, part.end, currency))
+                bounds = (min(low.amount, high.amount), max(low.amount, high.amount))
+                budgets.append(Entity('budget', bounds, start, high.end, currency))
+                position += 3
+                continue
+
+        if cue is not None or token.marked:
+            currency = token.currency or 'GHS'
+            amounts.append(Entity('amount', token.amount, token.start, token.end, currency))
+            if cue in UPPER_CUES:
+                budgets.append(Entity('budget', (None, token.amount), start, token.end, currency))
+            elif cue in LOWER_CUES:
+                budgets.append(Entity('budget', (token.amount, None), start, token.end, currency))
+        position += 1
+    return amounts, budgets
+
+
+def convert(amount: Optional[int], currency: str, target: str) -> Optional[int]:
+    """An amount in ``currency`` expressed in ``target`` at the configured rates"""
+    if amount is None or currency == target:
+        return amount
+    return int(round(amount * GHS_RATES[currency] / GHS_RATES[target]))
+
+
+def combine_budgets(budgets: Sequence[Entity], currency: str = 'GHS') -> Optional[Budget]:
+    """Intersect the budget constraints in text order, converted to ``currency``
+
+    A constraint that contradicts the ones before it ("under 2000 ...
+    actually above 3000") replaces them, so the latest word wins instead
+    of whichever pattern happened to run last. Dollar amounts are
+    converted at ``INTENT_CONFIG['usd_to_ghs']``; the budget entities
+    keep the currency they were written in.
+    """
+    low = high = None
+    found = False
+    for budget in budgets:
+        if budget.unit not in GHS_RATES:
+            continue
+        found = True
+        new_low, new_high = (convert(bound, budget.unit, currency) for bound in budget.value)
+        merged_low = new_low if low is None else (low if new_low is None else max(low, new_low))
+        merged_high = new_high if high is None else (high if new_high is None else min(high, new_high))
+        if merged_low is not None and merged_high is not None and merged_low > merged_high:
+            merged_low, merged_high = new_low, new_high
+        low, high = merged_low, merged_high
+    return Budget(low, high, currency) if found else None
+
+
+def spec_label(spec: Entity) -> str:
+    """Search-query form of a spec entity: "128 gb", "6.1 inch\""""
+    size = int(spec.value) if float(spec.value).is_integer() else spec.value
+    return f"{size} {spec.unit}"
+
+
+class ExtractedEntities(NamedTuple):
+    """Typed entities with spans, in text order, and the combined budget"""
+    entities: Tuple[Entity, ...]
+    budget: Optional[Budget]
+
+    def values(self, kind: str) -> List[Any]:
+        """Distinct values of one kind, in order of appearance"""
+        return list(dict.fromkeys(entity.value for entity in self.entities if entity.kind == kind))
+
+    def categories(self) -> List[str]:
+        """Categories of the leftmost-longest category hits ("gaming laptop" is laptops only)"""
+        selected = []
+        covered = 0
+        for entity in self.entities:
+            if entity.kind == 'category' and entity.start >= covered:
+                selected.append(entity.value)
+                covered = entity.end
+        return list(dict.fromkeys(selected))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The entity dict the agents consume, in one pass over the entities"""
+        found = {'product_type': {}, 'brand': {}, 'location': {}, 'specifications': {}, 'category': {}}
+        covered = 0  # end of the last category taken, as in categories()
+        for entity in self.entities:
+            kind = entity.kind
+            if kind == 'spec':
+                found['specifications'].setdefault(spec_label(entity))
+            elif kind == 'category':
+                if entity.start >= covered:
+                    found['category'].setdefault(entity.value)
+                    covered = entity.end
+            elif kind in found:
+                found[kind].setdefault(entity.value)
+        return {
+            'product_type': list(found['product_type']),
+            'brand': list(found['brand']),
+            'budget': self.budget.as_dict() if self.budget else {},
+            'location': list(found['location']),
+            'specifications': list(found['specifications']),
+            'category': list(found['category'])
+        }
+
+
+def extract(text_lower: str, dictionary_hits: Iterable[Entity]) -> ExtractedEntities:
+    """Combine dictionary hits with the amounts, budgets and specs of lowercased text"""
+    entities = list(dictionary_hits)
+    budget = None
+    if DIGIT_PATTERN.search(text_lower):
+        specs, tokens = scan_numbers(text_lower)
+        amounts, budgets = parse_budget(text_lower, tokens)
+        entities.extend(specs + amounts + budgets)
+        budget = combine_budgets(budgets)
+    entities.sort(key=lambda entity: (entity.start, -entity.end))
+    return ExtractedEntities(tuple(entities), budget)
@@ -0,0 +1,136 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+FAQ_STOPWORDS = frozenset([
+    'a', 'an', 'the', 'and', 'or', 'i', 'me', 'my', 'you', 'your', 'it', 'is', 'are', 'be', 'do', 'does',
+    'can', 'could', 'should', 'will', 'to', 'of', 'in', 'on', 'for', 'with', 'at', 'by', 'from', 'this',
+    'that', 'there', 'if', 'what', 'how', 'when', 'where', 'why', 'which', 'who', 'please', 'about'
+])
+
+# An FAQ entry: (key, keywords, response text)
+FAQEntry = Tuple[str, Tuple[str, ...], str]
+
+
+def stem(word: str) -> str:
+    """Strip a plural, -ed or -ing ending ("returns" -> "return", "scammed" -> "scam")"""
+    if len(word) <= 4:
+        return word
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+                word = word[:-1]
+            return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def faq_terms(text: str, bigrams: bool = True) -> List[str]:
+    """Stemmed words of ``text`` without stopwords, then its word bigrams ("mobile money")"""
+    words = [stem(word) for word in WORD_PATTERN.findall(text.lower()) if word not in FAQ_STOPWORDS]
+    if not bigrams:
+        return words
+    return words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+
+
+class FAQIndex:
+    """TF-IDF index over FAQ keywords and response text
+
+    Each entry is a vector of sublinear tf * idf weights over its terms,
+    normalized to unit length: the stemmed words of its response, and the
+    words and word bigrams of its keywords counting ``keyword_weight``
+    times (phrases like "mobile money" come from keywords only). The
+    entry-by-term matrix is held column-compressed in NumPy arrays, which
+    is also the inverted index:
+    the postings of term ``t`` are ``entries[indptr[t]:indptr[t + 1]]``
+    with their ``weights``. A query is scored by one sparse dot product
+    over the postings of its own terms only, so its cost follows the
+    query, not the number of entries.
+    """
+
+    def __init__(self, entries: Sequence[FAQEntry], keyword_weight: float = 3.0):
+        self.keys = [key for key, _, _ in entries]
+        counts = []
+        for _, keywords, response in entries:
+            frequencies = Counter(faq_terms(response, bigrams=False))
+            for keyword in keywords:
+                for term in faq_terms(keyword):
+                    frequencies[term] += keyword_weight
+            counts.append(frequencies)
+
+        document_frequency = Counter(term for frequencies in counts for term in frequencies)
+        self.vocabulary = {term: column for column, term in enumerate(sorted(document_frequency))}
+        self.idf = np.array([math.log((1 + len(counts)) / (1 + document_frequency[term])) + 1
+                             for term in sorted(document_frequency)], dtype=np.float32)
+
+        rows, columns, values = [], [], []
+        for row, frequencies in enumerate(counts):
+            weighted = {self.vocabulary[term]: (1 + math.log(count)) * float(self.idf[self.vocabulary[term]])
+                        for term, count in frequencies.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weighted.values())) or 1.0
+            for column, weight in weighted.items():
+                rows.append(row)
+                columns.append(column)
+                values.append(weight / norm)
+
+        order = np.lexsort((rows, columns)) if columns else np.array([], dtype=np.intp)
+        self.entries = np.array(rows, dtype=np.int32)[order]
+        self.weights = np.array(values, dtype=np.float32)[order]
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(np.array(columns, dtype=np.intp), minlength=len(self.vocabulary)),
+                  out=self.indptr[1:])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def query_vector(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Term columns and unit-length tf-idf weights of the query's known terms"""
+        frequencies = Counter(term for term in faq_terms(query) if term in self.vocabulary)
+        if not frequencies:
+            return np.array([], dtype=np.intp), np.array([], dtype=np.float32)
+        columns = np.fromiter((self.vocabulary[term] for term in frequencies), dtype=np.intp, count=len(frequencies))
+        weights = (1 + np.log(np.fromiter(frequencies.values(), dtype=np.float32, count=len(frequencies)))) * self.idf[columns]
+        return columns, weights / np.linalg.norm(weights)
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """Up to ``k`` (key, cosine score) pairs, best first, scoring above ``min_score``"""
+        columns, query_weights = self.query_vector(query)
+        if not len(columns):
+            return []
+        starts = self.indptr[columns]
+        lengths = self.indptr[columns + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return []
+        # Positions of every posting of the query terms, then sum them per entry
+        positions = np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        candidates, slots = np.unique(self.entries[positions], return_inverse=True)
+        scores = np.bincount(slots, weights=self.weights[positions] * np.repeat(query_weights, lengths))
+
+        if k < len(scores):
+            best = np.argpartition(-scores, k)[:k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(self.keys[candidates[slot]], float(scores[slot])) for slot in best if scores[slot] > min_score]
+
+
+@lru_cache(maxsize=8)
+def faq_index(entries: Tuple[FAQEntry, ...], keyword_weight: float = 3.0) -> FAQIndex:
+    """Index of an FAQ, built once per process for each distinct set of entries"""
+    return FAQIndex(entries, keyword_weight)
+
+
+def faq_entries(database: Dict[str, Dict[str, object]]) -> Tuple[FAQEntry, ...]:
+    """Hashable entries of an FAQ database ``{key: {'keywords': [...], 'response': ...}}``"""
+    return tuple((key, tuple(data['keywords']), data['response']) for key, data in database.items())
@@ -0,0 +1,30 @@
+from typing import Any
+
+
+class FrozenDict(dict):
+    """A dict that refuses changes, so a shared cached value can't be corrupted
+
+    It still is a ``dict``: lookups, iteration, equality and JSON encoding
+    work as usual. Any mutating call raises TypeError.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is immutable")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+
+def freeze(value: Any) -> Any:
+    """Deep copy of nested dicts and lists as FrozenDicts and tuples (named tuples are kept)"""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list) or type(value) is tuple:
+        return tuple([freeze(item) for item in value])
+    return value
@@ -0,0 +1,173 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_stored_at ON responses(stored_at);
+"""
+
+# Only these headers are worth keeping with a cached page
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Date', 'Cache-Control')
+
+
+class CachedResponse:
+    """A response read back from the disk cache"""
+
+    __slots__ = ('url', 'status', 'headers', 'body', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+                 etag: Optional[str], last_modified: Optional[str], stored_at: float):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this response"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response.url = self.url
+        response.encoding = get_encoding_from_headers(response.headers)
+        # Not an answer from the server: when the page was actually fetched
+        response.from_cache = True
+        response.fetched_at = self.stored_at
+        return response
+
+
+class HttpDiskCache:
+    """Persistent cache of GET responses, zlib-compressed in SQLite
+
+    Entries younger than ``fresh_for`` seconds are served without touching
+    the network. Older ones are still served for up to ``stale_for`` more
+    seconds while the client revalidates them in the background; past that
+    they are only used for their ETag/Last-Modified validators.
+    """
+
+    def __init__(self, path: str, fresh_for: float = 120, stale_for: float = 900,
+                 max_entries: int = 2000, compress_level: int = 6):
+        self.path = path
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self.max_entries = max_entries
+        self.compress_level = compress_level
+        self._local = threading.local()
+        self._stores = 0
+        self.available = True
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._connection().executescript(SCHEMA)
+        except (sqlite3.Error, OSError):
+            self.available = False
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return entry.age < self.fresh_for
+
+    def is_usable_stale(self, entry: CachedResponse) -> bool:
+        return entry.age < self.fresh_for + self.stale_for
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        if not self.available:
+            return None
+        try:
+            row = self._connection().execute(
+                'SELECT status, headers, body, etag, last_modified, stored_at FROM responses WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, headers, body, etag, last_modified, stored_at = row
+            return CachedResponse(url, status, json.loads(headers), zlib.decompress(body),
+                                  etag, last_modified, stored_at)
+        except (sqlite3.Error, zlib.error, ValueError):
+            return None
+
+    def store(self, url: str, response: requests.Response):
+        """Cache a 200 response unless the server forbids it"""
+        if not self.available or response.status_code != 200:
+            return
+        if 'no-store' in response.headers.get('Cache-Control', '').lower():
+            return
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (url, response.status_code, json.dumps(headers),
+                     zlib.compress(response.content, self.compress_level),
+                     response.headers.get('ETag'), response.headers.get('Last-Modified'), time.time())
+                )
+            self._stores += 1
+            if self._stores % 100 == 0:
+                self.prune()
+        except sqlite3.Error:
+            pass  # The cache is an accelerator; the live response is still returned
+
+    def touch(self, url: str):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        if not self.available:
+            return
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute('UPDATE responses SET stored_at = ? WHERE url = ?', (time.time(), url))
+        except sqlite3.Error:
+            pass
+
+    def prune(self):
+        """Drop the oldest entries beyond ``max_entries``"""
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'DELETE FROM responses WHERE url IN '
+                '(SELECT url FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        if not self.available:
+            return 0
+        return self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
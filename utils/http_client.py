@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.http_cache import CachedResponse, HttpDiskCache
+
+
+class RateLimitExceeded(requests.RequestException):
+    """Raised when no request token could be acquired before the deadline"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available, or give up after ``timeout`` seconds"""
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_for = self.try_acquire()
+            if wait_for == 0:
+                return True
+            if give_up_at is not None:
+                remaining = give_up_at - time.monotonic()
+                if remaining < wait_for:
+                    return False
+            time.sleep(wait_for)
+
+
+class HttpClient:
+    """requests wrapper with a sized connection pool, retries and rate limiting
+
+    Retries 5xx/429 responses, timeouts and connection errors with full-jitter
+    exponential backoff. Every attempt (including retries) first takes a token
+    from ``rate_limiter``, which is meant to be shared by the whole process.
+    With a ``cache``, plain GETs are answered from disk while fresh, served
+    stale while a background request revalidates them, and otherwise sent
+    as conditional requests.
+    """
+
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+    def __init__(self, headers: Dict[str, str], pool_size: int = 10, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 retry_statuses: Optional[Iterable[int]] = None,
+                 cache: Optional[HttpDiskCache] = None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.retry_statuses = frozenset(retry_statuses) if retry_statuses else self.RETRY_STATUSES
+        self.cache = cache
+        self._revalidating = set()
+        self._revalidate_lock = threading.Lock()
+        self._revalidate_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='http-revalidate')
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        # Retries are handled here so backoff and rate limiting apply to each attempt
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Updated from every fetch and revalidation thread
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0,
+                      'cache_hits': 0, 'stale_served': 0, 'not_modified': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def backoff_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when given"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url: str, timeout: float = 10, deadline: Optional[float] = None,
+            fresh: bool = False, **kwargs) -> requests.Response:
+        """GET through the disk cache when there is one; see ``fetch``
+
+        With ``fresh`` a cached page is never served as is: the request
+        always reaches the server, as a conditional GET when possible.
+        """
+        if self.cache is None or kwargs:
+            return self.fetch(url, timeout, deadline, **kwargs)
+
+        entry = self.cache.lookup(url)
+        if entry is not None and not fresh:
+            if self.cache.is_fresh(entry):
+                self._count('cache_hits')
+                return entry.to_response()
+            if self.cache.is_usable_stale(entry):
+                self._count('stale_served')
+                self.revalidate_in_background(url, entry, timeout)
+                return entry.to_response()
+        return self.revalidate(url, entry, timeout, deadline)
+
+    def revalidate(self, url: str, entry: Optional[CachedResponse], timeout: float,
+                   deadline: Optional[float] = None) -> requests.Response:
+        """Conditional GET against a cached entry, updating the cache"""
+        validators = entry.validators() if entry is not None else {}
+        response = self.fetch(url, timeout, deadline, headers=validators or None)
+        if response.status_code == 304 and entry is not None:
+            self._count('not_modified')
+            self.cache.touch(url)
+            # The server just confirmed the cached page, so it is as good as fetched now
+            confirmed = entry.to_response()
+            confirmed.from_cache = False
+            confirmed.fetched_at = time.time()
+            return confirmed
+        self.cache.store(url, response)
+        return response
+
+    def revalidate_in_background(self, url: str, entry: CachedResponse, timeout: float):
+        """Refresh a stale entry off the request path, once per URL at a time"""
+        with self._revalidate_lock:
+            if url in self._revalidating:
+                return
+            self._revalidating.add(url)
+
+        def refresh():
+            try:
+                self.revalidate(url, entry, timeout, deadline=time.monotonic() + timeout)
+            except requests.RequestException:
+                pass  # Still stale; the next request tries again
+            finally:
+                with self._revalidate_lock:
+                    self._revalidating.discard(url)
+
+        self._revalidate_executor.submit(refresh)
+
+    def fetch(self, url: str, timeout: float = 10, deadline: Optional[float] = None, **kwargs) -> requests.Response:
+        """GET with retries; ``deadline`` is an absolute time.monotonic() bound"""
+        attempt = 0
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise requests.Timeout(f"Deadline exceeded before requesting {url}")
+
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(timeout=remaining):
+                self._count('throttled')
+                raise RateLimitExceeded(f"Rate limit reached before requesting {url}")
+
+            request_timeout = timeout if remaining is None else min(timeout, remaining)
+            response = None
+            self._count('requests')
+            try:
+                response = self.session.get(url, timeout=request_timeout, **kwargs)
+                if response.status_code not in self.retry_statuses or attempt >= self.max_retries:
+                    return response
+            except (requests.Timeout, requests.ConnectionError):
+                if attempt >= self.max_retries:
+                    raise
+
+            delay = self.backoff_delay(attempt, response)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                if response is not None:
+                    return response  # No time left to retry, hand back the error response
+                raise requests.Timeout(f"Deadline exceeded while retrying {url}")
+
+            time.sleep(delay)
+            attempt += 1
+            self._count('retries')
@@ -0,0 +1,131 @@
+import json
+import re
+import zlib
+from typing import Iterable, Iterator, Sequence, Tuple
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Odd multipliers for the rolling n-gram hash and the final bit mix (wrap around in uint64)
+ROLL_MULTIPLIER = np.uint64(0x100000001B3)
+MIX_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def read_labeled(path: str) -> Iterator[Tuple[str, str]]:
+    """(message, intent) pairs from JSON lines with "message" and "intent" fields
+
+    This is the shape ``bench_intent.py --replay --output`` writes, so a
+    replayed log can be corrected by hand and used as training data.
+    """
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('message') is not None and record.get('intent'):
+                yield record['message'], record['intent']
+
+
+class HashedIntentModel:
+    """Linear intent classifier over hashed character and word n-grams
+
+    A message (lowercased, single-spaced) becomes feature indices: the
+    character ``char_ngrams`` of the padded text via a vectorized rolling
+    hash, and word unigrams and bigrams via CRC32, all folded into
+    ``dimensions`` buckets. Scores are the sum of the features' weight rows
+    scaled by 1/sqrt(feature count), plus a bias, softmaxed over the
+    labels. Training is plain SGD on the log loss; nothing but NumPy is
+    needed and a prediction costs a few dozen microseconds.
+    """
+
+    def __init__(self, labels: Sequence[str], dimensions: int = 1 << 18, char_ngrams: Sequence[int] = (3, 4, 5)):
+        self.labels = list(labels)
+        self.dimensions = dimensions
+        self.char_ngrams = tuple(char_ngrams)
+        self.weights = np.zeros((dimensions, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    def features(self, text: str) -> np.ndarray:
+        """Hashed feature indices of a normalized message (repeats count twice)"""
+        padded = np.frombuffer(f' {text} '.encode('utf-8'), dtype=np.uint8).astype(np.uint64)
+        parts = []
+        with np.errstate(over='ignore'):
+            # hashed[i] covers bytes i..i+n-1; each step extends every window by one byte
+            hashed = padded
+            for n in range(2, max(self.char_ngrams) + 1):
+                hashed = hashed[:-1] * ROLL_MULTIPLIER + padded[n - 1:]
+                if n in self.char_ngrams:
+                    parts.append(hashed + np.uint64(n))
+            words = WORD_PATTERN.findall(text)
+            tokens = [f'w {word}' for word in words] + [f'b {first} {second}' for first, second in zip(words, words[1:])]
+            parts.append(np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens),
+                                     dtype=np.uint64, count=len(tokens)))
+            mixed = np.concatenate(parts) * MIX_MULTIPLIER >> np.uint64(32)
+        return (mixed % np.uint64(self.dimensions)).astype(np.intp)
+
+    def _scores(self, indices: np.ndarray) -> np.ndarray:
+        if not len(indices):
+            return self.bias.astype(np.float64)
+        return self.weights[indices].sum(axis=0) / np.sqrt(len(indices)) + self.bias
+
+    def probabilities(self, text: str) -> np.ndarray:
+        scores = self._scores(self.features(text))
+        exp = np.exp(scores - scores.max())
+        return exp / exp.sum()
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Most likely label of a normalized message and its probability"""
+        probabilities = self.probabilities(text)
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+    def fit(self, messages: Sequence[str], labels: Sequence[str], epochs: int = 8,
+            learning_rate: float = 0.5, l2: float = 1e-6, seed: int = 0) -> 'HashedIntentModel':
+        """SGD over (normalized message, label) pairs, shuffled each epoch"""
+        index = {label: position for position, label in enumerate(self.labels)}
+        targets = np.array([index[label] for label in labels], dtype=np.intp)
+        features = [self.features(message) for message in messages]
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            rate = learning_rate / (1 + epoch)
+            for sample in rng.permutation(len(features)):
+                indices = features[sample]
+                scale = 1 / np.sqrt(len(indices)) if len(indices) else 0.0
+                scores = self.weights[indices].sum(axis=0) * scale + self.bias
+                exp = np.exp(scores - scores.max())
+                gradient = exp / exp.sum()
+                gradient[targets[sample]] -= 1
+                if l2:
+                    self.weights[indices] *= 1 - rate * l2
+                np.add.at(self.weights, indices, (-rate * scale * gradient).astype(np.float32))
+                self.bias -= (rate * gradient).astype(np.float32)
+        return self
+
+    def accuracy(self, messages: Sequence[str], labels: Sequence[str]) -> float:
+        if not messages:
+            return 0.0
+        return sum(self.predict(message)[0] == label for message, label in zip(messages, labels)) / len(messages)
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, labels=np.array(self.labels),
+                            char_ngrams=np.array(self.char_ngrams))
+
+    @classmethod
+    def load(cls, path: str) -> 'HashedIntentModel':
+        with np.load(path) as data:
+            weights = data['weights']
+            model = cls(data['labels'].tolist(), weights.shape[0], data['char_ngrams'].tolist())
+            model.weights = weights.astype(np.float32)
+            model.bias = data['bias'].astype(np.float32)
+        return model
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], dimensions: int = 1 << 18,
+              **options) -> 'HashedIntentModel':
+        """Model over the labels seen, fitted on (normalized message, label) pairs"""
+        messages, labels = [], []
+        for message, label in examples:
+            messages.append(message)
+            labels.append(label)
+        return cls(sorted(set(labels)), dimensions).fit(messages, labels, **options)
@@ -0,0 +1,208 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from configuration.config import CITY_ALIASES, GHANA_CITIES, PRODUCT_BRANDS, PRODUCT_CATEGORIES, PRODUCT_KEYWORDS
+
+
+def is_word_char(char: str) -> bool:
+    """What regex ``\\w`` matches: str.isalnum plus underscore"""
+    return char.isalnum() or char == '_'
+
+
+class KeywordMatch(NamedTuple):
+    start: int
+    end: int
+    keyword: str
+    values: Tuple[Tuple[str, Any], ...]  # (kind, value) pairs the keyword stands for
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over dictionaries of keywords
+
+    Keywords are added with the kind of entity they name and the value to
+    report ("sekondi" -> ('location', 'Sekondi-Takoradi')); one keyword can
+    carry several. ``build`` links the trie, after which ``find_all``
+    reports every dictionary hit in one pass over the text, however many
+    keywords there are. A keyword only counts as a whole word: an edge
+    that is a word character must not touch another word character, so
+    "hp" isn't found in "shipping". Matching is on lowercased text and
+    spans index into the text as given.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]  # state -> keyword ids ending there, longest first after build
+        self._keywords = []  # id -> (keyword, (kind, value) pairs, starts with \w, ends with \w)
+        self._ids = {}
+        self._built = True
+
+    @classmethod
+    def from_dictionaries(cls, dictionaries: Dict[str, Union[Iterable[str], Dict[str, str]]]) -> 'KeywordAutomaton':
+        """Automaton over ``{kind: keywords}``; a keyword -> value mapping reports the value"""
+        automaton = cls()
+        for kind, keywords in dictionaries.items():
+            pairs = keywords.items() if isinstance(keywords, dict) else ((keyword, keyword) for keyword in keywords)
+            for keyword, value in pairs:
+                automaton.add(keyword, kind, value)
+        automaton.build()
+        return automaton
+
+    def add(self, keyword: str, kind: str, value: Optional[Any] = None):
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        value = keyword if value is None else value
+        keyword_id = self._ids.get(keyword)
+        if keyword_id is not None:
+            text, values, starts_word, ends_word = self._keywords[keyword_id]
+            if (kind, value) not in values:
+                self._keywords[keyword_id] = (text, values + ((kind, value),), starts_word, ends_word)
+            return
+
+        state = 0
+        for char in keyword:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = following
+        keyword_id = self._ids[keyword] = len(self._keywords)
+        self._keywords.append((keyword, ((kind, value),), is_word_char(keyword[0]), is_word_char(keyword[-1])))
+        self._outputs[state].append(keyword_id)
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                self._outputs[following] = self._outputs[following] + self._outputs[self._fail[following]]
+                queue.append(following)
+        self._built = True
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """Every whole-word keyword occurrence in lowercased text, by start then longest first"""
+        if not self._built:
+            self.build()
+        goto, fail, outputs, keywords = self._goto, self._fail, self._outputs, self._keywords
+        size = len(text)
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            end = position + 1
+            after_word = end < size and is_word_char(text[end])
+            for keyword_id in outputs[state]:
+                keyword, values, starts_word, ends_word = keywords[keyword_id]
+                if ends_word and after_word:
+                    continue
+                start = end - len(keyword)
+                if starts_word and start > 0 and is_word_char(text[start - 1]):
+                    continue
+                matches.append(KeywordMatch(start, end, keyword, values))
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+    def find_longest(self, text: str) -> List[KeywordMatch]:
+        """Leftmost-longest non-overlapping matches ("gaming laptop", not "gaming" and "laptop")"""
+        selected = []
+        covered = 0
+        for match in self.find_all(text):
+            if match.start >= covered:
+                selected.append(match)
+                covered = match.end
+        return selected
+
+    def values(self, text: str, kind: str, longest: bool = False) -> List[Any]:
+        """Distinct values of one kind found in lowercased text, in order of appearance"""
+        return match_values(self.find_longest(text) if longest else self.find_all(text), kind)
+
+
+def match_values(matches: Sequence[KeywordMatch], kind: str) -> List[Any]:
+    """Distinct values of one kind among matches, in order"""
+    return list(dict.fromkeys(value for match in matches for match_kind, value in match.values if match_kind == kind))
+
+
+# Plurals that aren't the word plus "s"; other words ending in y, x, z, ch or sh get none
+IRREGULAR_PLURALS = {
+    'accessory': 'accessories',
+    'battery': 'batteries',
+    'galaxy': 'galaxies',
+    'watch': 'watches',
+    'smartwatch': 'smartwatches',
+    'xbox': 'xboxes',
+    'box': 'boxes',
+    'switch': 'switches',
+    'dish': 'dishes'
+}
+
+
+def inflections(keyword: str) -> List[str]:
+    """The keyword and its plural ("laptops", "watches", "accessories"), since matching is whole-word
+
+    A keyword already ending in s ("tires", "parts", "airpods") is taken
+    as its own plural.
+    """
+    forms = [keyword]
+    head, _, last = keyword.rpartition(' ')
+    if not last.isalpha() or last.endswith('s'):
+        return forms
+    if last in IRREGULAR_PLURALS:
+        forms.append(f"{head} {IRREGULAR_PLURALS[last]}" if head else IRREGULAR_PLURALS[last])
+    elif not last.endswith(('y', 'x', 'z', 'ch', 'sh')):
+        forms.append(keyword + 's')
+    return forms
+
+
+def with_inflections(keywords: Dict[str, str]) -> Dict[str, str]:
+    """Keyword -> value mapping extended with plurals; a listed keyword keeps its own value"""
+    extended = dict(keywords)
+    for keyword, value in keywords.items():
+        for form in inflections(keyword):
+            extended.setdefault(form, value)
+    return extended
+
+
+def entity_dictionaries() -> Dict[str, Dict[str, str]]:
+    """Keyword -> value dictionaries by entity kind, from configuration/config.py
+
+    Product and category keywords also match their plurals ("used cars"
+    finds 'car'); brands and cities only match as written.
+    """
+    categories = {}
+    for subcategories in PRODUCT_CATEGORIES.values():
+        for category, keywords in subcategories.items():
+            categories.setdefault(category, category)
+            for keyword in keywords:
+                categories.setdefault(keyword, category)
+    locations = {city.lower(): city for city in GHANA_CITIES}
+    locations.update(CITY_ALIASES)
+    return {
+        'product_type': with_inflections({keyword: keyword for keyword in PRODUCT_KEYWORDS}),
+        'brand': {brand: brand for brand in PRODUCT_BRANDS},
+        'location': locations,
+        'category': with_inflections(categories)
+    }
+
+
+# Product, brand, city and category dictionaries, shared by the agents and session analytics
+ENTITY_DICTIONARY = KeywordAutomaton.from_dictionaries(entity_dictionaries())
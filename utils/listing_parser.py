@@ -0,0 +1,155 @@
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from utils.product import Product
+
+try:
+    from lxml import etree, html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    LXML_AVAILABLE = False
+
+
+def _has_class(class_name: str) -> str:
+    """XPath predicate matching one class in a space separated class list"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# Same fallback order as ProductAgent.CARD_SELECTORS. Each entry carries a
+# cheap byte marker so selectors that cannot match are skipped without a
+# tree walk.
+CARD_SELECTORS = [
+    ('div.b-list-advert__item', b'b-list-advert__item', f"//div[{_has_class('b-list-advert__item')}]"),
+    ('div[data-testid="advert-list-item"]', b'advert-list-item', "//div[@data-testid='advert-list-item']"),
+    ('div.qa-advert-list-item', b'qa-advert-list-item', f"//div[{_has_class('qa-advert-list-item')}]"),
+    ('article', b'<article', "//article"),
+    ('div.advert-card', b'advert-card', f"//div[{_has_class('advert-card')}]"),
+]
+
+PRICE_PATTERN = re.compile(r'GH₵|₵')
+
+# The elements each card field can come from, in fallback priority order
+TITLE = 'title'
+HEADING = 'h3'
+PRICE = 'price'
+QA_PRICE = 'qa_price'
+LOCATION = 'location'
+QA_LOCATION = 'qa_location'
+
+
+def _text(element) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True)"""
+    return ''.join(part.strip() for part in element.itertext())
+
+
+def _single_string(element) -> Optional[str]:
+    """Equivalent of BeautifulSoup's ``.string`` for an lxml element"""
+    children = list(element)
+    if not children:
+        return element.text
+    if len(children) == 1 and not element.text and not children[0].tail:
+        return _single_string(children[0])
+    return None
+
+
+class ListingParser:
+    """Fast parser for Jiji listing pages built on lxml
+
+    The page is parsed once by libxml2, card containers are located with
+    precompiled XPath (skipping selectors whose marker is absent from the
+    raw bytes), and every card is read in a single walk over its subtree
+    instead of one ``find`` per field.
+    """
+
+    def __init__(self, base_url: str, encoding: str = 'utf-8'):
+        if not LXML_AVAILABLE:
+            raise ImportError("lxml is required for the fast listing parser")
+        self.base_url = base_url
+        # Jiji serves UTF-8; libxml2 would otherwise assume Latin-1 without a meta charset
+        self.html_parser = lxml_html.HTMLParser(encoding=encoding, remove_comments=True)
+        self.selectors = {css: (marker, etree.XPath(xpath)) for css, marker, xpath in CARD_SELECTORS}
+        self.default_order = [css for css, _, _ in CARD_SELECTORS]
+
+    def find_cards(self, content: bytes, order: Optional[Sequence[str]] = None) -> Tuple[Optional[str], List, List[str]]:
+        """Return the first selector that matches, its card elements and the selectors that missed"""
+        if not content:
+            return None, [], []
+
+        root = lxml_html.fromstring(content, parser=self.html_parser)
+        missed = []
+        for css in order or self.default_order:
+            marker, xpath = self.selectors[css]
+            if marker in content:
+                elements = xpath(root)
+                if elements:
+                    return css, elements, missed
+            missed.append(css)
+        return None, [], missed
+
+    def parse_card(self, card) -> Product:
+        """Extract title, link, price and location from one card in one pass"""
+        found = {}
+        first_link = None
+        first_href = None
+
+        for element in card.iterdescendants():
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue  # Comments and processing instructions
+            classes = element.get('class', '').split()
+
+            if tag == 'a':
+                if first_link is None:
+                    first_link = element
+                if first_href is None and element.get('href') is not None:
+                    first_href = element.get('href')
+                if TITLE not in found and 'b-list-advert__item__title' in classes:
+                    found[TITLE] = element
+            elif tag == 'h3':
+                found.setdefault(HEADING, element)
+            elif tag == 'div':
+                if 'b-list-advert__item__price' in classes:
+                    found.setdefault(PRICE, element)
+                elif 'b-list-advert__item__location' in classes:
+                    found.setdefault(LOCATION, element)
+                if 'price_text' not in found:
+                    string = _single_string(element)
+                    if string is not None and PRICE_PATTERN.search(string):
+                        found['price_text'] = element
+            elif tag == 'span':
+                if 'qa-advert-price' in classes:
+                    found.setdefault(QA_PRICE, element)
+                elif 'qa-advert-location' in classes:
+                    found.setdefault(QA_LOCATION, element)
+
+        title_elem = found.get(TITLE)
+        if title_elem is None:
+            title_elem = found.get(HEADING, first_link)
+        title = _text(title_elem) if title_elem is not None else "Product Title"
+
+        if first_href is not None:
+            link = first_href if first_href.startswith('http') else f"{self.base_url}{first_href}"
+        else:
+            link = "#"
+
+        price_elem = found.get(PRICE, found.get(QA_PRICE, found.get('price_text')))
+        price_text = _text(price_elem) if price_elem is not None else "Price on request"
+
+        location_elem = found.get(LOCATION, found.get(QA_LOCATION))
+        location = _text(location_elem) if location_elem is not None else "Ghana"
+
+        return Product.from_listing(title, link, price_text, location)
+
+    def parse(self, content: bytes, max_results: int = 10) -> List[Product]:
+        """Parse up to ``max_results`` products from a listing page"""
+        return self.parse_cards(self.find_cards(content)[1], max_results)
+
+    def parse_cards(self, cards: List, max_results: int = 10) -> List[Product]:
+        """Parse up to ``max_results`` card elements"""
+        products = []
+        for card in cards[:max_results]:
+            try:
+                products.append(self.parse_card(card))
+            except Exception:
+                continue  # Skip malformed cards, like ProductAgent.parse_product_card
+        return products
@@ -0,0 +1,103 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+from utils.keyword_automaton import KeywordAutomaton, is_word_char
+
+# Intent patterns are word-bounded alternations of literals: \b(find|look for|...)\b
+ALTERNATION_PATTERN = re.compile(r'^\\b\((.*)\)\\b$')
+
+INTENT = 'intent'
+
+
+def alternatives(pattern: str) -> List[str]:
+    """Literal alternatives of a ``\\b(a|b c|...)\\b`` intent pattern"""
+    match = ALTERNATION_PATTERN.match(pattern)
+    if not match:
+        raise ValueError(f"not a word-bounded alternation of literals: {pattern!r}")
+    return [alternative.replace("\\'", "'") for alternative in match.group(1).split('|')]
+
+
+class EntitySpan(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+class ScanResult(NamedTuple):
+    intent_scores: Dict[str, int]
+    entities: Dict[str, List[Any]]
+    spans: List[EntitySpan]
+
+
+class MessageScanner:
+    """Intent pattern counts and dictionary entities from one pass over a message
+
+    Every intent alternative and every dictionary keyword goes into one
+    Aho-Corasick automaton, so a single pass reports every whole-word hit.
+    Each hit is then credited to what it stands for: intent patterns count
+    it unless it overlaps that pattern's previous match, which is what
+    ``len(re.findall(pattern, text))`` counts; dictionary kinds collect
+    their values in order of appearance, with spans.
+    """
+
+    def __init__(self, intent_patterns: Dict[str, Sequence[str]], dictionaries: Dict[str, Dict[str, str]]):
+        self.intents = list(intent_patterns)
+        self.kinds = list(dictionaries)
+        self._pattern_intents = []  # pattern index -> intent
+        self.automaton = KeywordAutomaton()
+        for intent, patterns in intent_patterns.items():
+            for pattern in patterns:
+                index = len(self._pattern_intents)
+                self._pattern_intents.append(intent)
+                for rank, literal in enumerate(alternatives(pattern)):
+                    self.automaton.add(literal, INTENT, (index, rank))
+        for kind, keywords in dictionaries.items():
+            for keyword, value in keywords.items():
+                self.automaton.add(keyword, kind, value)
+        self.automaton.build()
+
+    @staticmethod
+    def _on_boundaries(text: str, start: int, end: int) -> bool:
+        """``\\b`` at both ends; the automaton only checks edges that are word characters"""
+        def word(position):
+            return 0 <= position < len(text) and is_word_char(text[position])
+        return word(start - 1) != word(start) and word(end - 1) != word(end)
+
+    def scan(self, text_lower: str) -> ScanResult:
+        """Scan lowercased text; scores are in ``intent_patterns`` order"""
+        counts = [0] * len(self._pattern_intents)
+        last_end = [0] * len(self._pattern_intents)
+        entities = {kind: {} for kind in self.kinds}
+        spans = []
+        chosen = {}  # pattern index -> (rank, end) of the alternative re.findall takes at ``position``
+        position = None
+
+        # Matches come by start, longest first; an intent pattern takes its
+        # earliest-listed alternative among those starting at one position
+        for match in self.automaton.find_all(text_lower):
+            if match.start != position:
+                for index, (_, end) in chosen.items():
+                    counts[index] += 1
+                    last_end[index] = end
+                chosen.clear()
+                position = match.start
+            for kind, value in match.values:
+                if kind != INTENT:
+                    entities[kind].setdefault(value)
+                    spans.append(EntitySpan(kind, value, match.start, match.end))
+                    continue
+                index, rank = value
+                if match.start < last_end[index] or (index in chosen and chosen[index][0] < rank):
+                    continue
+                if not (is_word_char(match.keyword[0]) and is_word_char(match.keyword[-1])):
+                    if not self._on_boundaries(text_lower, match.start, match.end):
+                        continue
+                chosen[index] = (rank, match.end)
+        for index, (_, end) in chosen.items():
+            counts[index] += 1
+
+        intent_scores = dict.fromkeys(self.intents, 0)
+        for index, count in enumerate(counts):
+            intent_scores[self._pattern_intents[index]] += count
+        return ScanResult(intent_scores, {kind: list(values) for kind, values in entities.items()}, spans)
@@ -0,0 +1,323 @@
+import bisect
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.product import Product
+
+logger = logging.getLogger(__name__)
+
+# Sort key for watches with no price ceiling: they match any price
+NO_THRESHOLD = float('inf')
+
+
+class PriceWatch:
+    """One session's request to be told about cheaper listings for a query"""
+
+    __slots__ = ('watch_id', 'session_id', 'query', 'key', 'min_pesewas', 'max_pesewas',
+                 'drop_percent', 'created_at', 'expires_at')
+
+    def __init__(self, watch_id: int, session_id: str, query: str, key: str,
+                 min_pesewas: Optional[int], max_pesewas: Optional[int], expires_at: float,
+                 drop_percent: float = 0.0):
+        self.watch_id = watch_id
+        self.session_id = session_id
+        self.query = query
+        self.key = key
+        self.min_pesewas = min_pesewas
+        self.max_pesewas = max_pesewas
+        self.drop_percent = drop_percent  # smallest price drop worth an alert
+        self.created_at = time.time()
+        self.expires_at = expires_at
+
+    @property
+    def sort_key(self) -> Tuple[float, int]:
+        return (NO_THRESHOLD if self.max_pesewas is None else self.max_pesewas, self.watch_id)
+
+    def matches(self, price_pesewas: int) -> bool:
+        if self.min_pesewas is not None and price_pesewas < self.min_pesewas:
+            return False
+        return self.max_pesewas is None or price_pesewas <= self.max_pesewas
+
+
+def is_drop(previous_pesewas: int, price_pesewas: int, drop_percent: float) -> bool:
+    """Whether the price fell, by at least ``drop_percent`` percent"""
+    drop = previous_pesewas - price_pesewas
+    return drop > 0 and drop * 100 >= drop_percent * previous_pesewas
+
+
+class PriceAlert:
+    """A listing that newly matched a watch: a new listing or a price drop"""
+
+    __slots__ = ('watch_id', 'query', 'product', 'previous_pesewas', 'triggered_at')
+
+    def __init__(self, watch_id: int, query: str, product: Product, previous_pesewas: Optional[int]):
+        self.watch_id = watch_id
+        self.query = query
+        self.product = product
+        self.previous_pesewas = previous_pesewas
+        self.triggered_at = time.time()
+
+    @property
+    def kind(self) -> str:
+        return 'new' if self.previous_pesewas is None else 'drop'
+
+    def describe(self) -> str:
+        if self.kind == 'drop':
+            return (f"Price drop on {self.product.title}: GH₵ {self.previous_pesewas / 100:,.0f} "
+                    f"→ {self.product.price}")
+        return f"New listing for \"{self.query}\": {self.product.title} at {self.product.price}"
+
+
+class QueryGroup:
+    """All watches on one normalized query, plus the listings seen for it
+
+    Watches are kept sorted by price ceiling, so the watches a listing at
+    price p triggers are a bisect away instead of a scan over every watch.
+    Each listing keeps a reference price per drop threshold in use: the
+    price it last alerted at, raised whenever the price goes up. Drops
+    are measured from it, so a price sliding 2% a poll still alerts a 5%
+    watch once the slide adds up to 5%.
+    """
+
+    __slots__ = ('query', 'watches', 'sort_keys', 'snapshot', 'polled_at')
+
+    def __init__(self, query: str):
+        self.query = query
+        self.watches = []  # PriceWatch, ordered by sort_key
+        self.sort_keys = []  # parallel list of sort_key tuples
+        self.snapshot = OrderedDict()  # link -> {drop_percent: reference price_pesewas}, oldest first
+        self.polled_at = None
+
+    def add(self, watch: PriceWatch):
+        index = bisect.bisect_left(self.sort_keys, watch.sort_key)
+        self.sort_keys.insert(index, watch.sort_key)
+        self.watches.insert(index, watch)
+
+    def remove(self, watch: PriceWatch):
+        index = bisect.bisect_left(self.sort_keys, watch.sort_key)
+        if index < len(self.watches) and self.watches[index] is watch:
+            del self.sort_keys[index]
+            del self.watches[index]
+
+    def watches_for(self, price_pesewas: int, drop_percent: Optional[float] = None) -> List[PriceWatch]:
+        """Watches whose price window contains ``price_pesewas``; for a drop, those with its threshold"""
+        start = bisect.bisect_left(self.sort_keys, (price_pesewas, -1))
+        return [watch for watch in self.watches[start:]
+                if watch.matches(price_pesewas) and (drop_percent is None or watch.drop_percent == drop_percent)]
+
+    def diff(self, products: List[Product],
+             max_snapshot: int) -> List[Tuple[Product, Optional[int], Optional[float]]]:
+        """(listing, reference price, drop threshold) for new listings and drops, updating the snapshot
+
+        New listings come with a reference price and threshold of None.
+        The first poll only records a baseline. Listings that drop out of
+        the results stay in the snapshot (up to ``max_snapshot``), so one
+        reappearing on the next poll isn't reported as new.
+        """
+        baseline = self.polled_at is None
+        thresholds = sorted({watch.drop_percent for watch in self.watches})
+        changes = []
+        for product in products:
+            price = product.price_pesewas
+            if price is None or not product.link or product.link == '#':
+                continue
+            references = self.snapshot.pop(product.link, None)
+            if references is None and not baseline:
+                changes.append((product, None, None))
+            updated = {}
+            for drop_percent in thresholds:
+                reference = price if references is None else references.get(drop_percent, price)
+                if is_drop(reference, price, drop_percent):
+                    changes.append((product, reference, drop_percent))
+                    reference = price
+                updated[drop_percent] = max(reference, price)
+            self.snapshot[product.link] = updated
+        while len(self.snapshot) > max_snapshot:
+            self.snapshot.popitem(last=False)
+        self.polled_at = time.time()
+        return changes
+
+
+class PriceAlertEngine:
+    """Polls watched queries in the background and queues alerts per session
+
+    However many sessions watch the same query, it costs one fetch per
+    cycle: watches are grouped by normalized query, and each cycle fetches
+    the distinct queries in batches on a small pool. Results are diffed
+    against the previous snapshot, and only new or cheaper listings are
+    matched against the group's watches. Alerts wait in a bounded
+    per-session outbox until the session drains them, or until the
+    session's last watch expires.
+    """
+
+    def __init__(self, poll_interval: float = 600, batch_size: int = 20, max_workers: int = 4,
+                 watch_ttl: float = 7 * 24 * 3600, max_watches_per_session: int = 20,
+                 max_pending_alerts: int = 50, max_snapshot: int = 500, drop_percent: float = 0.0):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.watch_ttl = watch_ttl
+        self.max_watches_per_session = max_watches_per_session
+        self.max_pending_alerts = max_pending_alerts
+        self.max_snapshot = max_snapshot
+        self.drop_percent = drop_percent
+
+        self.fetch = None
+        self._groups = {}  # key -> QueryGroup
+        self._watches = {}  # watch_id -> PriceWatch
+        self._by_session = {}  # session_id -> set of watch_ids
+        self._outbox = {}  # session_id -> deque of PriceAlert
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'cycles': 0, 'fetches': 0, 'fetch_errors': 0, 'changes': 0, 'alerts': 0}
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return ' '.join(query.lower().split())
+
+    def add_watch(self, session_id: str, query: str, min_ghs: Optional[float] = None,
+                  max_ghs: Optional[float] = None, drop_percent: Optional[float] = None) -> PriceWatch:
+        """Watch ``query`` for listings priced within [min_ghs, max_ghs]
+
+        Price drops smaller than ``drop_percent`` percent (the engine's
+        default when None) are not reported. The oldest watch of a
+        session is dropped once it has ``max_watches_per_session``.
+        """
+        key = self.normalize(query)
+        with self._lock:
+            watch = PriceWatch(
+                next(self._ids), session_id, query, key,
+                None if min_ghs is None else int(min_ghs * 100),
+                None if max_ghs is None else int(max_ghs * 100),
+                time.time() + self.watch_ttl,
+                self.drop_percent if drop_percent is None else drop_percent
+            )
+            session_watches = self._by_session.get(session_id, ())
+            if len(session_watches) >= self.max_watches_per_session:
+                self._remove_locked(min(session_watches))
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = QueryGroup(query)
+            group.add(watch)
+            self._watches[watch.watch_id] = watch
+            self._by_session.setdefault(session_id, set()).add(watch.watch_id)
+        return watch
+
+    def remove_watch(self, watch_id: int):
+        with self._lock:
+            self._remove_locked(watch_id)
+
+    def _remove_locked(self, watch_id: int):
+        watch = self._watches.pop(watch_id, None)
+        if watch is None:
+            return
+        group = self._groups.get(watch.key)
+        if group is not None:
+            group.remove(watch)
+            if not group.watches:
+                del self._groups[watch.key]
+        session_watches = self._by_session.get(watch.session_id)
+        if session_watches is not None:
+            session_watches.discard(watch_id)
+            if not session_watches:
+                del self._by_session[watch.session_id]
+
+    def watches_for_session(self, session_id: str) -> List[PriceWatch]:
+        with self._lock:
+            return sorted((self._watches[watch_id] for watch_id in self._by_session.get(session_id, ())),
+                          key=lambda watch: watch.watch_id)
+
+    def drain(self, session_id: str) -> List[PriceAlert]:
+        """Hand over and forget the alerts queued for a session"""
+        with self._lock:
+            outbox = self._outbox.pop(session_id, None)
+        return list(outbox) if outbox else []
+
+    def ingest(self, key: str, products: List[Product]) -> int:
+        """Diff fresh results for a query and queue alerts; returns alerts queued"""
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                return 0
+            changes = group.diff(products, self.max_snapshot)
+            queued = 0
+            for product, previous, drop_percent in changes:
+                for watch in group.watches_for(product.price_pesewas, drop_percent):
+                    outbox = self._outbox.get(watch.session_id)
+                    if outbox is None:
+                        outbox = self._outbox[watch.session_id] = deque(maxlen=self.max_pending_alerts)
+                    outbox.append(PriceAlert(watch.watch_id, watch.query, product, previous))
+                    queued += 1
+            self.stats['changes'] += len(changes)
+            self.stats['alerts'] += queued
+        return queued
+
+    def expire(self):
+        """Drop watches past their TTL, and the pending alerts of sessions left without any"""
+        now = time.time()
+        with self._lock:
+            for watch_id in [w.watch_id for w in self._watches.values() if w.expires_at <= now]:
+                self._remove_locked(watch_id)
+            for session_id in [session_id for session_id in self._outbox if session_id not in self._by_session]:
+                del self._outbox[session_id]
+
+    def poll_once(self, executor: Optional[ThreadPoolExecutor] = None):
+        """Fetch every watched query once and ingest the results"""
+        self.expire()
+        with self._lock:
+            batch = [(key, group.query) for key, group in self._groups.items()]
+        self.stats['cycles'] += 1
+
+        def poll(item):
+            key, query = item
+            try:
+                products = self.fetch(query)
+            except Exception:
+                logger.exception("Price alert poll failed for %r", query)
+                with self._lock:
+                    self.stats['fetch_errors'] += 1
+                return
+            with self._lock:
+                self.stats['fetches'] += 1
+            self.ingest(key, products)
+
+        for start in range(0, len(batch), self.batch_size):
+            if self._stop.is_set():
+                return
+            chunk = batch[start:start + self.batch_size]
+            if executor is None:
+                for item in chunk:
+                    poll(item)
+            else:
+                list(executor.map(poll, chunk))
+
+    def start(self, fetch: Callable[[str], List[Product]]) -> 'PriceAlertEngine':
+        """Start polling with ``fetch(query) -> products`` (idempotent)"""
+        self.fetch = fetch
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='price-alerts', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='price-alert-poll') as executor:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self.poll_once(executor)
+                self._stop.wait(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = sum(len(outbox) for outbox in self._outbox.values())
+            return dict(self.stats, watches=len(self._watches), queries=len(self._groups),
+                        sessions=len(self._by_session), pending=pending)
@@ -0,0 +1,373 @@
+import glob
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.product import Product
+
+logger = logging.getLogger(__name__)
+
+# One observation: link hash, unix time, price in pesewas - 24 bytes, little endian
+RECORD_DTYPE = np.dtype([('key', '<u8'), ('at', '<f8'), ('price', '<i8')])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+
+SEGMENT_PATTERN = 'segment-%06d.dat'
+
+
+def link_key(link: str) -> int:
+    """Stable 64-bit key for a listing link"""
+    return int.from_bytes(hashlib.blake2b(link.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class KeyHistory:
+    """Observations for one listing, in time order"""
+
+    __slots__ = ('times', 'prices')
+
+    def __init__(self):
+        self.times = array('d')
+        self.prices = array('q')
+
+    def append(self, at: float, price: int):
+        self.times.append(at)
+        self.prices.append(price)
+
+    def window(self, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        start = 0 if since is None else bisect_left(self.times, since)
+        end = len(self.times) if until is None else bisect_right(self.times, until)
+        return start, end
+
+
+def compact_records(records: np.ndarray, oldest: Optional[float]) -> np.ndarray:
+    """Records sorted by listing then time, without duplicates, those before ``oldest`` or mid-run repeats"""
+    if oldest is not None:
+        records = records[records['at'] >= oldest]
+    if not len(records):
+        return records
+    # lexsort on the numeric columns; sorting the structured array itself is several times slower
+    records = records[np.lexsort((records['price'], records['at'], records['key']))]
+    keys, times, prices = records['key'], records['at'], records['price']
+    repeated = np.zeros(len(records), dtype=bool)
+    repeated[1:] = (keys[1:] == keys[:-1]) & (times[1:] == times[:-1]) & (prices[1:] == prices[:-1])
+    if repeated.any():
+        records = records[~repeated]
+        keys, prices = records['key'], records['price']
+    first = np.ones(len(records), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    last = np.ones(len(records), dtype=bool)
+    last[:-1] = first[1:]
+    changed = np.ones(len(records), dtype=bool)
+    changed[1:] = prices[1:] != prices[:-1]
+    changes_next = np.ones(len(records), dtype=bool)
+    changes_next[:-1] = changed[1:]
+    return records[first | last | changed | changes_next]
+
+
+def index_records(records: np.ndarray) -> Dict[int, 'KeyHistory']:
+    """Per-listing series of records sorted by listing then time"""
+    index = {}
+    if not len(records):
+        return index
+    keys = records['key']
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    ends = np.append(starts[1:], len(records))
+    times, prices = records['at'], records['price']
+    for key, start, end in zip(keys[starts].tolist(), starts.tolist(), ends.tolist()):
+        history = index[key] = KeyHistory()
+        history.times.frombytes(times[start:end].tobytes())
+        history.prices.frombytes(prices[start:end].tobytes())
+    return index
+
+
+class PriceHistory:
+    """Append-only price time series per listing link, in fixed-width segment files
+
+    Each observation is a 24-byte record appended to the active segment;
+    segments roll over at ``segment_records`` records. On open the
+    segments are memory-mapped and scanned into per-listing time/price
+    arrays, so range queries are a bisect plus a min/max over a slice.
+    A repeat of a listing's last price within ``min_interval`` seconds is
+    not written. ``compact`` rewrites the closed segments into one,
+    dropping observations older than ``retention`` and runs of unchanged
+    prices; it runs on a background thread once there are more than
+    ``max_segments`` segments, and once the oldest observation is
+    ``compact_interval`` past retention. Writes carry on into a fresh
+    segment while it runs.
+    """
+
+    def __init__(self, directory: str, segment_records: int = 1_000_000,
+                 retention: Optional[float] = 90 * 24 * 3600, min_interval: float = 3600,
+                 max_segments: int = 8, compact_interval: float = 24 * 3600):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self.retention = retention
+        self.min_interval = min_interval
+        self.compact_interval = compact_interval
+        self._index = {}  # link key -> KeyHistory
+        self._oldest = None  # time of the oldest observation held
+        self._lock = threading.Lock()
+        self._active = None
+        self._active_number = 0
+        self._active_records = 0
+        self._compacting = False
+        self._pending = None  # rows written while a compaction runs, replayed onto its index
+        self.records = 0
+        self.available = True
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+        except OSError:
+            self.available = False
+
+    def _segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, 'segment-*.dat')))
+
+    @staticmethod
+    def _read_segment(path: str) -> np.ndarray:
+        """Records of a segment, ignoring a torn record at the end"""
+        size = os.path.getsize(path)
+        usable = size - size % RECORD_SIZE
+        if not usable:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        with open(path, 'rb') as handle:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return np.frombuffer(mapped, dtype=RECORD_DTYPE, count=usable // RECORD_SIZE).copy()
+
+    def _load(self):
+        segments = self._segments()
+        unordered = set()
+        for path in segments:
+            self._index_records(self._read_segment(path), unordered)
+        if unordered:
+            # A crash between writing a compacted segment and removing the
+            # ones it replaced leaves both; put those series back in order
+            self._reorder(unordered)
+        if segments:
+            last = segments[-1]
+            self._active_number = int(os.path.basename(last)[8:14])
+            size = os.path.getsize(last)
+            if size % RECORD_SIZE:
+                with open(last, 'r+b') as handle:
+                    handle.truncate(size - size % RECORD_SIZE)
+            self._active_records = size // RECORD_SIZE
+        else:
+            self._active_number = 1
+        if unordered:
+            self.compact()
+
+    def _index_records(self, records: np.ndarray, unordered: set):
+        """Append records to the per-listing series, noting keys whose times go backwards or repeat"""
+        index = self._index
+        for key, at, price in zip(records['key'].tolist(), records['at'].tolist(), records['price'].tolist()):
+            history = index.get(key)
+            if history is None:
+                history = index[key] = KeyHistory()
+            elif at <= history.times[-1]:
+                unordered.add(key)
+            history.append(at, price)
+        self.records += len(records)
+        if len(records):
+            oldest = float(records['at'].min())
+            self._oldest = oldest if self._oldest is None else min(self._oldest, oldest)
+
+    def _reorder(self, keys: Iterable[int]):
+        """Sort the series of ``keys`` by time, dropping exact duplicate observations"""
+        for key in keys:
+            history = self._index[key]
+            observations = sorted(set(zip(history.times, history.prices)))
+            self.records -= len(history.times) - len(observations)
+            repaired = KeyHistory()
+            for at, price in observations:
+                repaired.append(at, price)
+            self._index[key] = repaired
+
+    def _writer(self):
+        if self._active is None or self._active_records >= self.segment_records:
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+            if self._active_records >= self.segment_records:
+                self._active_number += 1
+                self._active_records = 0
+            path = os.path.join(self.directory, SEGMENT_PATTERN % self._active_number)
+            self._active = open(path, 'ab')
+        return self._active
+
+    def record(self, products: Iterable[Product], at: Optional[float] = None) -> int:
+        """Append the priced products' current prices; returns records written"""
+        if not self.available:
+            return 0
+        at = time.time() if at is None else at
+        with self._lock:
+            rows = []
+            for product in products:
+                if product.price_pesewas is None or not product.link or product.link == '#':
+                    continue
+                key = link_key(product.link)
+                history = self._index.get(key)
+                if history is None:
+                    history = self._index[key] = KeyHistory()
+                elif at < history.times[-1]:
+                    continue  # Keep every series in time order
+                elif history.prices[-1] == product.price_pesewas and at - history.times[-1] < self.min_interval:
+                    continue
+                history.append(at, product.price_pesewas)
+                rows.append((key, at, product.price_pesewas))
+            if not rows:
+                return 0
+            try:
+                writer = self._writer()
+                writer.write(np.array(rows, dtype=RECORD_DTYPE).tobytes())
+                writer.flush()
+            except OSError:
+                return 0
+            self._active_records += len(rows)
+            self.records += len(rows)
+            if self._pending is not None:
+                self._pending.extend(rows)
+            if self._oldest is None:
+                self._oldest = at
+            written = len(rows)
+            due = self._active_records >= self.segment_records or self._expired(time.time())
+        if due:
+            self.compact_in_background()
+        return written
+
+    def history(self, link: str, since: Optional[float] = None,
+                until: Optional[float] = None) -> List[Tuple[float, int]]:
+        """(unix time, price in pesewas) observations for a listing"""
+        history = self._index.get(link_key(link))
+        if history is None:
+            return []
+        start, end = history.window(since, until)
+        return list(zip(history.times[start:end], history.prices[start:end]))
+
+    def min_price(self, link: str, since: Optional[float] = None,
+                  until: Optional[float] = None) -> Optional[int]:
+        """Lowest price in pesewas seen for a listing in the window"""
+        history = self._index.get(link_key(link))
+        if history is None:
+            return None
+        start, end = history.window(since, until)
+        return min(history.prices[start:end]) if end > start else None
+
+    def max_price(self, link: str, since: Optional[float] = None,
+                  until: Optional[float] = None) -> Optional[int]:
+        """Highest price in pesewas seen for a listing in the window"""
+        history = self._index.get(link_key(link))
+        if history is None:
+            return None
+        start, end = history.window(since, until)
+        return max(history.prices[start:end]) if end > start else None
+
+    def latest(self, link: str) -> Optional[Tuple[float, int]]:
+        history = self._index.get(link_key(link))
+        if history is None or not history.times:
+            return None
+        return history.times[-1], history.prices[-1]
+
+    def compact(self):
+        """Rewrite the closed segments as one, without expired observations or repeated prices
+
+        Within a run of unchanged prices only the first and last
+        observations are kept, so "seen at this price since ... until ..."
+        survives compaction. The lock is only held to close the active
+        segment and to swap in the new index: reading, filtering and
+        writing the snapshot happen while ``record`` carries on into a
+        fresh segment numbered after the compacted one.
+        """
+        if not self.available:
+            return
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+            old_segments = self._segments()
+            number = self._active_number + 1
+            self._active_number = number + 1
+            self._active_records = 0
+            self._pending = []
+        try:
+            oldest = None if self.retention is None else time.time() - self.retention
+            records = compact_records(
+                np.concatenate([self._read_segment(path) for path in old_segments] or
+                               [np.empty(0, dtype=RECORD_DTYPE)]),
+                oldest
+            )
+            path = os.path.join(self.directory, SEGMENT_PATTERN % number)
+            temporary = path + '.tmp'
+            with open(temporary, 'wb') as handle:
+                handle.write(records.tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temporary, path)
+            for segment in old_segments:
+                os.remove(segment)
+            index = index_records(records)
+
+            with self._lock:
+                for key, at, price in self._pending:
+                    history = index.get(key)
+                    if history is None:
+                        history = index[key] = KeyHistory()
+                    history.append(at, price)
+                self._index = index
+                self.records = len(records) + len(self._pending)
+                times = [at for _, at, _ in self._pending]
+                if len(records):
+                    times.append(float(records['at'].min()))
+                self._oldest = min(times, default=None)
+        finally:
+            with self._lock:
+                self._pending = None
+                self._compacting = False
+
+    def compact_in_background(self):
+        """Start ``maybe_compact`` on a thread of its own unless a compaction is running"""
+        with self._lock:
+            if self._compacting or not self.available:
+                return
+        threading.Thread(target=self._compact_quietly, name='price-history-compact', daemon=True).start()
+
+    def _compact_quietly(self):
+        try:
+            self.maybe_compact()
+        except OSError:
+            logger.exception("Price history compaction failed; segments are kept for the next attempt")
+
+    def segment_count(self) -> int:
+        return len(self._segments())
+
+    def _expired(self, now: float) -> bool:
+        """Whether observations have been past retention for ``compact_interval``"""
+        return (self.retention is not None and self._oldest is not None
+                and self._oldest < now - self.retention - self.compact_interval)
+
+    def maybe_compact(self):
+        """Compact once writes have rolled over into too many segments, or old observations are due to expire"""
+        if self.available and (self._expired(time.time()) or self.segment_count() > self.max_segments):
+            self.compact()
+
+    def close(self):
+        with self._lock:
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> Dict[str, int]:
+        return {'listings': len(self._index), 'records': self.records, 'segments': self.segment_count()}
@@ -0,0 +1,131 @@
+import re
+from typing import Any, Dict, Optional
+
+CURRENCY_SYMBOLS = {
+    'GHS': 'GH₵',
+    'USD': '$'
+}
+
+PRICE_NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+
+def parse_currency(price_text: str) -> str:
+    """Detect the currency of a price string (Jiji Ghana lists in cedis)"""
+    lowered = price_text.lower()
+    if '$' in lowered or 'usd' in lowered:
+        return 'USD'
+    return 'GHS'
+
+
+def parse_price_pesewas(price_text: str) -> Optional[int]:
+    """Parse the first amount in a price string into pesewas (1/100 of a cedi)"""
+    if not price_text:
+        return None
+    match = PRICE_NUMBER_PATTERN.search(price_text)
+    if not match:
+        return None
+    try:
+        return int(round(float(match.group().replace(',', '')) * 100))
+    except ValueError:
+        return None
+
+
+class Product:
+    """Compact listing record with the price parsed once
+
+    Prices are stored as integer pesewas plus a currency code; the display
+    string is rebuilt on demand. Dict-style access (``product['title']``,
+    ``product.get('price')``) is kept so templates and session code that
+    treat products as dicts keep working.
+    """
+
+    __slots__ = ('title', 'link', 'location', 'price_pesewas', 'currency', 'price_label')
+
+    FIELDS = ('title', 'price', 'link', 'location')
+
+    def __init__(self, title: str, link: str = '#', location: str = 'Ghana',
+                 price_pesewas: Optional[int] = None, currency: str = 'GHS',
+                 price_label: Optional[str] = None):
+        self.title = title
+        self.link = link
+        self.location = location
+        self.price_pesewas = price_pesewas
+        self.currency = currency
+        # Only kept when the listing has no numeric price ("Price on request")
+        self.price_label = price_label if price_pesewas is None else None
+
+    @classmethod
+    def from_listing(cls, title: str, link: str, price_text: str, location: str) -> 'Product':
+        """Build a product from the raw strings scraped off a listing card"""
+        price_pesewas = parse_price_pesewas(price_text)
+        return cls(
+            title=title,
+            link=link,
+            location=location,
+            price_pesewas=price_pesewas,
+            currency=parse_currency(price_text) if price_pesewas is not None else 'GHS',
+            price_label=price_text.strip() if price_pesewas is None else None
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Product':
+        """Build a product from a legacy product dict"""
+        if isinstance(data, cls):
+            return data
+        return cls.from_listing(
+            data.get('title', 'Product Title'),
+            data.get('link', '#'),
+            str(data.get('price', '')),
+            data.get('location', 'Ghana')
+        )
+
+    @property
+    def price_ghs(self) -> Optional[float]:
+        """Price in whole currency units, or None if not listed"""
+        return None if self.price_pesewas is None else self.price_pesewas / 100
+
+    @property
+    def price(self) -> str:
+        """Display price such as GH₵ 4,200"""
+        if self.price_pesewas is None:
+            return self.price_label or "Price on request"
+        symbol = CURRENCY_SYMBOLS.get(self.currency, self.currency)
+        whole, fraction = divmod(self.price_pesewas, 100)
+        amount = f"{whole:,}" if not fraction else f"{whole:,}.{fraction:02d}"
+        return f"{symbol} {amount}"
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__ or key in ('price', 'price_ghs'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for JSON export"""
+        return {
+            'title': self.title,
+            'price': self.price,
+            'link': self.link,
+            'location': self.location,
+            'price_pesewas': self.price_pesewas,
+            'currency': self.currency
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Product):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash((self.link, self.title, self.price_pesewas))
+
+    def __repr__(self) -> str:
+        return f"Product(title={self.title!r}, price={self.price!r}, location={self.location!r}, link={self.link!r})"
@@ -0,0 +1,110 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from utils.product import Product
+
+# Letters and digits apart, so "128GB" in a title matches the "128 gb" spec entity
+TERM_PATTERN = re.compile(r'[a-z]+|\d+(?:\.\d+)?')
+
+QUERY_STOPWORDS = frozenset([
+    'a', 'an', 'and', 'the', 'for', 'in', 'of', 'to', 'with', 'under', 'below', 'between', 'me',
+    'i', 'find', 'search', 'show', 'want', 'need', 'buy', 'looking', 'cheap', 'cheapest', 'best',
+    'budget', 'ghs', 'gh', 'price', 'less', 'than', 'max', 'maximum', 'affordable'
+])
+
+
+def terms(text: str) -> List[str]:
+    return TERM_PATTERN.findall(text.lower())
+
+
+class ResultRanker:
+    """BM25 relevance of listing titles to a search, with budget and location boosts
+
+    IDF comes from the candidate set itself, so terms every candidate
+    shares (the product type that was searched for) count for little and
+    distinguishing ones (model, storage, brand) decide the order. BM25 is
+    scaled by the fraction of query terms a title matches, and the final
+    score is ``bm25 * (1 + budget_boost * fit) + location_boost``
+    where ``fit`` is 1 for a price inside the budget and
+    ``unknown_price_fit`` for a listing with no price.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, budget_boost: float = 0.5,
+                 location_boost: float = 0.5, unknown_price_fit: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.budget_boost = budget_boost
+        self.location_boost = location_boost
+        self.unknown_price_fit = unknown_price_fit
+
+    def query_terms(self, query: str, entities: Dict[str, Any]) -> List[str]:
+        """Search terms from the extracted entities, else from the raw query"""
+        words = []
+        for field in ('product_type', 'brand', 'specifications'):
+            for value in entities.get(field) or ():
+                words.extend(terms(value))
+        if not words:
+            words = [word for word in terms(query) if word not in QUERY_STOPWORDS]
+        return list(dict.fromkeys(words))
+
+    def bm25(self, documents: Sequence[List[str]], query_terms: Iterable[str]) -> List[float]:
+        query_terms = list(query_terms)
+        if not documents or not query_terms:
+            return [0.0] * len(documents)
+        frequencies = [Counter(document) for document in documents]
+        average_length = sum(len(document) for document in documents) / len(documents) or 1.0
+        count = len(documents)
+
+        idf = {}
+        for term in query_terms:
+            containing = sum(1 for frequency in frequencies if term in frequency)
+            idf[term] = math.log(1 + (count - containing + 0.5) / (containing + 0.5))
+
+        scores = []
+        for document, frequency in zip(documents, frequencies):
+            norm = self.k1 * (1 - self.b + self.b * len(document) / average_length)
+            score = 0.0
+            matched = 0
+            for term in query_terms:
+                tf = frequency.get(term)
+                if tf:
+                    score += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+                    matched += 1
+            # Coordination: a title matching one rare query word ("phone case")
+            # shouldn't outrank one matching most of them
+            scores.append(score * matched / len(query_terms))
+        return scores
+
+    def budget_fit(self, product: Product, budget: Optional[Dict[str, int]]) -> float:
+        if not budget:
+            return 0.0
+        if product.price_ghs is None:
+            return self.unknown_price_fit
+        if 'min' in budget and product.price_ghs < budget['min']:
+            return 0.0
+        if 'max' in budget and product.price_ghs > budget['max']:
+            return 0.0
+        return 1.0
+
+    def score(self, products: Sequence[Product], query: str, entities: Dict[str, Any]) -> List[float]:
+        bm25 = self.bm25([terms(product.title) for product in products], self.query_terms(query, entities))
+        budget = entities.get('budget')
+        locations = [location.lower() for location in entities.get('location') or ()]
+        scores = []
+        for product, relevance in zip(products, bm25):
+            score = relevance * (1 + self.budget_boost * self.budget_fit(product, budget))
+            if locations and any(location in product.location.lower() for location in locations):
+                score += self.location_boost
+            scores.append(score)
+        return scores
+
+    def top_k(self, products: Sequence[Product], query: str, entities: Dict[str, Any],
+              k: Optional[int] = None) -> List[Product]:
+        """The ``k`` best products, best first; ties keep their original order"""
+        k = len(products) if k is None else k
+        scores = self.score(products, query, entities)
+        best = heapq.nlargest(k, range(len(products)), key=lambda index: (scores[index], -index))
+        return [products[index] for index in best]
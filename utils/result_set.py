@@ -0,0 +1,139 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.keyword_automaton import KeywordAutomaton
+from utils.product import Product
+
+MISSING_PRICE = -1
+
+
+@lru_cache(maxsize=8)
+def brand_automaton(brands: Tuple[str, ...]) -> KeywordAutomaton:
+    """Automaton reporting the vocabulary code (1-based) of each brand found"""
+    return KeywordAutomaton.from_dictionaries({'brand': {brand: code for code, brand in enumerate(brands, start=1)}})
+
+
+class ResultSet:
+    """Columnar view over a list of products for vectorized filtering and stats
+
+    Prices are held as an int64 array of pesewas (``MISSING_PRICE`` when a
+    listing has no price); location and brand are categorical codes into
+    small vocabularies, computed the first time a location or brand filter
+    needs them. Filters and sorts return new ResultSets that share the
+    underlying product objects.
+    """
+
+    def __init__(self, products: np.ndarray, prices: np.ndarray, known_brands: Sequence[str] = (),
+                 location_codes: Optional[np.ndarray] = None, locations: Sequence[str] = (),
+                 brand_codes: Optional[np.ndarray] = None):
+        self.products = products
+        self.prices = prices
+        self.known_brands = tuple(brand.lower() for brand in known_brands)
+        self.brands = ['other'] + list(self.known_brands)
+        self._location_codes = location_codes
+        self._locations = list(locations)
+        self._brand_codes = brand_codes
+
+    @classmethod
+    def from_products(cls, products: Sequence[Product], known_brands: Sequence[str] = ()) -> 'ResultSet':
+        """Build the columns from products; brands are matched against ``known_brands``"""
+        # fromiter: assigning a list would make NumPy probe each Product as a sequence
+        objects = np.fromiter(products, dtype=object, count=len(products))
+
+        prices = np.fromiter(
+            (MISSING_PRICE if p.price_pesewas is None else p.price_pesewas for p in products),
+            dtype=np.int64, count=len(products)
+        )
+        return cls(objects, prices, known_brands)
+
+    def _encode_locations(self):
+        if self._location_codes is None:
+            codes = {}
+            self._location_codes = np.fromiter((codes.setdefault(p.location, len(codes)) for p in self.products),
+                                               dtype=np.int32, count=len(self.products))
+            self._locations = list(codes)
+
+    @property
+    def location_codes(self) -> np.ndarray:
+        self._encode_locations()
+        return self._location_codes
+
+    @property
+    def locations(self) -> List[str]:
+        self._encode_locations()
+        return self._locations
+
+    @property
+    def brand_codes(self) -> np.ndarray:
+        if self._brand_codes is None:
+            brand_codes = np.zeros(len(self.products), dtype=np.int32)
+            if self.known_brands:
+                automaton = brand_automaton(self.known_brands)
+                for index, product in enumerate(self.products):
+                    # Whole words only ("hp" isn't in "shipping"); the earliest-listed brand wins
+                    codes = automaton.values(product.title.lower(), 'brand')
+                    if codes:
+                        brand_codes[index] = min(codes)
+            self._brand_codes = brand_codes
+        return self._brand_codes
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def take(self, index: np.ndarray) -> 'ResultSet':
+        """Rows selected by a boolean mask or integer index array"""
+        return ResultSet(
+            self.products[index], self.prices[index], self.known_brands,
+            None if self._location_codes is None else self._location_codes[index], self._locations,
+            None if self._brand_codes is None else self._brand_codes[index]
+        )
+
+    def to_products(self) -> List[Product]:
+        return self.products.tolist()
+
+    @property
+    def has_price(self) -> np.ndarray:
+        return self.prices != MISSING_PRICE
+
+    def filter_budget(self, min_ghs: Optional[float] = None, max_ghs: Optional[float] = None) -> 'ResultSet':
+        """Keep priced rows within [min_ghs, max_ghs] (whole cedis)"""
+        mask = self.has_price
+        if min_ghs is not None:
+            mask &= self.prices >= int(min_ghs * 100)
+        if max_ghs is not None:
+            mask &= self.prices <= int(max_ghs * 100)
+        return self.take(mask)
+
+    def filter_location(self, location: str) -> 'ResultSet':
+        """Keep rows whose location mentions ``location`` (case-insensitive)"""
+        wanted = [code for code, name in enumerate(self.locations) if location.lower() in name.lower()]
+        return self.take(np.isin(self.location_codes, wanted))
+
+    def filter_brand(self, brand: str) -> 'ResultSet':
+        """Keep rows detected as ``brand``"""
+        brand = brand.lower()
+        if brand not in self.brands:
+            return self.take(np.zeros(len(self), dtype=bool))
+        return self.take(self.brand_codes == self.brands.index(brand))
+
+    def sort_by_price(self, descending: bool = False) -> 'ResultSet':
+        """Stable sort by price; unpriced rows always go last"""
+        keys = self.prices.astype(np.float64)
+        if descending:
+            keys = -keys
+        keys[~self.has_price] = np.inf
+        return self.take(np.argsort(keys, kind='stable'))
+
+    def price_stats(self) -> Dict[str, float]:
+        """Count, min, mean and max price in whole cedis over priced rows"""
+        priced = self.prices[self.has_price]
+        if not len(priced):
+            return {'count': 0}
+        return {
+            'count': int(len(priced)),
+            'min': float(priced.min()) / 100,
+            'mean': float(priced.mean()) / 100,
+            'max': float(priced.max()) / 100
+        }
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+class ScrapePathStats:
+    """Learns which search URL templates and card selectors work per category
+
+    Each (category, kind, path) keeps success/failure counts and a run of
+    consecutive failures. ``order`` puts the best performing paths first and
+    drops paths that keep failing, letting one through again every
+    ``probe_interval`` seconds so a recovered path can win back its place.
+    Statistics are written to a small JSON file so restarts keep what was
+    learned.
+    """
+
+    def __init__(self, path: Optional[str] = None, dead_after: int = 5,
+                 probe_interval: float = 600, save_interval: float = 30):
+        self.path = path
+        self.dead_after = dead_after
+        self.probe_interval = probe_interval
+        self.save_interval = save_interval
+        self._stats = {}  # "category|kind" -> {path: {...}}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.load()
+
+    def _entry(self, category: str, kind: str, path: str) -> Dict[str, float]:
+        paths = self._stats.setdefault(f"{category}|{kind}", {})
+        return paths.setdefault(path, {'success': 0, 'failure': 0, 'streak': 0, 'last_try': 0.0})
+
+    def record(self, category: str, kind: str, path: str, success: bool):
+        """Record the outcome of trying ``path`` for a query in ``category``"""
+        with self._lock:
+            entry = self._entry(category, kind, path)
+            entry['last_try'] = time.time()
+            if success:
+                entry['success'] += 1
+                entry['streak'] = 0
+            else:
+                entry['failure'] += 1
+                entry['streak'] += 1
+            self._dirty = True
+        self.maybe_save()
+
+    def score(self, entry: Dict[str, float]) -> float:
+        """Laplace-smoothed success rate"""
+        return (entry['success'] + 1) / (entry['success'] + entry['failure'] + 2)
+
+    def order(self, category: str, kind: str, paths: Sequence[str], skip_dead: bool = True) -> List[str]:
+        """Return ``paths`` best first; dead ones are dropped, or moved last if not ``skip_dead``"""
+        with self._lock:
+            known = self._stats.get(f"{category}|{kind}", {})
+            now = time.time()
+            alive = []
+            dead = []
+            for index, path in enumerate(paths):
+                entry = known.get(path)
+                if entry is None:
+                    alive.append((0.5, index, path))
+                elif entry['streak'] >= self.dead_after and now - entry['last_try'] < self.probe_interval:
+                    dead.append((self.score(entry), index, path))
+                else:
+                    alive.append((self.score(entry), index, path))
+
+        alive.sort(key=lambda item: (-item[0], item[1]))
+        dead.sort(key=lambda item: (-item[0], item[1]))
+        if not skip_dead:
+            return [path for _, _, path in alive + dead]
+        # Never skip everything; fall back to the least bad dead path
+        return [path for _, _, path in alive or dead[:1]]
+
+    def load(self):
+        """Load statistics from disk, ignoring a missing or corrupt file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as handle:
+                data = json.load(handle)
+            if isinstance(data, dict):
+                self._stats = data
+        except (OSError, ValueError):
+            self._stats = {}
+
+    def save(self):
+        """Write statistics to disk atomically"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                snapshot = json.dumps(self._stats, indent=1, sort_keys=True)
+                self._dirty = False
+                self._last_save = time.monotonic()
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as handle:
+                    handle.write(snapshot)
+                os.replace(temp_path, self.path)
+            except OSError:
+                pass  # Learned ordering is an optimization; never fail a search over it
+
+    def maybe_save(self):
+        """Save if there are changes and the last save is old enough"""
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
@@ -1,7 +1,11 @@
 import streamlit as st
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 import json
+import uuid
+
+from utils.product import Product
+from utils.price_alerts import PriceAlert, PriceAlertEngine
 
 class SessionManager:
     def __init__(self):
@@ -10,6 +14,7 @@ class SessionManager:
     def initialize_session_state(self):
         """Initialize all session state variables"""
         default_states = {
+            'session_id': uuid.uuid4().hex,
             'chat_history': [],
             'current_products': [],
             'user_preferences': {},
@@ -27,20 +32,22 @@ class SessionManager:
             if key not in st.session_state:
                 st.session_state[key] = default_value
     
-    def add_to_search_history(self, query: str, results_count: int):
-        """Add search to history"""
+    def add_to_search_history(self, query: str, results_count: int, entities: Optional[Dict[str, Any]] = None):
+        """Add search to history, with the budget extracted from the query"""
         search_entry = {
             'query': query,
             'timestamp': datetime.now().isoformat(),
             'results_count': results_count
         }
+        if entities is not None:
+            search_entry['budget'] = dict(entities.get('budget') or {})
         
         # Keep only last 50 searches
         st.session_state.search_history.append(search_entry)
         if len(st.session_state.search_history) > 50:
             st.session_state.search_history = st.session_state.search_history[-50:]
     
-    def add_to_favorites(self, product: Dict[str, str]):
+    def add_to_favorites(self, product: Product):
         """Add product to favorites"""
         if product not in st.session_state.favorite_products:
             st.session_state.favorite_products.append(product)
@@ -54,6 +61,15 @@ class SessionManager:
             if p.get('title') != product_title
         ]
     
+    def collect_price_alerts(self, engine: PriceAlertEngine) -> List[PriceAlert]:
+        """Move alerts queued for this session into price_alerts"""
+        alerts = engine.drain(st.session_state.session_id)
+        if alerts:
+            st.session_state.price_alerts.extend(alerts)
+            # Keep only the last 50 alerts
+            st.session_state.price_alerts = st.session_state.price_alerts[-50:]
+        return alerts
+    
     def update_user_preferences(self, preferences: Dict[str, Any]):
         """Update user preferences"""
         st.session_state.user_preferences.update(preferences)
@@ -66,7 +82,8 @@ class SessionManager:
     def export_chat_history(self) -> str:
         """Export chat history as JSON"""
         try:
-            return json.dumps(st.session_state.chat_history, indent=2, ensure_ascii=False)
+            return json.dumps(st.session_state.chat_history, indent=2, ensure_ascii=False,
+                              default=lambda value: value.to_dict() if hasattr(value, 'to_dict') else str(value))
         except Exception as e:
             return f"Error exporting chat history: {str(e)}"
     
@@ -114,15 +131,11 @@ class SessionManager:
         """Determine user's favorite product categories from history"""
         categories = {}
         
+        # Uses the entities cached on each user message when it was classified
         for message in st.session_state.chat_history:
-            if message['role'] == 'user':
-                content = message['content'].lower()
-                if any(word in content for word in ['phone', 'smartphone', 'mobile']):
-                    categories['smartphones'] = categories.get('smartphones', 0) + 1
-                elif any(word in content for word in ['laptop', 'computer']):
-                    categories['laptops'] = categories.get('laptops', 0) + 1
-                elif any(word in content for word in ['headphone', 'speaker', 'audio']):
-                    categories['audio'] = categories.get('audio', 0) + 1
+            if message['role'] == 'user' and message.get('entities'):
+                for category in message['entities'].get('category', ()):
+                    categories[category] = categories.get(category, 0) + 1
         
         return sorted(categories.keys(), key=categories.get, reverse=True)
     
@@ -130,16 +143,10 @@ class SessionManager:
         """Calculate user's average budget from search history"""
         budgets = []
         
+        # Budget bounds extracted when each search was classified
         for search in st.session_state.search_history:
-            query = search['query'].lower()
-            # Extract budget mentions
-            import re
-            budget_matches = re.findall(r'(\d+(?:,\d{3})*)', query)
-            if budget_matches:
-                try:
-                    budgets.extend([int(b.replace(',', '')) for b in budget_matches])
-                except ValueError:
-                    continue
+            budget = search.get('budget') or {}
+            budgets.extend(budget[bound] for bound in ('min', 'max') if bound in budget)
         
         if budgets:
             return {
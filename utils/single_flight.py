@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and get the same result (or exception).
+    Nothing is remembered once the call finishes - that's the cache's job.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> Future of the in-flight call
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` unless a call for ``key`` is already in flight"""
+        with self._lock:
+            self.calls += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                future = Future()
+                self._calls[key] = future
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'collapsed': self.collapsed,
+                'in_flight': len(self._calls),
+                'collapse_rate': self.collapsed / self.calls if self.calls else 0.0
+            }
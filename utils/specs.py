@@ -0,0 +1,136 @@
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.product import Product
+
+# The spec grammar shared with the chat message extractor: a number (with
+# optional thousands commas), an optional "-" and a unit spelling
+NUMBER = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+SPEC_SEPARATOR = r'\s*-?\s*'
+SPEC_END = r'(?![a-z])'
+
+# Unit spelling -> canonical unit
+SPEC_UNITS = {'gb': 'gb', 'tb': 'tb', 'inch': 'inch', 'inches': 'inch', '"': 'inch', '”': 'inch', 'mp': 'mp',
+              'core': 'core', 'cores': 'core'}
+
+
+def unit_pattern(*units: str) -> str:
+    """Regex alternation of the spellings of ``units`` (every unit when none given), longest first"""
+    spellings = [spelling for spelling, unit in SPEC_UNITS.items() if not units or unit in units]
+    return '|'.join(re.escape(spelling) for spelling in sorted(spellings, key=len, reverse=True))
+
+
+def spec_value(number: str, unit: str) -> float:
+    """A matched number in the unit's base scale (TB in GB)"""
+    value = float(number.replace(',', ''))
+    return value * 1024 if SPEC_UNITS[unit.lower()] == 'tb' else value
+
+
+STORAGE_UNITS = unit_pattern('gb', 'tb')
+SCREEN_UNITS = unit_pattern('inch')
+CAMERA_UNITS = unit_pattern('mp')
+
+# One alternation over every spec unit, so a listing title is scanned once.
+# RAM is told apart from storage by "ram" next to it or a "4/64GB" pair.
+TITLE_SPEC_PATTERN = re.compile('|'.join([
+    rf'(?P<pair_ram>\d+)\s*(?:gb)?\s*[/+]\s*(?P<pair_storage>\d+){SPEC_SEPARATOR}'
+    rf'(?P<pair_unit>{STORAGE_UNITS}){SPEC_END}',
+    rf'\bram\s*:?\s*(?P<ram_before>\d+){SPEC_SEPARATOR}gb{SPEC_END}',
+    rf'(?P<ram_after>\d+){SPEC_SEPARATOR}gb\s*(?:of\s*)?ram\b',
+    rf'(?P<size>{NUMBER}){SPEC_SEPARATOR}(?P<size_unit>{STORAGE_UNITS}){SPEC_END}',
+    rf'(?P<screen>{NUMBER}){SPEC_SEPARATOR}(?:{SCREEN_UNITS}){SPEC_END}',
+    rf'(?P<camera>{NUMBER}){SPEC_SEPARATOR}(?:{CAMERA_UNITS}){SPEC_END}',
+    r'\b(?P<condition>brand new|uk used|foreign used|locally used|refurbished|used|new)\b'
+]), re.IGNORECASE)
+
+CONDITIONS = {
+    'brand new': 'New',
+    'new': 'New',
+    'uk used': 'Foreign used',
+    'foreign used': 'Foreign used',
+    'locally used': 'Used',
+    'used': 'Used',
+    'refurbished': 'Refurbished'
+}
+
+# A lone GB figure this small next to a bigger one is RAM, not storage
+MAX_RAM_GB = 24
+
+
+def scan_title(title: str) -> Dict[str, Optional[float]]:
+    """Storage/RAM (GB), screen (inches), camera (MP) and condition of one title"""
+    storage = ram = screen = camera = None
+    condition = None
+    sizes = []
+    for match in TITLE_SPEC_PATTERN.finditer(title):
+        group = match.lastgroup
+        if match.group('pair_storage'):
+            ram = float(match.group('pair_ram'))
+            storage = spec_value(match.group('pair_storage'), match.group('pair_unit'))
+        elif group == 'ram_before' or group == 'ram_after':
+            ram = float(match.group(group))
+        elif match.group('size'):
+            sizes.append(spec_value(match.group('size'), match.group('size_unit')))
+        elif group == 'screen' and screen is None:
+            screen = spec_value(match.group('screen'), 'inch')
+        elif group == 'camera':
+            camera = max(camera or 0.0, spec_value(match.group('camera'), 'mp'))
+        elif group == 'condition' and condition is None:
+            condition = CONDITIONS[match.group('condition').lower()]
+
+    if sizes and storage is None:
+        storage = max(sizes)
+        smaller = [size for size in sizes if size < storage and size <= MAX_RAM_GB]
+        if ram is None and smaller:
+            ram = max(smaller)
+    return {'storage_gb': storage, 'ram_gb': ram, 'screen_in': screen, 'camera_mp': camera, 'condition': condition}
+
+
+class SpecSheet:
+    """Columnar specs and derived value metrics for a batch of products
+
+    Numeric columns are float64 arrays with NaN where a title doesn't say;
+    prices are in whole cedis. Derived metrics are computed for the whole
+    batch at once, so comparing a full results page costs the same code
+    path as comparing two listings.
+    """
+
+    NUMERIC = ('storage_gb', 'ram_gb', 'screen_in', 'camera_mp')
+
+    def __init__(self, products: Sequence[Product], columns: Dict[str, np.ndarray], conditions: List[Optional[str]]):
+        self.products = list(products)
+        self.columns = columns
+        self.conditions = conditions
+
+    @classmethod
+    def from_products(cls, products: Sequence[Product]) -> 'SpecSheet':
+        scanned = [scan_title(product.title) for product in products]
+        columns = {
+            name: np.array([np.nan if specs[name] is None else specs[name] for specs in scanned], dtype=np.float64)
+            for name in cls.NUMERIC
+        }
+        columns['price'] = np.array(
+            [np.nan if product.price_pesewas is None else product.price_pesewas / 100 for product in products],
+            dtype=np.float64
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns['price_per_gb'] = columns['price'] / columns['storage_gb']
+            columns['price_per_gb_ram'] = columns['price'] / columns['ram_gb']
+            columns['price_per_mp'] = columns['price'] / columns['camera_mp']
+        return cls(products, columns, [specs['condition'] for specs in scanned])
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def best(self, column: str) -> Optional[int]:
+        """Row with the lowest finite value of a metric column"""
+        values = self.columns[column]
+        finite = np.isfinite(values)
+        if not finite.any():
+            return None
+        return int(np.where(finite, values, np.inf).argmin())
+
+    def has_any(self, column: str) -> bool:
+        return bool(np.isfinite(self.columns[column]).any())